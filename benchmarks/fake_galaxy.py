@@ -0,0 +1,608 @@
+#!/usr/bin/env python
+"""
+Fake Galaxy server for benchmarking the wft4galaxy runner without a real Galaxy instance.
+
+The server implements, on localhost, the subset of the Galaxy API used by wft4galaxy (by means of bioblend):
+histories and their contents, uploads, workflow import, invocation and deletion, dataset states and downloads.
+Workflow tool steps are simulated as identity jobs (each output dataset has the content of the first input
+of its step) which stay queued for ``queue_duration`` seconds and then run for ``job_duration`` seconds.
+Every request is delayed by ``latency`` seconds and counted per endpoint.
+"""
+from __future__ import print_function
+from future.utils import iteritems as _iteritems
+from future.moves.urllib.parse import urlparse as _urlparse, parse_qs as _parse_qs
+from future.moves.http.server import BaseHTTPRequestHandler as _BaseHTTPRequestHandler
+from future.moves.http.server import HTTPServer as _HTTPServer
+from future.moves.socketserver import ThreadingMixIn as _ThreadingMixIn
+
+import re as _re
+import sys as _sys
+import json as _json
+import time as _time
+import uuid as _uuid
+import logging as _logging
+import argparse as _argparse
+import itertools as _itertools
+import threading as _threading
+
+try:
+    from email.parser import BytesParser as _BytesParser
+
+    def _parse_mime(data):
+        return _BytesParser().parsebytes(data)
+except ImportError:
+    from email.parser import Parser as _Parser
+
+    def _parse_mime(data):
+        return _Parser().parsestr(data)
+
+# create a module level logger
+_logger = _logging.getLogger("FakeGalaxy")
+
+# version reported by the fake server (uploads are posted to the tools API, without tus)
+GALAXY_VERSION = {"version_major": "20.09", "version_minor": "0"}
+
+# tools installed by default on the fake server
+DEFAULT_TOOLS = (("ChangeCase", "1.0.0"), ("wft4galaxy_bench_identity", "1.0.0"))
+
+
+class FakeGalaxy(object):
+    """
+    In-memory fake of a Galaxy server, served on ``host``:``port`` by a pool of threads.
+
+    .. code-block:: Python
+
+        with FakeGalaxy(job_duration=0.5) as galaxy:
+            WorkflowTestsRunner(galaxy.url, "any-api-key").run(suite)
+            print(galaxy.get_request_counts())
+    """
+
+    def __init__(self, latency=0.0, upload_duration=0.0, queue_duration=0.0, job_duration=0.0,
+                 tools=DEFAULT_TOOLS, host="127.0.0.1", port=0):
+        """
+        :type latency: float
+        :param latency: delay (in seconds) of every API request
+
+        :type upload_duration: float
+        :param upload_duration: time (in seconds) after which uploaded datasets are ready
+
+        :type queue_duration: float
+        :param queue_duration: time (in seconds) spent in the queue by each job
+
+        :type job_duration: float
+        :param job_duration: execution time (in seconds) of each job
+
+        :type tools: list
+        :param tools: the list of installed tools, as pairs (<TOOL_ID>, <TOOL_VERSION>)
+        """
+        self.latency = latency
+        self.upload_duration = upload_duration
+        self.queue_duration = queue_duration
+        self.job_duration = job_duration
+        self.tools = [{"id": tool_id, "name": tool_id, "version": version, "model_class": "Tool"}
+                      for tool_id, version in tools]
+        self._lock = _threading.RLock()
+        self._ids = _itertools.count(1)
+        self._histories = {}
+        self._datasets = {}
+        self._workflows = {}
+        self._request_counts = {}
+        self._server = _ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.galaxy = self
+        self._thread = None
+
+    @property
+    def url(self):
+        """ The URL of the fake server. """
+        host, port = self._server.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    def start(self):
+        """ Start serving requests on a background thread. """
+        self._thread = _threading.Thread(target=self._server.serve_forever, name="FakeGalaxy")
+        self._thread.daemon = True
+        self._thread.start()
+        _logger.debug("Fake Galaxy listening @ %s", self.url)
+        return self
+
+    def stop(self):
+        """ Stop serving requests. """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def get_request_counts(self):
+        """
+        :rtype: dict
+        :return: map <METHOD ENDPOINT>:<NUMBER_OF_REQUESTS> of the requests served so far
+        """
+        with self._lock:
+            return dict(self._request_counts)
+
+    def reset_request_counts(self):
+        with self._lock:
+            self._request_counts.clear()
+
+    def _count_request(self, method, endpoint):
+        key = "{0} {1}".format(method, endpoint)
+        with self._lock:
+            self._request_counts[key] = self._request_counts.get(key, 0) + 1
+
+    def _new_id(self):
+        return "{0:016x}".format(next(self._ids))
+
+    # -------------------------------------------------------------------------------------------------------------
+    # histories and datasets
+    # -------------------------------------------------------------------------------------------------------------
+
+    def create_history(self, name):
+        with self._lock:
+            history = {"id": self._new_id(), "name": name or "Unnamed history", "deleted": False, "purged": False,
+                       "datasets": [], "hid": _itertools.count(1)}
+            self._histories[history["id"]] = history
+            return self._show_history(history)
+
+    def get_history(self, history_id):
+        history = self._histories.get(history_id)
+        if history is None:
+            raise _NotFound("History {0} not found".format(history_id))
+        return history
+
+    def _show_history(self, history):
+        states = {}
+        for dataset_id in history["datasets"]:
+            dataset = self._datasets[dataset_id]
+            if not dataset["deleted"]:
+                states.setdefault(self._dataset_state(dataset), []).append(dataset_id)
+        state = "running" if "running" in states else "queued" if "queued" in states else "ok"
+        return {"id": history["id"], "name": history["name"], "model_class": "History",
+                "deleted": history["deleted"], "purged": history["purged"], "published": False,
+                "annotation": None, "tags": [], "state": state, "state_ids": states,
+                "state_details": {k: len(v) for k, v in _iteritems(states)}, "size": len(history["datasets"]),
+                "url": "/api/histories/{0}".format(history["id"])}
+
+    def show_history(self, history_id):
+        with self._lock:
+            return self._show_history(self.get_history(history_id))
+
+    def list_histories(self, name=None):
+        with self._lock:
+            return [{"id": h["id"], "name": h["name"], "deleted": False, "model_class": "History",
+                     "url": "/api/histories/{0}".format(h["id"])}
+                    for h in self._histories.values() if not h["deleted"] and (name is None or h["name"] == name)]
+
+    def delete_history(self, history_id, purge=False):
+        with self._lock:
+            history = self.get_history(history_id)
+            history["deleted"] = True
+            history["purged"] = bool(purge)
+            if purge:
+                for dataset_id in history["datasets"]:
+                    self._datasets.pop(dataset_id, None)
+                history["datasets"] = []
+            return self._show_history(history)
+
+    def add_dataset(self, history_id, name, content, file_ext="txt", ready_at=None, queued_until=None):
+        with self._lock:
+            history = self.get_history(history_id)
+            dataset = {"id": self._new_id(), "name": name, "history_id": history_id, "hid": next(history["hid"]),
+                       "content": content, "file_ext": file_ext, "deleted": False,
+                       "queued_until": queued_until or 0, "ready_at": ready_at or 0}
+            self._datasets[dataset["id"]] = dataset
+            history["datasets"].append(dataset["id"])
+            return dataset
+
+    def get_dataset(self, dataset_id, history_id=None):
+        dataset = self._datasets.get(dataset_id)
+        if dataset is None or (history_id is not None and dataset["history_id"] != history_id):
+            raise _NotFound("Dataset {0} not found".format(dataset_id))
+        return dataset
+
+    def set_dataset_state(self, dataset_id, state):
+        """
+        Force the state of a dataset (e.g., ``paused`` or ``error``); ``None`` restores its simulated state.
+        """
+        with self._lock:
+            self.get_dataset(dataset_id)["state"] = state
+
+    @staticmethod
+    def _dataset_state(dataset):
+        if dataset.get("state"):
+            return dataset["state"]
+        now = _time.time()
+        return "queued" if now < dataset["queued_until"] else "running" if now < dataset["ready_at"] else "ok"
+
+    def _show_dataset(self, dataset, summary=False):
+        info = {"id": dataset["id"], "name": dataset["name"], "hid": dataset["hid"],
+                "history_id": dataset["history_id"], "state": self._dataset_state(dataset),
+                "deleted": dataset["deleted"], "purged": False, "visible": True, "type": "file",
+                "history_content_type": "dataset", "model_class": "HistoryDatasetAssociation",
+                "url": "/api/histories/{0}/contents/{1}".format(dataset["history_id"], dataset["id"])}
+        if not summary:
+            info.update({"file_ext": dataset["file_ext"], "data_type": dataset["file_ext"],
+                         "file_size": len(dataset["content"]), "genome_build": "?", "misc_info": "",
+                         "misc_blurb": "", "annotation": None, "tags": [],
+                         "download_url": "/api/histories/{0}/contents/{1}/display".format(dataset["history_id"],
+                                                                                         dataset["id"])})
+        return info
+
+    def show_dataset(self, dataset_id, history_id=None):
+        with self._lock:
+            return self._show_dataset(self.get_dataset(dataset_id, history_id))
+
+    def show_history_contents(self, history_id):
+        with self._lock:
+            history = self.get_history(history_id)
+            return [self._show_dataset(self._datasets[dataset_id], summary=True)
+                    for dataset_id in history["datasets"]]
+
+    def get_dataset_content(self, dataset_id, history_id=None):
+        with self._lock:
+            dataset = self.get_dataset(dataset_id, history_id)
+            if self._dataset_state(dataset) != "ok":
+                raise _BadRequest("Dataset {0} is not ready".format(dataset_id))
+            return dataset["content"]
+
+    def copy_dataset(self, history_id, dataset_id):
+        with self._lock:
+            source = self.get_dataset(dataset_id)
+            dataset = self.add_dataset(history_id, source["name"], source["content"], source["file_ext"],
+                                       source["ready_at"], source["queued_until"])
+            return self._show_dataset(dataset)
+
+    def delete_dataset(self, history_id, dataset_id):
+        with self._lock:
+            dataset = self.get_dataset(dataset_id, history_id)
+            dataset["deleted"] = True
+            return self._show_dataset(dataset)
+
+    def upload(self, history_id, filename, content, inputs):
+        name = inputs.get("files_0|NAME") or filename or "upload"
+        file_ext = inputs.get("file_type") or "txt"
+        dataset = self.add_dataset(history_id, name, content, "txt" if file_ext == "auto" else file_ext,
+                                   ready_at=_time.time() + self.upload_duration)
+        with self._lock:
+            info = self._show_dataset(dataset)
+        return {"outputs": [info], "output_collections": [], "implicit_collections": [],
+                "jobs": [{"id": self._new_id(), "tool_id": "upload1", "state": "ok"}]}
+
+    # -------------------------------------------------------------------------------------------------------------
+    # workflows
+    # -------------------------------------------------------------------------------------------------------------
+
+    def import_workflow(self, definition):
+        if not isinstance(definition, dict):
+            definition = _json.loads(definition)
+        steps, inputs = {}, {}
+        for key, step in _iteritems(definition.get("steps", {})):
+            step_id = str(step.get("id", key))
+            tool_state = step.get("tool_state") or {}
+            if not isinstance(tool_state, dict):
+                tool_state = _json.loads(tool_state)
+            steps[step_id] = {
+                "id": int(step_id), "type": step.get("type"), "tool_id": step.get("tool_id"),
+                "tool_version": step.get("tool_version"), "annotation": step.get("annotation"),
+                "tool_inputs": tool_state or ({"input": None} if step.get("type") == "tool" else {}),
+                "input_steps": {name: {"source_step": c["id"], "step_output": c.get("output_name", "output")}
+                                for name, c in _iteritems(step.get("input_connections", {}))
+                                if isinstance(c, dict)}
+            }
+            if step.get("type") == "data_input":
+                label = step.get("label") or (step.get("inputs") or [{}])[0].get("name") or step.get("name")
+                inputs[step_id] = {"label": label, "value": "", "uuid": step.get("uuid")}
+        with self._lock:
+            workflow = {"id": self._new_id(), "name": definition.get("name", "Unnamed workflow"),
+                        "definition": definition, "steps": steps, "inputs": inputs, "deleted": False}
+            self._workflows[workflow["id"]] = workflow
+            return self._show_workflow(workflow, summary=True)
+
+    def get_workflow(self, workflow_id):
+        workflow = self._workflows.get(workflow_id)
+        if workflow is None:
+            raise _NotFound("Workflow {0} not found".format(workflow_id))
+        return workflow
+
+    @staticmethod
+    def _show_workflow(workflow, summary=False):
+        info = {"id": workflow["id"], "name": workflow["name"], "deleted": workflow["deleted"],
+                "published": False, "owner": "wft4galaxy", "tags": [], "annotation": None,
+                "model_class": "StoredWorkflow", "latest_workflow_uuid": str(_uuid.uuid4()),
+                "url": "/api/workflows/{0}".format(workflow["id"])}
+        if not summary:
+            info.update({"steps": workflow["steps"], "inputs": workflow["inputs"]})
+        return info
+
+    def show_workflow(self, workflow_id):
+        with self._lock:
+            return self._show_workflow(self.get_workflow(workflow_id))
+
+    def list_workflows(self):
+        with self._lock:
+            return [self._show_workflow(w, summary=True) for w in self._workflows.values() if not w["deleted"]]
+
+    def delete_workflow(self, workflow_id):
+        with self._lock:
+            self.get_workflow(workflow_id)["deleted"] = True
+            return "Workflow '{0}' successfully deleted".format(workflow_id)
+
+    def run_workflow(self, workflow_id, ds_map, history):
+        with self._lock:
+            workflow = self.get_workflow(workflow_id)
+            if history and history.startswith("hist_id="):
+                history_id = history[len("hist_id="):]
+            else:
+                history_id = self.create_history(history)["id"]
+            self.get_history(history_id)
+            # datasets produced (or consumed) by each step: <STEP_ID>:<OUTPUT_NAME>:<DATASET>
+            step_outputs = {}
+            for step_id, source in _iteritems(ds_map or {}):
+                dataset = self.get_dataset(source["id"])
+                step_outputs[str(step_id)] = {"output": dataset}
+            outputs = []
+            steps = workflow["definition"].get("steps", {})
+            for step_id in sorted(workflow["steps"], key=int):
+                step = steps.get(step_id) or steps.get(int(step_id)) or {}
+                if step.get("type") != "tool":
+                    continue
+                sources = [step_outputs.get(str(c["id"]), {}).get(c.get("output_name", "output"))
+                           for c in step.get("input_connections", {}).values() if isinstance(c, dict)]
+                sources = [s for s in sources if s is not None]
+                # jobs start when their inputs are ready
+                start = max([_time.time()] + [s["ready_at"] for s in sources])
+                queued_until = start + self.queue_duration
+                ready_at = queued_until + self.job_duration
+                content = sources[0]["content"] if sources else b""
+                renames = {a.get("output_name"): a.get("action_arguments", {}).get("newname")
+                           for a in (step.get("post_job_actions") or {}).values()
+                           if a.get("action_type") == "RenameDatasetAction"}
+                labels = {o.get("output_name"): o.get("label") for o in step.get("workflow_outputs") or []}
+                step_outputs[step_id] = {}
+                for output in step.get("outputs") or [{"name": "output", "type": "txt"}]:
+                    name = renames.get(output["name"]) or labels.get(output["name"]) \
+                           or "{0} on data {1}".format(step.get("tool_id"), step_id)
+                    dataset = self.add_dataset(history_id, name, content, output.get("type", "txt"),
+                                               ready_at=ready_at, queued_until=queued_until)
+                    step_outputs[step_id][output["name"]] = dataset
+                    outputs.append(dataset["id"])
+            return {"history": history_id, "outputs": outputs}
+
+
+class _NotFound(Exception):
+    status = 404
+
+
+class _BadRequest(Exception):
+    status = 400
+
+
+class _ThreadingHTTPServer(_ThreadingMixIn, _HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+# routes: (METHOD, ENDPOINT, HANDLER); an endpoint segment '{id}' matches a Galaxy ID
+_ROUTES = [
+    ("GET", "/api/version", "_get_version"),
+    ("GET", "/api/tools", "_get_tools"),
+    ("POST", "/api/tools", "_post_tools"),
+    ("GET", "/api/workflows", "_get_workflows"),
+    ("POST", "/api/workflows", "_post_workflows"),
+    ("POST", "/api/workflows/upload", "_post_workflows"),
+    ("GET", "/api/workflows/{id}", "_get_workflow"),
+    ("DELETE", "/api/workflows/{id}", "_delete_workflow"),
+    ("GET", "/api/histories", "_get_histories"),
+    ("POST", "/api/histories", "_post_histories"),
+    ("GET", "/api/histories/{id}", "_get_history"),
+    ("DELETE", "/api/histories/{id}", "_delete_history"),
+    ("GET", "/api/histories/{id}/contents", "_get_history_contents"),
+    ("POST", "/api/histories/{id}/contents", "_post_history_contents"),
+    ("GET", "/api/histories/{id}/contents/{id}", "_get_history_dataset"),
+    ("DELETE", "/api/histories/{id}/contents/{id}", "_delete_history_dataset"),
+    ("GET", "/api/histories/{id}/contents/{id}/display", "_get_history_dataset_display"),
+    ("GET", "/api/datasets/{id}", "_get_dataset"),
+    ("GET", "/api/datasets/{id}/display", "_get_dataset_display"),
+]
+_ROUTES = [(method, endpoint, _re.compile("^" + endpoint.replace("{id}", "([^/]+)") + "/?$"), handler)
+           for method, endpoint, handler in _ROUTES]
+
+
+class _RequestHandler(_BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        _logger.debug(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        galaxy = self.server.galaxy
+        url = _urlparse(self.path)
+        self.query = {k: v[-1] for k, v in _iteritems(_parse_qs(url.query))}
+        body = self._read_body()
+        if galaxy.latency:
+            _time.sleep(galaxy.latency)
+        for route_method, endpoint, pattern, handler in _ROUTES:
+            match = pattern.match(url.path)
+            if route_method == method and match:
+                galaxy._count_request(method, endpoint)
+                try:
+                    result = getattr(self, handler)(galaxy, body, *match.groups())
+                except (_NotFound, _BadRequest) as e:
+                    return self._send_json({"err_msg": str(e)}, e.status)
+                if isinstance(result, bytes):
+                    return self._send(result, "application/octet-stream")
+                return self._send_json(result)
+        galaxy._count_request(method, url.path)
+        self._send_json({"err_msg": "Not implemented by the fake Galaxy: {0} {1}".format(method, url.path)}, 501)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                chunk = self.rfile.read(size)
+                self.rfile.readline()
+                if size == 0:
+                    break
+                chunks.append(chunk)
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, data, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, value, status=200):
+        self._send(_json.dumps(value).encode("utf-8"), "application/json", status)
+
+    def _json_body(self, body):
+        if not body:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            return self._form_body(body)[0]
+        payload = _json.loads(body.decode("utf-8"))
+        # some clients send the payload as a JSON-encoded string
+        return _json.loads(payload) if not isinstance(payload, dict) else payload
+
+    def _form_body(self, body):
+        """ Parse a multipart body: return the fields and the uploaded files as <FIELD>:(<FILENAME>, <CONTENT>) """
+        message = _parse_mime(b"Content-Type: " + self.headers.get("Content-Type").encode("utf-8") +
+                              b"\r\n\r\n" + body)
+        fields, files = {}, {}
+        for part in message.get_payload():
+            name = part.get_param("name", header="content-disposition")
+            filename = part.get_param("filename", header="content-disposition")
+            content = part.get_payload(decode=True)
+            if filename is not None:
+                files[name] = (filename, content)
+            else:
+                fields[name] = content.decode("utf-8")
+        return fields, files
+
+    # handlers
+
+    def _get_version(self, galaxy, body):
+        return GALAXY_VERSION
+
+    def _get_tools(self, galaxy, body):
+        return galaxy.tools
+
+    def _post_tools(self, galaxy, body):
+        fields, files = self._form_body(body) if body else ({}, {})
+        if fields.get("tool_id") != "upload1":
+            raise _BadRequest("Only uploads are supported by the fake Galaxy")
+        inputs = _json.loads(fields.get("inputs") or "{}")
+        filename, content = files.get("files_0|file_data", (None, b""))
+        return galaxy.upload(fields.get("history_id"), filename, content, inputs)
+
+    def _get_workflows(self, galaxy, body):
+        return galaxy.list_workflows()
+
+    def _post_workflows(self, galaxy, body):
+        payload = self._json_body(body)
+        if "workflow" in payload:
+            return galaxy.import_workflow(payload["workflow"])
+        if "workflow_id" in payload:
+            return galaxy.run_workflow(payload["workflow_id"], payload.get("ds_map"),
+                                       payload.get("history") or "hist_id={0}".format(payload.get("history_id")))
+        raise _BadRequest("Missing workflow")
+
+    def _get_workflow(self, galaxy, body, workflow_id):
+        return galaxy.show_workflow(workflow_id)
+
+    def _delete_workflow(self, galaxy, body, workflow_id):
+        return galaxy.delete_workflow(workflow_id)
+
+    def _get_histories(self, galaxy, body):
+        name = self.query.get("name") or (self.query.get("qv") if self.query.get("q") == "name" else None)
+        return galaxy.list_histories(name)
+
+    def _post_histories(self, galaxy, body):
+        return galaxy.create_history(self._json_body(body).get("name"))
+
+    def _get_history(self, galaxy, body, history_id):
+        return galaxy.show_history(history_id)
+
+    def _delete_history(self, galaxy, body, history_id):
+        payload = self._json_body(body)
+        return galaxy.delete_history(history_id, payload.get("purge") or self.query.get("purge") == "True")
+
+    def _get_history_contents(self, galaxy, body, history_id):
+        return galaxy.show_history_contents(history_id)
+
+    def _post_history_contents(self, galaxy, body, history_id):
+        payload = self._json_body(body)
+        if payload.get("source") != "hda":
+            raise _BadRequest("Only copies of history datasets are supported by the fake Galaxy")
+        return galaxy.copy_dataset(history_id, payload.get("content"))
+
+    def _get_history_dataset(self, galaxy, body, history_id, dataset_id):
+        return galaxy.show_dataset(dataset_id, history_id)
+
+    def _delete_history_dataset(self, galaxy, body, history_id, dataset_id):
+        return galaxy.delete_dataset(history_id, dataset_id)
+
+    def _get_history_dataset_display(self, galaxy, body, history_id, dataset_id):
+        return galaxy.get_dataset_content(dataset_id, history_id)
+
+    def _get_dataset(self, galaxy, body, dataset_id):
+        return galaxy.show_dataset(dataset_id)
+
+    def _get_dataset_display(self, galaxy, body, dataset_id):
+        return galaxy.get_dataset_content(dataset_id)
+
+
+def _make_parser():
+    parser = _argparse.ArgumentParser(add_help=True, description="Serve a fake Galaxy API on localhost.")
+    parser.add_argument('--host', default="127.0.0.1", help='Address to listen on (default is 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on (default is 8080)')
+    parser.add_argument('--latency', type=float, default=0.0, metavar="SECONDS", help='Delay of every request')
+    parser.add_argument('--upload-duration', type=float, default=0.0, metavar="SECONDS",
+                        help='Time after which uploaded datasets are ready')
+    parser.add_argument('--queue-duration', type=float, default=0.0, metavar="SECONDS",
+                        help='Time spent in the queue by each job')
+    parser.add_argument('--job-duration', type=float, default=0.0, metavar="SECONDS",
+                        help='Execution time of each job')
+    parser.add_argument('--debug', help='Enable debug messages', action="store_true", default=False)
+    return parser
+
+
+def main():
+    options = _make_parser().parse_args()
+    _logging.basicConfig(level=_logging.DEBUG if options.debug else _logging.INFO,
+                         format="%(asctime)s [%(name)s] [%(levelname)+4.5s]  %(message)s")
+    galaxy = FakeGalaxy(latency=options.latency, upload_duration=options.upload_duration,
+                        queue_duration=options.queue_duration, job_duration=options.job_duration,
+                        host=options.host, port=options.port)
+    _logger.info("Fake Galaxy listening @ %s", galaxy.url)
+    try:
+        galaxy._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        galaxy._server.server_close()
+
+
+if __name__ == '__main__':
+    _sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Generators of synthetic outputs for the comparator benchmarks.
+
+Outputs are sequences of fixed-length records computed from their index, so that outputs of any size
+(up to several GB) can be written, reordered and altered without being held in memory.
+For each output, the following variants of the ``equal`` output can be written:
+
+* ``near_equal``: numeric fields differ by 1e-4 (within a two digit rounding) and text lines end with CRLF;
+* ``reordered``: the records (but the header) are permuted;
+* ``mismatch``: the last field of a single record, at 90% of the output, is missing.
+"""
+from __future__ import division
+
+import re as _re
+
+try:
+    from math import gcd as _gcd
+except ImportError:
+    from fractions import gcd as _gcd
+
+# formats of the synthetic outputs and their delimiters
+FORMATS = {"text": " ", "csv": ",", "tsv": "\t"}
+
+# variants of the synthetic outputs
+VARIANTS = ("equal", "near_equal", "reordered", "mismatch")
+
+# number of numeric columns of tables
+TABLE_COLUMNS = 6
+
+# length of the records of text outputs
+TEXT_RECORD_LENGTH = 80
+
+# words of text outputs
+_WORDS = ("alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa",
+          "lambda", "mu", "nu", "xi", "omicron", "pi", "rho", "sigma", "tau", "upsilon")
+
+# multipliers of the permutation of reordered outputs
+_PERMUTATION_MULTIPLIERS = (1000003, 999983, 7919, 104729)
+
+# number of records written at once
+_WRITE_BLOCK_RECORDS = 10000
+
+_SIZE_PATTERN = _re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?)B?$", _re.IGNORECASE)
+
+
+def parse_size(value):
+    """
+    Parse a size in bytes, optionally followed by a ``K``, ``M`` or ``G`` (binary) multiplier (e.g., ``512M``).
+
+    :rtype: int
+    :return: the size in bytes
+    """
+    match = _SIZE_PATTERN.match(str(value).strip())
+    if not match:
+        raise ValueError("Invalid size: {0}".format(value))
+    return int(float(match.group(1)) * 1024 ** " KMG".index(match.group(2).upper() or " "))
+
+
+def format_size(size):
+    for unit in ("B", "K", "M"):
+        if size < 1024 or size % 1024:
+            return "{0}{1}".format(size, unit if unit != "B" else "")
+        size //= 1024
+    return "{0}G".format(size)
+
+
+class SyntheticOutput(object):
+    """
+    Synthetic output of a given format (``text``, ``csv`` or ``tsv``) and (approximate) size.
+    """
+
+    def __init__(self, format, size):
+        """
+        :type format: str
+        :param format: the format of the output (see :data:`FORMATS`)
+
+        :type size: int
+        :param size: the size (in bytes) of the output
+        """
+        if format not in FORMATS:
+            raise ValueError("Invalid format: {0}".format(format))
+        self.format = format
+        self.delimiter = FORMATS[format]
+        self.header = "" if format == "text" else \
+            self.delimiter.join(["id"] + ["value{0}".format(j) for j in range(TABLE_COLUMNS)]) + "\n"
+        self.record_length = len(self.get_record(0)) + 1
+        self.records = max(1, (size - len(self.header)) // self.record_length)
+
+    @property
+    def size(self):
+        """ The size (in bytes) of the ``equal`` variant of the output """
+        return len(self.header) + self.records * self.record_length
+
+    def get_record(self, index, near_equal=False):
+        """
+        :rtype: str
+        :return: the record (without line ending) with the given index
+        """
+        if self.format == "text":
+            words = " ".join(_WORDS[(index * 7 + j * 13) % len(_WORDS)] for j in range(8))
+            return "{0:010d} {1}".format(index, words)[:TEXT_RECORD_LENGTH].ljust(TEXT_RECORD_LENGTH, ".")
+        # numbers with two decimal digits, shifted (below the rounding) by near equal outputs
+        shift = 0.0002 if near_equal else 0.0001
+        values = ["{0:010.6f}".format((index * 2654435761 + j * 40503) % 100000 / 100 + shift)
+                  for j in range(TABLE_COLUMNS)]
+        return self.delimiter.join(["row{0:09d}".format(index)] + values)
+
+    def get_order(self):
+        """
+        :return: a function which maps positions of the ``reordered`` variant to record indexes
+        """
+        n = self.records
+        multiplier = next((m for m in _PERMUTATION_MULTIPLIERS if _gcd(m, n) == 1), 1)
+        offset = n // 3
+        return lambda position: (multiplier * position + offset) % n
+
+    def write(self, filename, variant="equal"):
+        """
+        Write a variant of the output (see :data:`VARIANTS`) to ``filename``.
+
+        :rtype: int
+        :return: the size (in bytes) of the written file
+        """
+        if variant not in VARIANTS:
+            raise ValueError("Invalid variant: {0}".format(variant))
+        order = self.get_order() if variant == "reordered" else None
+        near_equal = variant == "near_equal"
+        line_ending = "\r\n" if near_equal and self.format == "text" else "\n"
+        mismatch = self.records * 9 // 10 if variant == "mismatch" else None
+        size = 0
+        with open(filename, "wb") as f:
+            f.write(self.header.encode("ascii"))
+            size += len(self.header)
+            for start in range(0, self.records, _WRITE_BLOCK_RECORDS):
+                block = []
+                for position in range(start, min(start + _WRITE_BLOCK_RECORDS, self.records)):
+                    record = self.get_record(order(position) if order else position, near_equal)
+                    if position == mismatch:
+                        record = record.rsplit(self.delimiter, 1)[0]
+                    block.append(record)
+                data = (line_ending.join(block) + line_ending).encode("ascii")
+                f.write(data)
+                size += len(data)
+        return size
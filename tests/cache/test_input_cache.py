@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from bioblend.galaxy.objects import GalaxyInstance
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy.cache import InputDatasetCache
+
+
+class TestInputDatasetCache(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestInputDatasetCache, self).setUp()
+        self.gi = GalaxyInstance(self.galaxy.url, "wft4galaxy-test")
+        self.input_filename = self.write_file("input.txt", b"chr1\t100\tgeneA\n" * 100)
+
+    def _make_cache(self, **options):
+        return InputDatasetCache(self.gi, index_filename=os.path.join(self.tmp_dir, "inputs.json"), **options)
+
+    def _get_uploads(self):
+        return self.galaxy.get_request_counts().get("POST /api/tools", 0)
+
+    def test_hit(self):
+        cache = self._make_cache()
+        history = self.gi.histories.create("test")
+        first = cache.get_dataset(history, self.input_filename)
+        second = cache.get_dataset(history, self.input_filename)
+        self.assertEqual(self._get_uploads(), 1)
+        self.assertNotEqual(first.id, second.id)
+        self.assertEqual(self.galaxy.get_dataset(second.id)["content"], b"chr1\t100\tgeneA\n" * 100)
+
+    def test_concurrent_misses(self):
+        cache = self._make_cache()
+        histories = [self.gi.histories.create("test_{0}".format(i)) for i in range(8)]
+        datasets = {}
+
+        def get_dataset(history):
+            datasets[history.id] = cache.get_dataset(history, self.input_filename)
+
+        threads = [threading.Thread(target=get_dataset, args=(history,)) for history in histories]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # the input is uploaded once and copied to every history
+        self.assertEqual(self._get_uploads(), 1)
+        self.assertEqual(sorted(datasets), sorted([h.id for h in histories]))
+        self.assertEqual(len(cache.history.get_datasets()), 1)
+
+    def _record_calls(self, calls, name):
+        histories = self.gi.gi.histories
+        fn = getattr(histories, name)
+
+        def record(*args, **kwargs):
+            calls.append(name)
+            return fn(*args, **kwargs)
+
+        setattr(histories, name, record)
+
+    def test_dataset_larger_than_cache(self):
+        cache = self._make_cache(max_size=10)
+        history = self.gi.histories.create("test")
+        calls = []
+        self._record_calls(calls, "copy_dataset")
+        self._record_calls(calls, "delete_dataset")
+        dataset = cache.get_dataset(history, self.input_filename)
+        # the dataset is copied before its entry is evicted
+        self.assertEqual(calls, ["copy_dataset", "delete_dataset"])
+        self.assertEqual(self.galaxy.get_dataset(dataset.id)["content"], b"chr1\t100\tgeneA\n" * 100)
+        cached = [self.galaxy.get_dataset(d.id) for d in cache.history.get_datasets()]
+        self.assertEqual([d["deleted"] for d in cached], [True])
+        cache.get_dataset(history, self.input_filename)
+        self.assertEqual(self._get_uploads(), 2)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestInputDatasetCache)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
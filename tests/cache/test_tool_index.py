@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import json
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from bioblend.galaxy.objects import GalaxyInstance
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy.cache import ToolIndex
+
+
+class TestToolIndex(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestToolIndex, self).setUp()
+        self.gi = GalaxyInstance(self.galaxy.url, "wft4galaxy-test")
+        self.index_filename = os.path.join(self.tmp_dir, "tools.json")
+
+    def _make_index(self, ttl=None):
+        return ToolIndex(self.gi, ttl=ttl, index_filename=self.index_filename)
+
+    def _get_tool_requests(self):
+        return self.galaxy.get_request_counts().get("GET /api/tools", 0)
+
+    def _install_tool(self, tool_id, version):
+        self.galaxy.tools.append({"id": tool_id, "name": tool_id, "version": version, "model_class": "Tool"})
+
+    def test_lookups(self):
+        index = self._make_index()
+        self.assertIn(("ChangeCase", "1.0.0"), index)
+        self.assertNotIn(("ChangeCase", "2.0.0"), index)
+        self.assertEqual(index.find_missing_tools([("ChangeCase", "1.0.0"), ("Cut1", "1.0.2")]), [("Cut1", "1.0.2")])
+        # the tool list is downloaded once
+        self.assertEqual(self._get_tool_requests(), 1)
+        self.assertFalse(os.path.exists(self.index_filename))
+
+    def test_persisted_index(self):
+        self.assertEqual(len(self._make_index(ttl=60)), 2)
+        self.assertEqual(len(self._make_index(ttl=60)), 2)
+        self.assertEqual(self._get_tool_requests(), 1)
+        # an expired index is downloaded again
+        with open(self.index_filename) as f:
+            entries = json.load(f)
+        entries["timestamp"] -= 120
+        with open(self.index_filename, "w") as f:
+            json.dump(entries, f)
+        self.assertEqual(len(self._make_index(ttl=60)), 2)
+        self.assertEqual(self._get_tool_requests(), 2)
+
+    def test_refresh_on_missing_tools(self):
+        self.assertEqual(len(self._make_index(ttl=60)), 2)
+        self._install_tool("Cut1", "1.0.2")
+        # the persisted index doesn't know the new tool: it is refreshed before reporting it as missing
+        index = self._make_index(ttl=60)
+        self.assertEqual(index.find_missing_tools([("Cut1", "1.0.2")]), [])
+        self.assertEqual(self._get_tool_requests(), 2)
+        # the refreshed index is persisted and it is not refreshed again by the same run
+        self.assertEqual(index.find_missing_tools([("Cut1", "2.0.0")]), [("Cut1", "2.0.0")])
+        self.assertEqual(self._get_tool_requests(), 2)
+        self.assertIn(("Cut1", "1.0.2"), self._make_index(ttl=60))
+        self.assertEqual(self._get_tool_requests(), 2)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestToolIndex)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+import io
+import os
+import sys
+import json
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import cassettes
+from wft4galaxy.cassettes import ApiCassette, CassetteError, RECORD_MODE, REPLAY_MODE
+from wft4galaxy.profiling import ApiProfiler
+
+GalaxyUrl = "http://galaxy.test:8080/galaxy"
+
+
+class _StubGalaxyInstance(object):
+    """ Stub of :class:`bioblend.galaxy.objects.GalaxyInstance` """
+
+    def __init__(self, url):
+        self.gi = self
+        self.base_url = url
+
+
+class _StubAdapter(BaseAdapter):
+    """ Transport adapter which answers the requests with the given bodies, in order """
+
+    def __init__(self, *bodies):
+        super(_StubAdapter, self).__init__()
+        self.bodies = list(bodies)
+        self.requests = []
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json", "Server": "stub"})
+        response.raw = io.BytesIO(self.bodies.pop(0))
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class _OfflineAdapter(BaseAdapter):
+    """ Transport adapter which fails every request """
+
+    def send(self, request, **kwargs):
+        raise AssertionError("Unexpected request: {0}".format(request.url))
+
+    def close(self):
+        pass
+
+
+class TestApiCassette(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, "api.cassette.json")
+        self.cassettes = []
+
+    def tearDown(self):
+        for cassette in self.cassettes:
+            cassette.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def _start(self, mode, **options):
+        cassette = ApiCassette(self.filename, mode, **options)
+        cassette.watch(_StubGalaxyInstance(GalaxyUrl))
+        self.cassettes.append(cassette)
+        cassette.start()
+        return cassette
+
+    @staticmethod
+    def _make_session(adapter):
+        session = requests.Session()
+        session.mount("http://", adapter)
+        return session
+
+    def _record(self, requests_and_bodies, **options):
+        """ Record the given pairs (<PATH>, <BODY>) of GET requests and responses """
+        cassette = self._start(RECORD_MODE, **options)
+        session = self._make_session(_StubAdapter(*[body for _, body in requests_and_bodies]))
+        for path, _ in requests_and_bodies:
+            session.get(GalaxyUrl + path).content
+        cassette.stop()
+        return cassette
+
+    def test_record_replay(self):
+        self._record([("/api/histories?key=k1", b'[{"id": "1"}]'),
+                      ("/api/datasets/1?key=k1", b'{"state": "queued"}'),
+                      ("/api/datasets/1?key=k1", b'{"state": "ok"}')])
+        with open(self.filename) as f:
+            interactions = json.load(f)["interactions"]
+        # the API key and the base path of the server are not recorded
+        self.assertEqual([(i["method"], i["path"], i["query"]) for i in interactions],
+                         [("GET", "/api/histories", [])] + [("GET", "/api/datasets/1", [])] * 2)
+        self.assertEqual(interactions[0]["headers"], {"Content-Type": "application/json"})
+        self._start(REPLAY_MODE)
+        session = self._make_session(_OfflineAdapter())
+        response = session.get(GalaxyUrl + "/api/histories?key=k2")
+        self.assertEqual((response.status_code, response.reason, response.json()), (200, "OK", [{"id": "1"}]))
+        self.assertEqual(response.headers["content-type"], "application/json")
+        # responses to the same request are replayed in order, repeating the last one
+        self.assertEqual([session.get(GalaxyUrl + "/api/datasets/1").json()["state"] for _ in range(3)],
+                         ["queued", "ok", "ok"])
+        # requests addressed to other servers are not replayed
+        self.assertRaises(AssertionError, session.get, "http://other.test/api/histories")
+
+    def test_content_addressed_bodies(self):
+        large_body = b"0123456789" * 10
+        binary_body = b"\xff\xfe\x00"
+        cassette = self._record([("/api/datasets/1/display", large_body), ("/api/datasets/2/display", large_body),
+                                 ("/api/datasets/3/display", binary_body), ("/api/version", b"{}")],
+                                body_size_threshold=50)
+        digest = hashlib.sha256(large_body).hexdigest()
+        # identical bodies are stored once
+        self.assertEqual(os.listdir(cassette.get_body_folder()), [digest])
+        first, second, binary, small = cassette.get_interactions()
+        self.assertEqual((first["body_digest"], first["body_size"]), (digest, 100))
+        self.assertEqual(second["body_digest"], digest)
+        self.assertEqual(binary["body_base64"], "//4A")
+        self.assertEqual(small["body"], "{}")
+        self._start(REPLAY_MODE)
+        session = self._make_session(_OfflineAdapter())
+        self.assertEqual(session.get(GalaxyUrl + "/api/datasets/2/display").content, large_body)
+        self.assertEqual(session.get(GalaxyUrl + "/api/datasets/3/display").content, binary_body)
+
+    def test_streamed_bodies(self):
+        large_body = b"0123456789" * 10
+        cassette = self._start(RECORD_MODE, body_size_threshold=50)
+        session = self._make_session(_StubAdapter(large_body, b"small", large_body))
+        # streamed bodies are recorded as they are consumed
+        response = session.get(GalaxyUrl + "/api/datasets/1/display", stream=True)
+        self.assertEqual(cassette.get_interactions()[0].get("body_size"), None)
+        self.assertEqual(b"".join(response.iter_content(7)), large_body)
+        self.assertEqual(b"".join(session.get(GalaxyUrl + "/api/version", stream=True).iter_content(2)), b"small")
+        # partially consumed bodies are marked as truncated
+        chunks = session.get(GalaxyUrl + "/api/datasets/2/display", stream=True).iter_content(60)
+        next(chunks)
+        chunks.close()
+        cassette.stop()
+        streamed, small, truncated = cassette.get_interactions()
+        self.assertEqual((streamed["body_digest"], streamed["body_size"]),
+                         (hashlib.sha256(large_body).hexdigest(), 100))
+        self.assertEqual(small["body"], "small")
+        self.assertTrue(truncated["truncated"])
+        self.assertEqual(truncated["body_size"], 60)
+        self.assertEqual(sorted(os.listdir(cassette.get_body_folder())),
+                         sorted([streamed["body_digest"], truncated["body_digest"]]))
+        # stored bodies are replayed as streams
+        self._start(REPLAY_MODE)
+        response = self._make_session(_OfflineAdapter()).get(GalaxyUrl + "/api/datasets/1/display", stream=True)
+        self.assertEqual(b"".join(response.iter_content(16)), large_body)
+        response.close()
+
+    def test_query_matching(self):
+        self._record([("/api/histories?name=first&deleted=false", b'"first"'),
+                      ("/api/histories?name=second", b'"second"'),
+                      ("/api/histories/1/contents?name=history-1", b'"contents"')])
+        self._start(REPLAY_MODE)
+        session = self._make_session(_OfflineAdapter())
+        # requests are matched by query regardless of the order of its parameters...
+        self.assertEqual(session.get(GalaxyUrl + "/api/histories?name=second").json(), "second")
+        self.assertEqual(session.get(GalaxyUrl + "/api/histories?deleted=false&name=first").json(), "first")
+        # ... or, failing that, by path only (e.g., queries with the random names of the test histories)
+        self.assertEqual(session.get(GalaxyUrl + "/api/histories/1/contents?name=history-2").json(), "contents")
+        self.assertRaises(CassetteError, session.get, GalaxyUrl + "/api/workflows")
+        self.assertRaises(CassetteError, session.post, GalaxyUrl + "/api/histories")
+
+    def test_send_restore(self):
+        send = requests.Session.send
+        cassette = self._start(RECORD_MODE)
+        self.assertIs(cassettes.get_active_cassette(), cassette)
+        self.assertRaises(RuntimeError, ApiCassette(self.filename).start)
+        # the profiler wraps the cassette, so that replayed calls are profiled too
+        profiler = ApiProfiler()
+        profiler.watch(_StubGalaxyInstance(GalaxyUrl))
+        profiler.start()
+        try:
+            self._make_session(_StubAdapter(b"{}")).get(GalaxyUrl + "/api/version")
+        finally:
+            profiler.stop()
+        self.assertIs(requests.Session.send, cassettes._cassette_send)
+        cassette.stop()
+        self.assertIsNone(cassettes.get_active_cassette())
+        self.assertIs(requests.Session.send, send)
+        self.assertEqual(profiler.get_profile()["calls"], 1)
+        self.assertEqual(len(cassette.get_interactions()), 1)
+        self.assertTrue(os.path.isfile(self.filename))
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestApiCassette)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
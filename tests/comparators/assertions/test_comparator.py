@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.core import WorkflowTestCase
+from wft4galaxy.comparators.assertions import AssertionsChecker, check_assertions
+
+
+class TestAssertions(unittest.TestCase):
+    def check(self, *assertions, **kwargs):
+        return check_assertions(self.__get_resource_path('output.tsv'), list(assertions), **kwargs)
+
+    def test_text(self):
+        self.assertEqual(self.check({"has_text": {"text": "200.2"}}, {"not_has_text": {"text": "NaN"}}), [])
+        self.assertEqual(len(self.check({"has_text": {"text": "NaN"}})), 1)
+        self.assertEqual(len(self.check({"not_has_text": {"text": "M2"}})), 1)
+
+    def test_text_across_chunks(self):
+        # the text spans chunks and lines
+        self.assertEqual(self.check({"has_text": {"text": "34\nM3\t300"}}, chunk_size=3), [])
+        self.assertEqual(self.check({"has_text": {"text": "variableMetadata"}}, chunk_size=1), [])
+
+    def test_lines(self):
+        self.assertEqual(self.check({"has_line": {"line": "M1\t100.1\t12"}},
+                                    {"has_line_matching": {"expression": r"M\d\t300\.3\t\d+"}},
+                                    {"has_text_matching": {"expression": r"\d{3}\.2"}}), [])
+        self.assertEqual(len(self.check({"has_line": {"line": "M1"}})), 1)
+        # the expression must match the whole line
+        self.assertEqual(len(self.check({"has_line_matching": {"expression": "M1"}})), 1)
+
+    def test_counts(self):
+        self.assertEqual(self.check({"has_n_lines": {"n": 5}}, {"has_n_lines": {"n": 6, "delta": 1}},
+                                    {"has_n_lines": {"min": 2, "max": 5}}), [])
+        self.assertEqual(len(self.check({"has_n_lines": {"max": 4}})), 1)
+        self.assertEqual(self.check({"has_n_columns": {"n": 1}}), [])
+        self.assertEqual(self.check({"has_n_columns": {"n": 3, "comment": "#"}}), [])
+        self.assertEqual(len(self.check({"has_n_columns": {"n": 2, "sep": ",", "comment": "#"}})), 1)
+
+    def test_galaxy_syntax(self):
+        self.assertEqual(self.check({"that": "has_text", "text": "mz"}, {"that": "has_n_lines", "n": 5}), [])
+
+    def test_invalid_assertions(self):
+        for assertions in ([{"has_magic": {}}], [{"has_text": {}}], [{"has_n_lines": {}}],
+                           [{"has_line_matching": {"expression": "("}}], ["has_text"]):
+            self.assertRaises(ValueError, AssertionsChecker, assertions)
+
+    def test_expected_output(self):
+        test_case = WorkflowTestCase()
+        test_case.add_expected_output("output", assertions=[{"has_n_lines": {"n": 5}}])
+        self.assertIsNone(test_case.get_expected_output("output")["file"])
+        self.assertRaises(ValueError, test_case.add_expected_output, "output")
+        self.assertRaises(ValueError, test_case.add_expected_output, "output", assertions=[{"has_magic": {}}])
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestAssertions)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
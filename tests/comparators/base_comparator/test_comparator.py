@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.comparators import base_comparator, MAX_DIFF_HUNKS
+
+
+class TestBaseComparator(unittest.TestCase):
+    def setUp(self):
+        # the comparator writes the diff next to the actual output
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path_expected = self.__get_resource_path('expected.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _actual_file(self, file_name, lines=None):
+        path = os.path.join(self.tmp_dir, file_name)
+        if lines is None:
+            shutil.copy(self.__get_resource_path(file_name), path)
+        else:
+            with open(path, 'w') as f:
+                f.writelines(lines)
+        return path
+
+    def test_identical_files(self):
+        self.assertTrue(base_comparator(self._actual_file('expected.txt'), self.path_expected))
+
+    def test_line_endings(self):
+        self.assertTrue(base_comparator(self._actual_file('expected_crlf.txt'), self.path_expected))
+
+    def test_diff_line(self):
+        path_actual = self._actual_file('diff_line.txt')
+        self.assertFalse(base_comparator(path_actual, self.path_expected))
+        with open(path_actual + '.diff') as f:
+            diff = f.read().splitlines()
+        self.assertEqual(diff[2:], ["'@@ -1,3 +1,3 @@'", "' chr1\\t100\\t200\\tgeneA'",
+                                    "'-chr1\\t300\\t401\\tgeneB'", "'+chr1\\t300\\t400\\tgeneB'",
+                                    "' chr2\\t150\\t250\\tgeneC'"])
+
+    def test_capped_diff(self):
+        expected_lines = ["{0}\n".format(i) for i in range(2000)]
+        actual_lines = ["{0}\n".format(i if i % 10 else -i) for i in range(2000)]
+        path_expected = self._actual_file('expected_lines.txt', expected_lines)
+        path_actual = self._actual_file('actual_lines.txt', actual_lines)
+        self.assertFalse(base_comparator(path_actual, path_expected))
+        with open(path_actual + '.diff') as f:
+            diff = f.read().splitlines()
+        self.assertEqual(len([l for l in diff if l.startswith("'@@")]), MAX_DIFF_HUNKS)
+        self.assertEqual(diff[-1], "'... (diff truncated)'")
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestBaseComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.comparators import base_comparator, base_stream_comparator, get_stream_comparator
+
+
+def _read_chunks(filename, chunk_size):
+    with open(filename, "rb") as f:
+        return list(iter(lambda: f.read(chunk_size), b""))
+
+
+class TestBaseStreamComparator(unittest.TestCase):
+    def setUp(self):
+        self.path_expected = self.__get_resource_path('expected.txt')
+
+    def test_identical_files(self):
+        for chunk_size in (1, 7, 4096):
+            self.assertTrue(base_stream_comparator(_read_chunks(self.path_expected, chunk_size), self.path_expected))
+
+    def test_line_endings(self):
+        path_crlf = self.__get_resource_path('expected_crlf.txt')
+        for chunk_size in (1, 5, 4096):
+            self.assertTrue(base_stream_comparator(_read_chunks(path_crlf, chunk_size), self.path_expected))
+
+    def test_diff_line(self):
+        path_actual = self.__get_resource_path('diff_line.txt')
+        self.assertFalse(base_stream_comparator(_read_chunks(path_actual, 7), self.path_expected))
+
+    def test_stop_at_first_mismatch(self):
+        chunks = iter([b"chr9\tmismatch\n", b"never read\n"])
+        self.assertFalse(base_stream_comparator(chunks, self.path_expected))
+        self.assertEqual(next(chunks), b"never read\n")
+
+    def test_truncated_output(self):
+        path_truncated = self.__get_resource_path('truncated.txt')
+        self.assertFalse(base_stream_comparator(_read_chunks(path_truncated, 7), self.path_expected))
+        self.assertFalse(base_stream_comparator(_read_chunks(self.path_expected, 7), path_truncated))
+
+    def test_base_comparator_supports_streaming(self):
+        self.assertIs(get_stream_comparator(base_comparator), base_stream_comparator)
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestBaseStreamComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import comparators
+from wft4galaxy.comparators import binary_comparator
+
+
+class TestBinaryComparator(unittest.TestCase):
+    def setUp(self):
+        self.path_expected = self.__get_resource_path('expected.bin')
+
+    def test_identical_files(self):
+        self.assertTrue(binary_comparator(self.path_expected, self.path_expected))
+
+    def test_empty_files(self):
+        path_empty = self.__get_resource_path('empty.bin')
+        self.assertTrue(binary_comparator(path_empty, path_empty))
+        self.assertFalse(binary_comparator(path_empty, self.path_expected))
+
+    def test_diff_byte(self):
+        path_actual = self.__get_resource_path('diff_byte.bin')
+        self.assertFalse(binary_comparator(path_actual, self.path_expected))
+
+    def test_truncated_file(self):
+        path_truncated = self.__get_resource_path('truncated.bin')
+        self.assertFalse(binary_comparator(path_truncated, self.path_expected))
+        self.assertFalse(binary_comparator(self.path_expected, path_truncated))
+
+    def test_first_difference_offset(self):
+        with open(self.path_expected, 'rb') as f:
+            expected = f.read()
+        with open(self.__get_resource_path('diff_byte.bin'), 'rb') as f:
+            actual = f.read()
+        for block_size in (1, 100, 4096, 1 << 20):
+            comparators.BINARY_BLOCK_SIZE, default = block_size, comparators.BINARY_BLOCK_SIZE
+            try:
+                self.assertEqual(comparators._find_first_difference(actual, expected, len(expected)), 3210)
+                self.assertIsNone(comparators._find_first_difference(expected, expected, len(expected)))
+            finally:
+                comparators.BINARY_BLOCK_SIZE = default
+
+    def test_buffers_equal(self):
+        data = bytes(bytearray(range(256))) * 3 + b"tail"
+        for size in (0, 1, 7, 8, 9, len(data)):
+            self.assertTrue(comparators._buffers_equal(memoryview(data)[:size], memoryview(data)[:size]))
+            self.assertTrue(comparators._buffers_equal(data[:size], data[:size]))
+        for offset in (0, 7, 8, 500, len(data) - 1):
+            other = bytearray(data)
+            other[offset] ^= 0xff
+            self.assertFalse(comparators._buffers_equal(memoryview(data), memoryview(bytes(other))))
+            self.assertEqual(comparators._find_first_difference(data, bytes(other), len(data)), offset)
+        self.assertFalse(comparators._buffers_equal(memoryview(data), memoryview(data)[1:]))
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestBinaryComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
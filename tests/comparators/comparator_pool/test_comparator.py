@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+import shutil
+import filecmp
+import tempfile
+import unittest
+import pkg_resources
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.comparators import base_comparator
+from wft4galaxy.engine import ComparatorPool, ComparatorTimeoutError
+
+
+def _sleeping_comparator(actual_output_filename, expected_output_filename):
+    time.sleep(30)
+    return True
+
+
+def _failing_comparator(actual_output_filename, expected_output_filename):
+    raise ValueError("Unable to compare")
+
+
+def _printing_comparator(actual_output_filename, expected_output_filename):
+    print("Unable to compare", file=sys.stderr)
+    raise ValueError("Unable to compare")
+
+
+def _pid_comparator(actual_output_filename, expected_output_filename):
+    return os.getpid()
+
+
+class TestComparatorPool(unittest.TestCase):
+    def setUp(self):
+        # the comparators write their diffs next to the actual outputs
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path_expected = self.__get_resource_path('expected.txt')
+        self.path_different = os.path.join(self.tmp_dir, 'different.txt')
+        shutil.copy(self.__get_resource_path('different.txt'), self.path_different)
+        self.pool = ComparatorPool(2, timeout=2)
+
+    def tearDown(self):
+        self.pool.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_results(self):
+        self.assertTrue(self.pool.compare(filecmp.cmp, self.path_expected, self.path_expected))
+        self.assertFalse(self.pool.compare(base_comparator, self.path_different, self.path_expected))
+
+    def test_worker_processes(self):
+        pid = self.pool.compare(_pid_comparator, self.path_expected, self.path_expected)
+        self.assertNotEqual(pid, os.getpid())
+        # idle workers are reused
+        self.assertEqual(self.pool.compare(_pid_comparator, self.path_expected, self.path_expected), pid)
+
+    def test_exception(self):
+        self.assertRaises(ValueError, self.pool.compare, _failing_comparator, self.path_expected, self.path_expected)
+        self.assertTrue(self.pool.compare(filecmp.cmp, self.path_expected, self.path_expected))
+
+    def test_timeout(self):
+        start = time.time()
+        self.assertRaises(ComparatorTimeoutError,
+                          self.pool.compare, _sleeping_comparator, self.path_expected, self.path_expected)
+        self.assertLess(time.time() - start, 10)
+        self.assertTrue(self.pool.compare(filecmp.cmp, self.path_expected, self.path_expected))
+
+    def test_messages(self):
+        # what the comparator prints within the worker is written to the streams of the caller
+        streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            self.assertFalse(self.pool.compare(base_comparator, self.path_different, self.path_expected))
+            self.assertRaises(ValueError,
+                              self.pool.compare, _printing_comparator, self.path_expected, self.path_expected)
+            stdout, stderr = sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = streams
+        self.assertIn("+line 2", stdout)
+        self.assertEqual(stderr, "Unable to compare\n")
+
+    def test_inline_fallback(self):
+        pid = self.pool.compare(lambda actual, expected: os.getpid(), self.path_expected, self.path_expected)
+        self.assertEqual(pid, os.getpid())
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestComparatorPool)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
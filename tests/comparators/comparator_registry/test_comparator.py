@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import filecmp
+import functools
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import comparators
+from wft4galaxy.comparators import get_comparator, register_comparator
+
+
+class TestComparatorRegistry(unittest.TestCase):
+    def setUp(self):
+        self.path_actual = self.__get_resource_path('tolerance.tsv')
+        self.path_expected = self.__get_resource_path('expected.tsv')
+
+    def test_default_comparator(self):
+        self.assertIs(get_comparator(None), comparators.base_comparator)
+        self.assertIs(get_comparator("base"), comparators.base_comparator)
+
+    def test_builtin_names(self):
+        self.assertIs(get_comparator("table"), comparators.table_comparator)
+        self.assertIs(get_comparator("csv_tolerance"), comparators.table_comparator)
+        self.assertIs(get_comparator("binary"), comparators.binary_comparator)
+
+    def test_qualified_names(self):
+        self.assertIs(get_comparator("filecmp.cmp"), filecmp.cmp)
+        self.assertIs(get_comparator("wft4galaxy.comparators.table_comparator"), comparators.table_comparator)
+
+    def test_bound_options(self):
+        comparator = get_comparator({"name": "csv_tolerance", "abs_tol": "0.01"})
+        self.assertIsInstance(comparator, functools.partial)
+        self.assertTrue(comparator(self.path_actual, self.path_expected))
+        self.assertFalse(get_comparator("table")(self.path_actual, self.path_expected))
+        # options within the comparator dictionary override the 'comparator_options' ones
+        comparator = get_comparator({"name": "table", "abs_tol": 0.01}, {"abs_tol": 0, "header": True})
+        self.assertEqual(comparator.keywords, {"abs_tol": 0.01, "header": True})
+
+    def test_memoized_resolution(self):
+        comparator = get_comparator({"name": "table", "rel_tol": 1e-6, "header": True})
+        self.assertIs(get_comparator("table", {"header": True, "rel_tol": 1e-6}), comparator)
+        self.assertIsNot(get_comparator("table", {"header": True, "rel_tol": 1e-5}), comparator)
+
+    def test_register_comparator(self):
+        @register_comparator
+        def test_registry_comparator(actual, expected, result=True):
+            return result
+
+        @register_comparator("test_registry_alias", "test_registry_other_alias")
+        def test_registry_aliased_comparator(actual, expected):
+            return False
+
+        self.assertIs(get_comparator("test_registry_comparator"), test_registry_comparator)
+        self.assertFalse(get_comparator({"name": "test_registry_comparator", "result": False})(
+            self.path_actual, self.path_expected))
+        self.assertIs(get_comparator("test_registry_alias"), test_registry_aliased_comparator)
+        self.assertIs(get_comparator("test_registry_other_alias"), test_registry_aliased_comparator)
+
+    def test_unknown_comparator(self):
+        self.assertIsNone(get_comparator("wft4galaxy.comparators.unknown_comparator"))
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestComparatorRegistry)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
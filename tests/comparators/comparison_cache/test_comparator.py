@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+import wft4galaxy.cache as cache
+from wft4galaxy.cache import ComparisonCache, COMPARISON_SUMMARY_MAX_SIZE
+from wft4galaxy.comparators import get_comparator, table_comparator
+
+
+class TestComparisonCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _make_cache(self, **options):
+        return ComparisonCache(os.path.join(self.tmp_dir, "cache"), **options)
+
+    def test_keys(self):
+        key = ComparisonCache.get_key("a", "b", "table", {"rel_tol": 1e-6, "header": True})
+        self.assertEqual(key, ComparisonCache.get_key("a", "b", "table", {"header": True, "rel_tol": 1e-6}))
+        self.assertNotEqual(key, ComparisonCache.get_key("a", "b", "table", {"header": True}))
+        self.assertNotEqual(key, ComparisonCache.get_key("a", "c", "table", {"rel_tol": 1e-6, "header": True}))
+        self.assertNotEqual(ComparisonCache.get_key("a", "b"), ComparisonCache.get_key("b", "a"))
+
+    def test_versioned_keys(self):
+        version = cache.get_comparator_version(table_comparator)
+        self.assertEqual(version[1:3], ["wft4galaxy.comparators", None])
+        self.assertEqual(cache.get_comparator_version(get_comparator("table", {"header": True})), version)
+        self.assertEqual(cache.get_comparator_version(unittest.TestCase)[1:3], ["unittest.case", None])
+        key = ComparisonCache.get_key("a", "b", "table", None, version)
+        self.assertNotEqual(key, ComparisonCache.get_key("a", "b", "table", None, ["0.0"] + version[1:]))
+        self.assertNotEqual(key, ComparisonCache.get_key("a", "b", "table", None, version[:2] + ["2.0", version[3]]))
+        self.assertNotEqual(key, ComparisonCache.get_key("a", "b", "table", None, version[:3] + ["0" * 40]))
+
+    def test_code_digest(self):
+        # the version of a comparator changes with its code
+        module_filename = os.path.join(self.tmp_dir, "custom_comparators.py")
+        with open(module_filename, "w") as f:
+            f.write("def compare(actual, expected):\n    return True\n")
+        sys.path.insert(0, self.tmp_dir)
+        try:
+            import custom_comparators
+            version = cache.get_comparator_version(custom_comparators.compare)
+            self.assertEqual(version[1:3], ["custom_comparators", None])
+            self.assertTrue(version[3])
+            self.assertEqual(cache.get_comparator_version(custom_comparators.compare), version)
+            with open(module_filename, "a") as f:
+                f.write("# changed\n")
+            self.assertNotEqual(cache.get_comparator_version(custom_comparators.compare), version)
+        finally:
+            sys.path.remove(self.tmp_dir)
+            sys.modules.pop("custom_comparators", None)
+        self.assertNotEqual(cache.get_comparator_version(table_comparator)[3], version[3])
+        # comparators without a source file are identified by their bytecode
+        exec_globals = {}
+        exec("def compare(actual, expected):\n    return True\n", exec_globals)
+        self.assertTrue(cache.get_comparator_version(exec_globals["compare"])[3])
+
+    def test_persisted_verdicts(self):
+        cache = self._make_cache()
+        self.assertIsNone(cache.get("k1"))
+        cache.put("k1", True)
+        cache.put("k2", False)
+        cache = self._make_cache()
+        self.assertTrue(cache.get("k1"))
+        self.assertFalse(cache.get("k2"))
+
+    def test_diff_summary(self):
+        diff_filename = os.path.join(self.tmp_dir, "output.diff")
+        with open(diff_filename, "w") as f:
+            f.write("x" * (COMPARISON_SUMMARY_MAX_SIZE + 10))
+        cache = self._make_cache()
+        cache.put("k1", False, diff_filename)
+        os.remove(diff_filename)
+        self.assertFalse(cache.get("k1", diff_filename))
+        self.assertEqual(os.path.getsize(diff_filename), COMPARISON_SUMMARY_MAX_SIZE)
+
+    def test_replayed_messages(self):
+        messages = [("stdout", "diff preview\n"), ("stderr", "x" * COMPARISON_SUMMARY_MAX_SIZE), ("stderr", "...\n")]
+        cache = self._make_cache()
+        cache.put("k1", False, messages=messages)
+        cache = self._make_cache()
+        streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            self.assertFalse(cache.get("k1"))
+            self.assertEqual(sys.stdout.getvalue() + sys.stderr.getvalue(), "")
+            self.assertFalse(cache.get("k1", replay_messages=True))
+            stdout, stderr = sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = streams
+        self.assertEqual(stdout, "diff preview\n")
+        self.assertEqual(stderr, "x" * (COMPARISON_SUMMARY_MAX_SIZE - len("diff preview\n")))
+
+    def test_lru_eviction(self):
+        cache = self._make_cache(max_entries=2)
+        cache.put("k1", True)
+        cache.put("k2", True)
+        cache.get("k1")
+        cache.put("k3", True)
+        self.assertIsNone(cache.get("k2"))
+        self.assertTrue(cache.get("k1"))
+        self.assertTrue(cache.get("k3"))
+
+    def test_size_eviction(self):
+        diff_filename = os.path.join(self.tmp_dir, "output.diff")
+        with open(diff_filename, "w") as f:
+            f.write("x" * 100)
+        cache = self._make_cache(max_size=150)
+        cache.put("k1", False, diff_filename)
+        cache.put("k2", False, diff_filename)
+        self.assertIsNone(cache.get("k1"))
+        self.assertFalse(cache.get("k2"))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp_dir, "cache"))), ["index.json", "k2.diff"])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestComparisonCache)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+from collections import deque
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.comparators import block_records, compare_files, compare_records, csv_records, line_records
+
+
+class TestComparisonEngine(unittest.TestCase):
+    def setUp(self):
+        self.path_expected = self.__get_resource_path('expected.csv')
+
+    def test_equal_records(self):
+        self.assertEqual(compare_records(iter([1, 2, 3]), iter([1, 2, 3])), 0)
+        self.assertEqual(compare_records(iter([]), iter([])), 0)
+
+    def test_early_exit(self):
+        actual, expected = iter(range(100)), iter([0, 1, -1] + list(range(3, 100)))
+        self.assertEqual(compare_records(actual, expected), 1)
+        # records following the first mismatch are not read
+        self.assertEqual(next(actual), 3)
+        self.assertEqual(next(expected), 3)
+
+    def test_mismatches(self):
+        mismatches = []
+
+        def collect(index, actual_record, expected_record):
+            mismatches.append((index, actual_record, expected_record))
+            return len(mismatches) < 2
+
+        self.assertEqual(compare_records(iter("abcde"), iter("aXcYZ"), on_mismatch=collect), 2)
+        self.assertEqual(mismatches, [(1, "b", "X"), (3, "d", "Y")])
+        del mismatches[:]
+        self.assertEqual(compare_records(iter("ab"), iter("abc"), on_mismatch=collect), 1)
+        self.assertEqual(mismatches, [(2, None, "c")])
+
+    def test_predicate_and_context(self):
+        context = deque(maxlen=2)
+        self.assertEqual(compare_records(iter("abcD"), iter("ABCd"), predicate=lambda a, e: a.lower() == e.lower(),
+                                         context=context), 0)
+        self.assertEqual(list(context), ["c", "D"])
+
+    def test_line_records(self):
+        self.assertEqual(list(line_records(self.path_expected)), [b"a,b,c\n", b"1,2,3\n", b"4,5,6\n"])
+        self.assertEqual(compare_files(self.__get_resource_path('unix_eol.csv'), self.path_expected), 0)
+        self.assertEqual(compare_files(self.__get_resource_path('short_row.csv'), self.path_expected), 1)
+
+    def test_csv_records(self):
+        self.assertEqual(list(csv_records(self.path_expected)), [["a", "b", "c"], ["1", "2", "3"], ["4", "5", "6"]])
+        self.assertEqual(compare_files(self.__get_resource_path('unix_eol.csv'), self.path_expected,
+                                       reader=csv_records), 0)
+
+    def test_block_records(self):
+        with open(self.path_expected, 'rb') as f:
+            content = f.read()
+        # blocks are views of the mapped file which are released as soon as the next one is read
+        blocks, views = [], []
+        for block in block_records(self.path_expected, block_size=4):
+            blocks.append(bytes(block))
+            views.append(block)
+        self.assertEqual(b"".join(blocks), content)
+        self.assertEqual(set([len(b) for b in blocks[:-1]]), set([4]))
+        if all([hasattr(view, "release") for view in views]):
+            self.assertRaises(ValueError, bytes, views[0])
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestComparisonEngine)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.comparators import keyed_table_comparator
+
+
+class TestKeyedTableComparator(unittest.TestCase):
+    def _compare(self, file_name, **options):
+        return keyed_table_comparator(self.__get_resource_path(file_name),
+                                      self.__get_resource_path('expected.tsv'), **options)
+
+    def test_identical_files(self):
+        self.assertTrue(self._compare('expected.tsv'))
+        self.assertTrue(self._compare('expected.tsv', header=True, key_columns=['variableMetadata', 'mz']))
+
+    def test_reordered_rows_and_columns(self):
+        self.assertFalse(self._compare('reordered.tsv', header=True, key_columns='variableMetadata'))
+        self.assertTrue(self._compare('reordered.tsv', header=True, key_columns='variableMetadata', abs_tol=0.001))
+        self.assertTrue(self._compare('reordered.tsv', header=True, key_columns=0,
+                                      columns={'pvalue': {'precision': 2}}))
+
+    def test_short_rows(self):
+        # the fields of short rows are remapped by position too
+        self.assertFalse(self._compare('short_row.tsv', header=True, key_columns='variableMetadata', abs_tol=0.001))
+        self.assertFalse(self._compare('short_row.tsv', header=True, key_columns='variableMetadata', abs_tol=0.001,
+                                       columns={'mz': {'ignore': True}}))
+        self.assertTrue(self._compare('short_row.tsv', header=True, key_columns='variableMetadata', abs_tol=0.001,
+                                      columns={'mz': {'ignore': True}, 'pvalue': {'ignore': True}}))
+
+    def test_changed_keys(self):
+        self.assertFalse(self._compare('changed.tsv', header=True))
+        self.assertFalse(self._compare('changed.tsv', header=True, columns={'rt': {'ignore': True}}))
+
+    def test_missing_column(self):
+        self.assertFalse(self._compare('missing_column.tsv', header=True))
+
+    def test_without_header(self):
+        self.assertTrue(self._compare('expected.tsv'))
+        self.assertFalse(self._compare('reordered.tsv', key_columns=1))
+
+    def test_unknown_key_column(self):
+        self.assertRaises(ValueError, self._compare, 'expected.tsv', header=True, key_columns='unknown')
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestKeyedTableComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import comparators
+from wft4galaxy.comparators import table_comparator
+
+
+class TestTableComparator(unittest.TestCase):
+    def _compare(self, file_name, **options):
+        return table_comparator(self.__get_resource_path(file_name),
+                                self.__get_resource_path('expected.tsv'), **options)
+
+    def test_identical_files(self):
+        self.assertTrue(self._compare('expected.tsv'))
+
+    def test_number_formatting(self):
+        self.assertFalse(self._compare('tolerance.tsv'))
+        self.assertTrue(self._compare('tolerance.tsv', abs_tol=0.01))
+
+    def test_relative_tolerance(self):
+        self.assertFalse(self._compare('tolerance.tsv', rel_tol=1e-6))
+        self.assertTrue(self._compare('tolerance.tsv', rel_tol=0.03))
+
+    def test_column_rules(self):
+        self.assertFalse(self._compare('tolerance.tsv', abs_tol=5e-5))
+        self.assertTrue(self._compare('tolerance.tsv', header=True, abs_tol=5e-5,
+                                      columns={"pvalue": {"abs_tol": 0.001}}))
+        self.assertTrue(self._compare('tolerance.tsv', abs_tol=5e-5, columns={3: {"precision": 2}}))
+
+    def test_ignored_columns(self):
+        self.assertFalse(self._compare('diff_ids.tsv'))
+        self.assertTrue(self._compare('diff_ids.tsv', header=False, columns={0: {"ignore": True}}))
+
+    def test_diff_fields(self):
+        self.assertFalse(self._compare('diff_fields.tsv', abs_tol=1.0))
+
+    def test_missing_row(self):
+        self.assertFalse(self._compare('missing_row.tsv'))
+
+    def test_blocks(self):
+        for block_size in (1, 2, 3):
+            self.assertTrue(self._compare('tolerance.tsv', abs_tol=0.01, block_size=block_size))
+            self.assertFalse(self._compare('missing_row.tsv', block_size=block_size))
+            self.assertFalse(self._compare('diff_fields.tsv', block_size=block_size))
+
+    def test_block_comparison(self):
+        rules = comparators._TableRules(abs_tol=1.0, columns={4: {"ignore": True}})
+        actual = [["a", "1.5", "x", "NA", "u"], ["b", "2", "y", "nan", "v"], ["c", "3", "z", "1", "w"]]
+        expected = [["a", "1.0", "x", "NA", "u"], ["b", "4", "y", "NaN", "q"], ["c", "3", "Z", "1", "w"]]
+        mismatches = [(1, 1, "2", "4"), (2, 2, "z", "Z")]
+        self.assertEqual(comparators._compare_table_block(actual, expected, rules), mismatches)
+        if comparators._np is not None:
+            self.assertEqual(comparators._compare_table_block_numpy(actual, expected, rules), mismatches)
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestTableComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
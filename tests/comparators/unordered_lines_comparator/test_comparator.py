@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+import pkg_resources
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import comparators
+from wft4galaxy.comparators import unordered_lines_comparator
+
+
+class TestUnorderedLinesComparator(unittest.TestCase):
+    def _compare(self, file_name, **options):
+        return unordered_lines_comparator(self.__get_resource_path(file_name),
+                                          self.__get_resource_path('expected.txt'), **options)
+
+    def test_identical_files(self):
+        self.assertTrue(self._compare('expected.txt'))
+        self.assertTrue(self._compare('expected.txt', memory_budget=0))
+
+    def test_shuffled_lines(self):
+        self.assertTrue(self._compare('shuffled.txt'))
+        self.assertTrue(self._compare('shuffled.txt', memory_budget=0))
+
+    def test_diff_counts(self):
+        self.assertFalse(self._compare('diff_counts.txt'))
+        self.assertFalse(self._compare('diff_counts.txt', memory_budget=0))
+
+    def test_missing_line(self):
+        self.assertFalse(self._compare('missing_line.txt'))
+        self.assertFalse(self._compare('missing_line.txt', memory_budget=0))
+
+    def test_invalid_utf8_line(self):
+        # lines are compared as bytes: undecodable lines are mismatches, not errors
+        self.assertFalse(self._compare('invalid_utf8.txt'))
+        self.assertFalse(self._compare('invalid_utf8.txt', memory_budget=0))
+        path = self.__get_resource_path('invalid_utf8.txt')
+        self.assertTrue(unordered_lines_comparator(path, path))
+        self.assertTrue(unordered_lines_comparator(path, path, memory_budget=0))
+
+    def test_external_sort(self):
+        lines = ["{0}\t{1}\n".format(i % 97, i) for i in range(5000)]
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmp_dir, 'lines.txt')
+            with open(filename, 'w') as f:
+                f.writelines(lines)
+            sorted_lines = list(comparators._external_sort(filename, tmp_dir, 4096))
+            self.assertEqual(sorted_lines, sorted([l.rstrip('\n').encode() for l in lines]))
+            shuffled_filename = os.path.join(tmp_dir, 'shuffled.txt')
+            random.Random(0).shuffle(lines)
+            with open(shuffled_filename, 'w') as f:
+                f.writelines(lines)
+            self.assertTrue(unordered_lines_comparator(shuffled_filename, filename, memory_budget=8192))
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    @staticmethod
+    def __get_resource_path(file_name_in_test_dir):
+        resource_path = os.path.join(file_name_in_test_dir)
+        return pkg_resources.resource_filename(__name__, resource_path)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestUnorderedLinesComparator)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from bioblend.galaxy.objects import GalaxyInstance
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy.engine import StatusPoller, DatasetsWait, DatasetsWaitTimeoutError
+
+
+class TestStatusPoller(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestStatusPoller, self).setUp()
+        self.gi = GalaxyInstance(self.galaxy.url, "wft4galaxy-test")
+        self.history = self.gi.histories.create("test")
+        self.poller = StatusPoller(self.gi, min_interval=0.05, max_interval=0.2, backoff_factor=2)
+
+    def _add_dataset(self, queue_duration=60, job_duration=0):
+        now = time.time()
+        dataset = self.galaxy.add_dataset(self.history.id, "output", b"wft4galaxy\n",
+                                          queued_until=now + queue_duration,
+                                          ready_at=now + queue_duration + job_duration)
+        return self.history.get_dataset(dataset["id"])
+
+    def _get_contents_requests(self):
+        return self.galaxy.get_request_counts().get("GET /api/histories/{id}/contents", 0)
+
+    def test_backoff(self):
+        datasets = [self._add_dataset(), self._add_dataset()]
+        notifications = []
+        self.poller.register(DatasetsWait(self.history, datasets), notifications.append)
+        self.galaxy.reset_request_counts()
+        # the interval backs off while the jobs are queued, up to its maximum
+        intervals = []
+        for _ in range(4):
+            self.assertEqual(self.poller.poll(), 0)
+            intervals.append(self.poller.interval)
+        self.assertEqual(intervals, [0.05, 0.1, 0.2, 0.2])
+        # the states of all the datasets of a history are fetched by one request per round
+        self.assertEqual(self._get_contents_requests(), 4)
+        # the interval is reset as soon as a job starts
+        self.galaxy.set_dataset_state(datasets[0].id, "running")
+        self.assertEqual(self.poller.poll(), 0)
+        self.assertEqual(self.poller.interval, 0.05)
+        for dataset in datasets:
+            self.galaxy.set_dataset_state(dataset.id, "ok")
+        self.assertEqual(self.poller.poll(), 1)
+        self.assertEqual(notifications, [None])
+
+    def test_wait(self):
+        dataset = self._add_dataset(queue_duration=0.2, job_duration=0.2)
+        start = time.time()
+        self.poller.wait(DatasetsWait(self.history, [dataset]))
+        self.assertGreaterEqual(time.time() - start, 0.3)
+        self.assertEqual(self.galaxy.show_dataset(dataset.id)["state"], "ok")
+
+    def test_paused_outputs(self):
+        # Galaxy pauses the outputs of the jobs downstream of a failed one
+        datasets = [self._add_dataset(queue_duration=0), self._add_dataset()]
+        self.galaxy.set_dataset_state(datasets[1].id, "paused")
+        start = time.time()
+        with self.assertRaises(RuntimeError) as context:
+            self.poller.wait(DatasetsWait(self.history, datasets))
+        self.assertIn("paused", str(context.exception))
+        self.assertLess(time.time() - start, 5)
+
+    def test_timeout(self):
+        dataset = self._add_dataset()
+        start = time.time()
+        self.assertRaises(DatasetsWaitTimeoutError,
+                          self.poller.wait, DatasetsWait(self.history, [dataset], timeout=0.3))
+        self.assertGreaterEqual(time.time() - start, 0.3)
+        self.assertLess(time.time() - start, 5)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestStatusPoller)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
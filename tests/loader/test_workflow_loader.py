@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy import common
+
+
+class TestWorkflowLoader(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestWorkflowLoader, self).setUp()
+        self.gi = common.get_galaxy_instance(self.galaxy.url, "wft4galaxy-test")
+        self.workflow_filename = os.path.join(self.tmp_dir, "workflow.ga")
+        self.index_filename = os.path.join(self.tmp_dir, "workflows.json")
+
+    def _make_loader(self, persistent=False):
+        loader = common.WorkflowLoader(self.gi)
+        if persistent:
+            loader.set_persistent(index_filename=self.index_filename)
+        return loader
+
+    def _get_imports(self):
+        counts = self.galaxy.get_request_counts()
+        return counts.get("POST /api/workflows", 0) + counts.get("POST /api/workflows/upload", 0)
+
+    def _is_deleted(self, workflow):
+        return self.galaxy.get_workflow(workflow.id)["deleted"]
+
+    def test_reuse(self):
+        loader = self._make_loader()
+        workflows = [loader.load_workflow_by_filename(self.workflow_filename) for _ in range(3)]
+        self.assertEqual(self._get_imports(), 1)
+        self.assertEqual(len(set([wf.id for wf in workflows])), 1)
+        # a different name identifies a different workflow
+        renamed = loader.load_workflow_by_filename(self.workflow_filename, workflow_name="renamed")
+        self.assertNotEqual(renamed.id, workflows[0].id)
+        self.assertEqual(self._get_imports(), 2)
+
+    def test_refcount(self):
+        loader = self._make_loader()
+        workflow = loader.load_workflow_by_filename(self.workflow_filename)
+        loader.load_workflow_by_filename(self.workflow_filename)
+        # the workflow is removed when its last user unloads it
+        loader.unload_workflow(workflow.id)
+        self.assertFalse(self._is_deleted(workflow))
+        loader.unload_workflow(workflow.id)
+        self.assertTrue(self._is_deleted(workflow))
+        # and it is imported again by its next user
+        reloaded = loader.load_workflow_by_filename(self.workflow_filename)
+        self.assertNotEqual(reloaded.id, workflow.id)
+        self.assertEqual(self._get_imports(), 2)
+
+    def test_force_unload(self):
+        loader = self._make_loader()
+        workflow = loader.load_workflow_by_filename(self.workflow_filename)
+        loader.load_workflow_by_filename(self.workflow_filename)
+        loader.unload_workflows()
+        self.assertTrue(self._is_deleted(workflow))
+
+    def test_persistent_workflows(self):
+        loader = self._make_loader(persistent=True)
+        workflow = loader.load_workflow_by_filename(self.workflow_filename)
+        loader.unload_workflow(workflow.id)
+        self.assertFalse(self._is_deleted(workflow))
+        # the workflow is reused across runs
+        loader = self._make_loader(persistent=True)
+        self.assertEqual(loader.load_workflow_by_filename(self.workflow_filename).id, workflow.id)
+        self.assertEqual(self._get_imports(), 1)
+        # unless it has been deleted
+        self.galaxy.delete_workflow(workflow.id)
+        loader = self._make_loader(persistent=True)
+        self.assertNotEqual(loader.load_workflow_by_filename(self.workflow_filename).id, workflow.id)
+        self.assertEqual(self._get_imports(), 2)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestWorkflowLoader)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
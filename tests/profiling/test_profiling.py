@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+
+import io
+import os
+import sys
+import unittest
+
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy import profiling
+from wft4galaxy.profiling import ApiProfiler, get_endpoint, LATENCY_BUCKETS
+
+GalaxyUrl = "http://galaxy.test:8080/galaxy"
+
+
+class _StubGalaxyInstance(object):
+    """ Stub of :class:`bioblend.galaxy.objects.GalaxyInstance` """
+
+    def __init__(self, url):
+        self.gi = self
+        self.base_url = url
+
+
+class _StubAdapter(BaseAdapter):
+    """ Transport adapter which answers every request with ``body`` """
+
+    def __init__(self, body, status_code=200):
+        super(_StubAdapter, self).__init__()
+        self.body = body
+        self.status_code = status_code
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        response = requests.Response()
+        response.status_code = self.status_code
+        response.raw = io.BytesIO(self.body)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+class TestApiProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = ApiProfiler()
+        self.profiler.watch(_StubGalaxyInstance(GalaxyUrl))
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def _make_session(self, body, status_code=200):
+        session = requests.Session()
+        session.mount("http://", _StubAdapter(body, status_code))
+        return session
+
+    def test_endpoints(self):
+        self.assertEqual(get_endpoint(GalaxyUrl + "/api/histories/f2db41e1fa331b3e/contents/42?key=k"),
+                         "/api/histories/{id}/contents/{id}")
+        self.assertEqual(get_endpoint(GalaxyUrl + "/api/tools"), "/api/tools")
+        # short (or not hexadecimal) segments are not IDs
+        self.assertEqual(get_endpoint(GalaxyUrl + "/api/workflows/abc123/invocations"),
+                         "/api/workflows/abc123/invocations")
+        self.assertEqual(get_endpoint("http://galaxy.test/api/datasets/zzzzzzzzzzzzzzzzzz/display"),
+                         "/api/datasets/zzzzzzzzzzzzzzzzzz/display")
+
+    def test_latency_statistics(self):
+        for i, latency in enumerate([0.005, 0.02, 0.02, 0.3, 4.0, 0.04, 0.07, 0.2, 0.6, 12.0]):
+            self.profiler.record("get", GalaxyUrl + "/api/histories/f2db41e1fa331b3e", latency, error=i == 0)
+        self.profiler.record("POST", GalaxyUrl + "/api/histories", 0.001, bytes_sent=10, bytes_received=20)
+        profile = self.profiler.get_profile()
+        self.assertEqual((profile["calls"], profile["errors"], profile["bytes_sent"], profile["bytes_received"]),
+                         (11, 1, 10, 20))
+        # endpoints are sorted by total time
+        get, post = profile["endpoints"]
+        self.assertEqual((get["method"], get["endpoint"], get["calls"], get["errors"]),
+                         ("GET", "/api/histories/{id}", 10, 1))
+        self.assertEqual((get["p50_latency"], get["p95_latency"], get["max_latency"]), (0.2, 12.0, 12.0))
+        self.assertAlmostEqual(get["mean_latency"], 1.7255)
+        self.assertEqual([b["count"] for b in get["latency_histogram"]], [1, 2, 1, 1, 1, 1, 1, 0, 1, 0, 1])
+        self.assertEqual([b["le"] for b in get["latency_histogram"]], list(LATENCY_BUCKETS[:-1]) + ["+Inf"])
+        self.assertEqual((post["method"], post["endpoint"], post["p50_latency"]), ("POST", "/api/histories", 0.001))
+
+    def test_bytes(self):
+        self.profiler.start()
+        session = self._make_session(b"x" * 1000)
+        self.assertEqual(len(session.get(GalaxyUrl + "/api/tools").content), 1000)
+        # text bodies are counted once encoded
+        session.post(GalaxyUrl + "/api/histories", data=u"{\"name\": \"été\"}")
+        # bytes of streamed responses are counted as they are consumed
+        response = session.get(GalaxyUrl + "/api/datasets/f2db41e1fa331b3e/display", stream=True)
+        chunks = response.iter_content(300)
+        next(chunks)
+        endpoints = dict([(e["endpoint"], e) for e in self.profiler.get_profile()["endpoints"]])
+        self.assertEqual(endpoints["/api/datasets/{id}/display"]["bytes_received"], 300)
+        self.assertEqual(sum(len(c) for c in chunks), 700)
+        endpoints = dict([(e["endpoint"], e) for e in self.profiler.get_profile()["endpoints"]])
+        self.assertEqual(endpoints["/api/datasets/{id}/display"]["bytes_received"], 1000)
+        self.assertEqual(endpoints["/api/tools"]["bytes_received"], 1000)
+        self.assertEqual(endpoints["/api/histories"]["bytes_sent"], 17)
+
+    def test_unwatched_servers(self):
+        self.profiler.start()
+        self._make_session(b"{}").get("http://other.test/api/tools")
+        self._make_session(b"{}", 404).get(GalaxyUrl + "/api/tools")
+        profile = self.profiler.get_profile()
+        self.assertEqual((profile["calls"], profile["errors"]), (1, 1))
+
+    def test_send_restore(self):
+        send = requests.Session.send
+        self.profiler.start()
+        self.assertIs(profiling.get_active_profiler(), self.profiler)
+        self.assertIsNot(requests.Session.send, send)
+        self.assertRaises(RuntimeError, ApiProfiler().start)
+        self.profiler.stop()
+        self.assertIsNone(profiling.get_active_profiler())
+        self.assertIs(requests.Session.send, send)
+        # calls following the profiling are not recorded
+        self._make_session(b"{}").get(GalaxyUrl + "/api/tools")
+        self.assertEqual(self.profiler.get_profile()["calls"], 0)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestApiProfiler)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Support of the tests which run workflow tests against the fake Galaxy server
+of the benchmarks (see ``benchmarks/fake_galaxy.py``).
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../benchmarks') )
+
+from bioblend.galaxy.objects.wrappers import Workflow
+from fake_galaxy import FakeGalaxy
+
+from wft4galaxy import common
+from wft4galaxy.core import WorkflowTestCase, WorkflowTestSuite
+
+DataDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# the runner invokes workflows by means of the legacy Workflow.run of bioblend
+requires_workflow_run = unittest.skipUnless(
+    hasattr(Workflow, "run"), "the installed bioblend has no Workflow.run (bioblend<=0.13.0 is required)")
+
+
+class FakeGalaxyTestCase(unittest.TestCase):
+    """
+    Base class of the tests which run workflow tests against a new :class:`FakeGalaxy`.
+    Each workflow test runs the identity workflow ``data/workflow.ga`` on ``data/input.txt``.
+    """
+
+    # keyword arguments of the fake Galaxy server of each test
+    galaxy_options = {}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="wft4galaxy-test-")
+        shutil.copy(os.path.join(DataDir, "workflow.ga"), self.tmp_dir)
+        shutil.copy(os.path.join(DataDir, "input.txt"), self.tmp_dir)
+        self.output_folder = os.path.join(self.tmp_dir, "results")
+        self.galaxy = FakeGalaxy(**self.galaxy_options).start()
+        # the workflow loader is a singleton bound to the first Galaxy server
+        common.WorkflowLoader._instance = None
+
+    def tearDown(self):
+        self.galaxy.stop()
+        common.WorkflowLoader._instance = None
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def write_file(self, filename, content):
+        """
+        Write ``content`` (bytes) to ``filename`` within the folder of the test.
+
+        :rtype: str
+        :return: the path of the file
+        """
+        path = os.path.join(self.tmp_dir, filename)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def get_input(self):
+        with open(os.path.join(DataDir, "input.txt"), "rb") as f:
+            return f.read()
+
+    def make_test(self, name, inputs=None, expected_outputs=None):
+        """
+        Create a workflow test whose output is expected to be equal to its input (by default).
+
+        :rtype: :class:`wft4galaxy.core.WorkflowTestCase`
+        """
+        return WorkflowTestCase(name=name, base_path=self.tmp_dir,
+                                inputs=inputs or {"input": {"file": "input.txt"}},
+                                expected_outputs=expected_outputs or {"output": {"file": "input.txt"}},
+                                output_folder=os.path.join(self.output_folder, name))
+
+    def make_suite(self, *tests):
+        """
+        :rtype: :class:`wft4galaxy.core.WorkflowTestSuite`
+        """
+        suite = WorkflowTestSuite(self.galaxy.url, "wft4galaxy-test", output_folder=self.output_folder)
+        for test in tests:
+            suite.add_workflow_test(test)
+        return suite
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase, requires_workflow_run
+from wft4galaxy import common
+from wft4galaxy.cache import ComparisonCache
+import wft4galaxy.runner
+
+
+@requires_workflow_run
+class TestComparisonCacheReplay(FakeGalaxyTestCase):
+
+    def setUp(self):
+        super(TestComparisonCacheReplay, self).setUp()
+        self.write_file("different.txt", b"wft4galaxy\tdifferent\n")
+        self.comparison_cache = ComparisonCache(os.path.join(self.tmp_dir, "cache"))
+        # record the verdicts returned by the cache
+        self.cached_verdicts = []
+        get = self.comparison_cache.get
+
+        def record_verdict(*args, **kwargs):
+            self.cached_verdicts.append(get(*args, **kwargs))
+            return self.cached_verdicts[-1]
+
+        self.comparison_cache.get = record_verdict
+
+    def _run_test(self):
+        test = self.make_test("test_1", expected_outputs={"output": {"file": "different.txt"}})
+        galaxy_instance = common.get_galaxy_instance(self.galaxy.url, "wft4galaxy-test")
+        runner = wft4galaxy.runner.WorkflowTestCaseRunner(
+            galaxy_instance, common.WorkflowLoader.get_instance(galaxy_instance), test,
+            comparison_cache=self.comparison_cache)
+        streams = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = StringIO(), StringIO()
+        try:
+            result = runner.run_test(disable_assertions=True)
+            messages = sys.stdout.getvalue(), sys.stderr.getvalue()
+        finally:
+            sys.stdout, sys.stderr = streams
+        self.assertFalse(result.passed())
+        self.assertEqual(list(result.failed_outputs), ["output"])
+        return messages
+
+    def test_replayed_messages(self):
+        messages = self._run_test()
+        self.assertIn("@@ -1,20 +1 @@", messages[0])
+        # the verdict of the second run is cached and the diff preview of the comparator is replayed
+        self.assertEqual(self._run_test(), messages)
+        self.assertEqual(self.cached_verdicts, [None, False])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestComparisonCacheReplay)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
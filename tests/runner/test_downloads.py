@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import filecmp
+import threading
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy import common
+import wft4galaxy.runner
+
+
+class TestOutputPipeline(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestOutputPipeline, self).setUp()
+        self.gi = common.get_galaxy_instance(self.galaxy.url, "wft4galaxy-test")
+        self.loader = common.WorkflowLoader.get_instance(self.gi)
+        self.history = self.gi.histories.create("test")
+        # outputs: 'slow' is downloaded in half a second, 'different' differs from the expected one
+        self.outputs, self.expected_outputs = [], {}
+        for name in ("slow", "fast_1", "fast_2", "different"):
+            dataset = self.galaxy.add_dataset(self.history.id, name, name.encode("utf-8"))
+            self.outputs.append(self.history.get_dataset(dataset["id"]))
+            self.write_file(name + ".txt", b"expected" if name == "different" else name.encode("utf-8"))
+            self.expected_outputs[name] = {"file": name + ".txt"}
+        self.slow_dataset_id = self.outputs[0].id
+        # events: (<EVENT>, <OUTPUT>, <TIME>)
+        self.events = []
+        self.downloads = 0
+        self.max_downloads = 0
+        self.lock = threading.Lock()
+        get_dataset_content = self.galaxy.get_dataset_content
+
+        def delayed_download(dataset_id, history_id=None):
+            with self.lock:
+                self.downloads += 1
+                self.max_downloads = max(self.max_downloads, self.downloads)
+            try:
+                time.sleep(0.5 if dataset_id == self.slow_dataset_id else 0.05)
+                return get_dataset_content(dataset_id, history_id)
+            finally:
+                with self.lock:
+                    self.downloads -= 1
+                    self.events.append(("downloaded", self.galaxy.get_dataset(dataset_id)["name"], time.time()))
+
+        self.galaxy.get_dataset_content = delayed_download
+
+    def _compare(self, actual_output_filename, expected_output_filename):
+        self.events.append(("compare", os.path.basename(actual_output_filename), time.time()))
+        time.sleep(0.05)
+        return filecmp.cmp(actual_output_filename, expected_output_filename, shallow=False)
+
+    def _check_outputs(self, download_jobs):
+        test = self.make_test("test_1", expected_outputs=self.expected_outputs)
+        runner = wft4galaxy.runner.WorkflowTestCaseRunner(self.gi, self.loader, test, download_jobs=download_jobs)
+        runner._get_comparator = lambda config: self._compare
+        results, output_file_map = runner._check_outputs(self.tmp_dir, self.outputs, test.expected_outputs,
+                                                         self.output_folder)
+        self.assertEqual(results, {"slow": True, "fast_1": True, "fast_2": True, "different": False})
+        self.assertEqual(sorted(output_file_map), sorted(self.expected_outputs))
+        for name, output in output_file_map.items():
+            self.assertEqual(output["dataset"].name, name)
+            with open(output["filename"], "rb") as f:
+                self.assertEqual(f.read(), name.encode("utf-8"))
+        return dict([((event, name), t) for event, name, t in self.events])
+
+    def test_pipeline(self):
+        events = self._check_outputs(3)
+        self.assertEqual(self.max_downloads, 3)
+        # the fast outputs are compared while the slow one is downloaded
+        for name in ("fast_1", "fast_2"):
+            self.assertLess(events[("compare", name)], events[("downloaded", "slow")])
+        self.assertGreater(events[("compare", "slow")], events[("downloaded", "slow")])
+
+    def test_sequential(self):
+        self._check_outputs(1)
+        self.assertEqual(self.max_downloads, 1)
+        self.assertEqual([(event, name) for event, name, _ in self.events],
+                         [(event, name) for name in ("slow", "fast_1", "fast_2", "different")
+                          for event in ("downloaded", "compare")])
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestOutputPipeline)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
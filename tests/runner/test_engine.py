@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase, requires_workflow_run
+from wft4galaxy import common
+from wft4galaxy.core import ExecutionEngine
+from wft4galaxy.runner import WorkflowTestsRunner
+
+
+@requires_workflow_run
+class TestExecutionEngines(FakeGalaxyTestCase):
+    galaxy_options = {"job_duration": 0.2}
+
+    def _run_suite(self, jobs, engine):
+        self.write_file("different.txt", b"wft4galaxy\tdifferent\n")
+        suite = self.make_suite(self.make_test("test_1"),
+                                self.make_test("test_2", expected_outputs={"output": {"file": "different.txt"}}),
+                                self.make_test("test_3"))
+        with open(os.devnull, "w") as devnull:
+            tests_runner = WorkflowTestsRunner(self.galaxy.url, "wft4galaxy-test",
+                                               output_folder=self.output_folder, stream=devnull)
+            # record the threads which import the workflows
+            loader = common.WorkflowLoader.get_instance()
+            load_workflow = loader.load_workflow
+            self.loading_threads = []
+
+            def record_thread(*args, **kwargs):
+                self.loading_threads.append(threading.current_thread())
+                return load_workflow(*args, **kwargs)
+
+            loader.load_workflow = record_thread
+            return tests_runner.run(suite, output_folder=self.output_folder, jobs=jobs, engine=engine)
+
+    def _check_results(self, result):
+        # results are reported in the order of the suite
+        results = result.test_case_results
+        self.assertEqual([os.path.basename(r.output_folder) for r in results], ["test_1", "test_2", "test_3"])
+        self.assertEqual([r.passed() for r in results], [True, False, True])
+        self.assertEqual(list(results[1].failed_outputs), ["output"])
+        self.assertEqual([r.missing_tools for r in results], [[], [], []])
+
+    def test_serial(self):
+        self._check_results(self._run_suite(1, ExecutionEngine.threads))
+
+    def test_threads(self):
+        self._check_results(self._run_suite(3, ExecutionEngine.threads))
+
+    def test_coroutines(self):
+        self._check_results(self._run_suite(3, ExecutionEngine.coroutines))
+        # the workflows are imported off the engine thread
+        self.assertEqual(len(self.loading_threads), 3)
+        self.assertNotIn(threading.current_thread(), self.loading_threads)
+
+    def test_single_in_flight_test(self):
+        self._check_results(self._run_suite(1, ExecutionEngine.coroutines))
+
+    def test_concurrent_jobs(self):
+        # the jobs of concurrent tests overlap
+        elapsed_times = []
+        for jobs, engine in ((1, ExecutionEngine.threads), (3, ExecutionEngine.threads),
+                             (3, ExecutionEngine.coroutines)):
+            start = time.time()
+            self._check_results(self._run_suite(jobs, engine))
+            elapsed_times.append(time.time() - start)
+        self.assertGreaterEqual(elapsed_times[0], 0.6)
+        for elapsed_time in elapsed_times[1:]:
+            self.assertLess(elapsed_time, elapsed_times[0] - 0.2)
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestExecutionEngines)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import time
+import threading
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase
+from wft4galaxy import common
+import wft4galaxy.runner
+
+
+class TestInputUploads(FakeGalaxyTestCase):
+    def setUp(self):
+        super(TestInputUploads, self).setUp()
+        self.gi = common.get_galaxy_instance(self.galaxy.url, "wft4galaxy-test")
+        self.loader = common.WorkflowLoader.get_instance(self.gi)
+        # the upload of a file lasts as many tenths of a second as the number it contains
+        self.uploads = []
+        self.max_uploads = 0
+        self.lock = threading.Lock()
+        upload = self.galaxy.upload
+
+        def delayed_upload(history_id, filename, content, inputs):
+            with self.lock:
+                self.uploads.append(filename)
+                self.max_uploads = max(self.max_uploads, len(self.uploads))
+            try:
+                time.sleep(int(content) / 10.0)
+                return upload(history_id, filename, content, inputs)
+            finally:
+                with self.lock:
+                    self.uploads.remove(filename)
+
+        self.galaxy.upload = delayed_upload
+
+    def _make_inputs(self, label, delays):
+        filenames = []
+        for i, delay in enumerate(delays):
+            filename = "{0}_{1}.txt".format(label, i)
+            self.write_file(filename, str(delay).encode("utf-8"))
+            filenames.append(filename)
+        return {label: {"file": filenames}}
+
+    def _upload_inputs(self, runner):
+        history = self.gi.histories.create("test")
+        datamap = runner._upload_inputs(history, runner.workflow_test_config.inputs, self.tmp_dir)
+        return {label: [self.galaxy.get_dataset(d.id)["content"] for d in datasets]
+                for label, datasets in datamap.items()}
+
+    def test_datamap_order(self):
+        inputs = self._make_inputs("first", [4, 3, 2, 1])
+        inputs.update(self._make_inputs("second", [1, 3]))
+        test = self.make_test("test_1", inputs=inputs)
+        runner = wft4galaxy.runner.WorkflowTestCaseRunner(self.gi, self.loader, test, upload_jobs=6)
+        # the last uploads complete first, but datasets are listed in the order of the configured files
+        self.assertEqual(self._upload_inputs(runner),
+                         {"first": [b"4", b"3", b"2", b"1"], "second": [b"1", b"3"]})
+        self.assertEqual(self.max_uploads, 6)
+
+    def test_suite_upload_slots(self):
+        tests = [self.make_test("test_{0}".format(i), inputs=self._make_inputs("input_{0}".format(i), [1, 1, 1]))
+                 for i in range(3)]
+        suite_runner = wft4galaxy.runner.WorkflowTestSuiteRunner(self.gi, self.loader, self.make_suite(*tests),
+                                                                 upload_jobs=2)
+        datamaps = {}
+
+        def upload_inputs(test):
+            runner = wft4galaxy.runner.WorkflowTestCaseRunner(self.gi, self.loader, test,
+                                                              test_suite_runner=suite_runner, upload_jobs=3)
+            datamaps[test.name] = self._upload_inputs(runner)
+
+        threads = [threading.Thread(target=upload_inputs, args=(test,)) for test in tests]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # the upload slots are shared by all the workflow tests of the suite
+        self.assertEqual(self.max_uploads, 2)
+        self.assertEqual(datamaps, {"test_{0}".format(i): {"input_{0}".format(i): [b"1", b"1", b"1"]}
+                                    for i in range(3)})
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestInputUploads)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import shutil
+import time
+import tempfile
+import unittest
+from xml.dom.minidom import parse
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+sys.path.append( os.path.join(os.path.dirname(__file__), '../') )
+
+from runner.support import FakeGalaxyTestCase, requires_workflow_run
+from wft4galaxy.core import WorkflowTestCase, ExecutionEngine
+from wft4galaxy import runner
+
+
+class _TestSuite(object):
+    uuid = "xunit-report-test"
+
+
+class TestXUnitReport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.report_filename = os.path.join(self.tmp_dir, "report.xml")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self, *tests):
+        with open(os.devnull, "w") as devnull:
+            result = runner._ExtendedXMLTestResult(_TestSuite(), stream=devnull)
+            for test in tests:
+                result.startTest(test)
+                result.addSuccess(test)
+                result.stopTest(test)
+        return result
+
+    def _write_report(self, result):
+        # reports are written to text files (see WorkflowTestsRunner.run)
+        with open(self.report_filename, "w") as report_file:
+            result.generate_report(report_file, "xunit")
+        return parse(self.report_filename)
+
+    def test_text_report(self):
+        test = runner.WorkflowTestCaseRunner(None, None, WorkflowTestCase(name="test_1"))
+        report = self._write_report(self._run(test))
+        testsuite = report.getElementsByTagName("testsuite")[0]
+        self.assertEqual(testsuite.getAttribute("name"), _TestSuite.uuid)
+        self.assertEqual(testsuite.getAttribute("tests"), "1")
+        self.assertEqual([t.getAttribute("name") for t in report.getElementsByTagName("testcase")], ["test_test_1"])
+
+    def test_phase_properties(self):
+        test_1 = runner.WorkflowTestCaseRunner(None, None, WorkflowTestCase(name="test_1"))
+        test_1._add_phase("upload", 10.0, 10.25)
+        test_1._add_phase("invoke", 10.25, 11.0)
+        test_1._add_phase("upload", 11.0, 11.5)
+        test_2 = runner.WorkflowTestCaseRunner(None, None, WorkflowTestCase(name="test_2"))
+        report = self._write_report(self._run(test_1, test_2))
+        testcases = dict([(t.getAttribute("name"), t) for t in report.getElementsByTagName("testcase")])
+        # durations of the same phase are summed, in the order of the phases
+        self.assertEqual([(p.getAttribute("name"), p.getAttribute("value"))
+                          for p in testcases["test_test_1"].getElementsByTagName("property")],
+                         [("phase.upload", "0.750"), ("phase.invoke", "0.750")])
+        self.assertEqual([n.tagName for n in testcases["test_test_1"].childNodes
+                          if n.nodeType == n.ELEMENT_NODE][0], "properties")
+        # tests without timed phases have no properties
+        self.assertEqual(testcases["test_test_2"].getElementsByTagName("properties"), [])
+
+    def test_deferred_execution_time(self):
+        test = runner.WorkflowTestCaseRunner(None, None, WorkflowTestCase(name="test_1"))
+        # a workflow test executed outside unittest, e.g., by a parallel suite, reports its execution time
+        test._execution_start = time.time() - 2.0
+        test.set_outcome()
+        report = self._write_report(self._run(test))
+        testcase = report.getElementsByTagName("testcase")[0]
+        self.assertAlmostEqual(float(testcase.getAttribute("time")), 2.0, delta=0.1)
+
+
+@requires_workflow_run
+class TestParallelXUnitReport(FakeGalaxyTestCase):
+    galaxy_options = {"job_duration": 0.5}
+
+    def _run_suite(self, jobs, engine=None):
+        report_filename = os.path.join(self.tmp_dir, "report-{0}-{1}.xml".format(jobs, engine))
+        suite = self.make_suite(*[self.make_test("test_{0}".format(i)) for i in range(3)])
+        with open(os.devnull, "w") as devnull:
+            tests_runner = runner.WorkflowTestsRunner(self.galaxy.url, "wft4galaxy-test",
+                                                      output_folder=self.output_folder, stream=devnull)
+            tests_runner.run(suite, output_folder=self.output_folder, jobs=jobs, engine=engine,
+                             report_format="xunit", report_filename=report_filename)
+        return parse(report_filename)
+
+    def _get_testcases(self, report):
+        return [(t.getAttribute("name"), float(t.getAttribute("time")), len(t.getElementsByTagName("failure")))
+                for t in report.getElementsByTagName("testcase")]
+
+    def test_same_report_as_serial_run(self):
+        serial = self._get_testcases(self._run_suite(1))
+        for engine in ExecutionEngine:
+            parallel = self._get_testcases(self._run_suite(3, engine))
+            self.assertEqual([(name, failures) for name, _, failures in parallel],
+                             [(name, failures) for name, _, failures in serial])
+            # each test waits for its job: concurrent tests report their execution time, not the time of their replay
+            for name, elapsed_time, _ in serial + parallel:
+                self.assertGreaterEqual(elapsed_time, 0.5, name)
+
+
+def suite():
+    loader = unittest.TestLoader()
+    return unittest.TestSuite([loader.loadTestsFromTestCase(TestXUnitReport),
+                               loader.loadTestsFromTestCase(TestParallelXUnitReport)])
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+
+sys.path.append( os.path.join(os.path.dirname(__file__), '../../') )
+
+from wft4galaxy.tracing import Tracer, TRACE_EVENT_CATEGORY
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+
+    def _lanes(self):
+        return dict([(e["args"]["name"], e["tid"]) for e in self.tracer.get_events() if e["ph"] == "M"])
+
+    def _spans(self):
+        return [e for e in self.tracer.get_events() if e["ph"] == "X"]
+
+    def test_spans(self):
+        self.assertAlmostEqual(self.tracer.add_span("upload", 10.0, 10.5, track="test_1", dataset="input"), 0.5)
+        # negative durations are clipped
+        self.assertEqual(self.tracer.add_span("download", 11.0, 10.0, track="test_1"), 0.0)
+        with self.tracer.span("compare", track="test_1", output="output"):
+            pass
+        upload, download, compare = self._spans()
+        self.assertEqual((upload["name"], upload["cat"], upload["ts"], upload["dur"], upload["args"]),
+                         ("upload", TRACE_EVENT_CATEGORY, 10000000, 500000, {"dataset": "input"}))
+        self.assertEqual(download["dur"], 0)
+        self.assertEqual(compare["args"], {"output": "output"})
+        self.assertEqual(len(set([e["tid"] for e in self._spans()])), 1)
+
+    def test_lanes(self):
+        main_thread = threading.current_thread().name
+        self.tracer.add_span("upload", 0, 1, track="test_1")
+        self.tracer.add_span("upload", 0, 1, track="test_2")
+        self.tracer.add_span("invoke", 1, 2, track="test_1")
+        self.tracer.add_span("poll", 0, 2)
+        # the same track gets a separate lane on each thread
+        thread = threading.Thread(target=self.tracer.add_span, args=("download", 2, 3), kwargs={"track": "test_1"},
+                                  name="download-thread")
+        thread.start()
+        thread.join()
+        lanes = self._lanes()
+        self.assertEqual(lanes, {"test_1 ({0})".format(main_thread): 1, "test_2 ({0})".format(main_thread): 2,
+                                 main_thread: 3, "test_1 (download-thread)": 4})
+        self.assertEqual([(e["name"], e["tid"]) for e in self._spans()],
+                         [("upload", 1), ("upload", 2), ("invoke", 1), ("poll", 3), ("download", 4)])
+
+    def test_chrome_trace(self):
+        self.tracer.add_span("upload", 0, 1, track="test_1")
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            trace_filename = os.path.join(tmp_dir, "traces", "trace.json")
+            self.tracer.save(trace_filename)
+            with open(trace_filename) as f:
+                trace = json.load(f)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(trace["displayTimeUnit"], "ms")
+        self.assertEqual(trace["traceEvents"], self.tracer.get_events())
+        self.assertEqual([e["ph"] for e in trace["traceEvents"]], ["M", "X"])
+        for event in trace["traceEvents"]:
+            self.assertEqual(event["pid"], os.getpid())
+
+
+def suite():
+    return unittest.TestLoader().loadTestsFromTestCase(TestTracer)
+
+
+def main():
+    result = unittest.TextTestRunner(verbosity=2).run(suite())
+    return 0 if result.wasSuccessful() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -173,6 +173,49 @@ class _CommandLineHelper:
                                   .format(DEFAULT_OUTPUT_FOLDER))
         wft4g_parser.add_argument('--enable-logger', help='Enable log messages', action='store_true')
         wft4g_parser.add_argument('--disable-cleanup', help='Disable cleanup', action='store_true')
+        wft4g_parser.add_argument('-j', '--jobs', type=int, default=1, metavar="N",
+                                  help='Number of workflow tests to run in parallel (default is 1)')
+        # here we hardcode the possible values of wft4galaxy.core.ExecutionEngine (see the note below)
+        wft4g_parser.add_argument('--engine', choices=('threads', 'coroutines'), default='threads',
+                                  help='Engine used to run parallel tests (default is threads)')
+        wft4g_parser.add_argument('--upload-jobs', type=int, default=None, metavar="N",
+                                  help='Maximum number of concurrent uploads of input datasets')
+        wft4g_parser.add_argument('--download-jobs', type=int, default=None, metavar="N",
+                                  help='Maximum number of concurrent downloads of output datasets')
+        wft4g_parser.add_argument('--stream-outputs', action='store_true',
+                                  help='Compare output datasets while they are downloaded')
+        wft4g_parser.add_argument('--enable-input-cache', action='store_true',
+                                  help='Reuse input datasets already uploaded to the Galaxy server')
+        wft4g_parser.add_argument('--enable-comparison-cache', action='store_true',
+                                  help='Reuse the verdicts of previous comparisons of identical outputs')
+        wft4g_parser.add_argument('--reuse-workflows', action='store_true',
+                                  help='Keep imported workflows on the Galaxy server and reuse them across runs')
+        wft4g_parser.add_argument('--tool-index-ttl', type=int, default=None, metavar="SECONDS",
+                                  help='Persist the index of the installed tools and reuse it for SECONDS')
+        wft4g_parser.add_argument('--comparator-jobs', type=int, default=None, metavar="N",
+                                  help='Run comparators on a pool of N worker processes')
+        wft4g_parser.add_argument('--comparator-timeout', type=float, default=None, metavar="SECONDS",
+                                  help='Kill comparators running longer than SECONDS')
+        wft4g_parser.add_argument('--wait-timeout', type=float, default=None, metavar="SECONDS",
+                                  help='Fail the workflow tests whose outputs are not completed by Galaxy '
+                                       'within SECONDS')
+        wft4g_parser.add_argument('--trace-file', default=None, metavar="PATH",
+                                  help='Write the timed phases of the workflow tests to a Chrome trace file '
+                                       '(absolute or relative to the output folder)')
+        wft4g_parser.add_argument('--profile-api', action='store_true', default=None,
+                                  help='Profile the calls to the Galaxy API, printing a summary and writing it '
+                                       'to a file')
+        wft4g_parser.add_argument('--profile-api-file', default=None, metavar="PATH",
+                                  help='Set the path of the Galaxy API profile file '
+                                       '(absolute or relative to the output folder); implies --profile-api')
+        wft4g_parser.add_argument('--record-api', default=None, metavar="PATH",
+                                  help='Record the calls to the Galaxy API to a cassette file '
+                                       '(absolute or relative to the output folder)')
+        wft4g_parser.add_argument('--replay-api', default=None, metavar="PATH",
+                                  help='Replay offline the calls to the Galaxy API recorded in a cassette file '
+                                       '(absolute or relative to the output folder)')
+        wft4g_parser.add_argument('--replay-timing', action='store_true',
+                                  help='Replay the calls to the Galaxy API with their original latency')
 
         # here we hardcode the possible values of wft4galaxy.core.OutputFormat because we don't
         # want to require installing the package to use the docker runner.
@@ -433,6 +476,43 @@ class NonInteractiveContainer(Container):
             # cleanup option
             if options.disable_cleanup:
                 cmd.append("--disable-cleanup")
+            # parallel jobs
+            if options.jobs > 1:
+                cmd.extend(("--jobs", str(options.jobs)))
+            if options.engine != 'threads':
+                cmd.extend(("--engine", options.engine))
+            if options.upload_jobs:
+                cmd.extend(("--upload-jobs", str(options.upload_jobs)))
+            if options.download_jobs:
+                cmd.extend(("--download-jobs", str(options.download_jobs)))
+            if options.stream_outputs:
+                cmd.append("--stream-outputs")
+            if options.enable_input_cache:
+                cmd.append("--enable-input-cache")
+            if options.enable_comparison_cache:
+                cmd.append("--enable-comparison-cache")
+            if options.reuse_workflows:
+                cmd.append("--reuse-workflows")
+            if options.tool_index_ttl is not None:
+                cmd.extend(("--tool-index-ttl", str(options.tool_index_ttl)))
+            if options.comparator_jobs:
+                cmd.extend(("--comparator-jobs", str(options.comparator_jobs)))
+            if options.comparator_timeout:
+                cmd.extend(("--comparator-timeout", str(options.comparator_timeout)))
+            if options.wait_timeout:
+                cmd.extend(("--wait-timeout", str(options.wait_timeout)))
+            if options.trace_file:
+                cmd.extend(("--trace-file", options.trace_file))
+            if options.profile_api:
+                cmd.append("--profile-api")
+            if options.profile_api_file:
+                cmd.extend(("--profile-api-file", options.profile_api_file))
+            if options.record_api:
+                cmd.extend(("--record-api", options.record_api))
+            if options.replay_api:
+                cmd.extend(("--replay-api", options.replay_api))
+            if options.replay_timing:
+                cmd.append("--replay-timing")
             # output format options
             cmd.extend(('--output-format', options.output_format))
             if options.xunit_file:
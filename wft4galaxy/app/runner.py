@@ -7,7 +7,10 @@ import logging as _logging
 
 import wft4galaxy.core as _core
 import wft4galaxy.common as _common
-from wft4galaxy.core import OutputFormat
+import wft4galaxy.cache as _cache
+import wft4galaxy.profiling as _profiling
+import wft4galaxy.cassettes as _cassettes
+from wft4galaxy.core import OutputFormat, ExecutionEngine
 
 # set logger
 _logger = _common.LoggerManager.get_logger(__name__)
@@ -31,6 +34,49 @@ def _make_parser():
     parser.add_argument('--enable-logger', help='Enable log messages', action='store_true', default=None)
     parser.add_argument('--debug', help='Enable debug mode', action='store_true', default=None)
     parser.add_argument('--disable-cleanup', help='Disable cleanup', action='store_true', default=None)
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar="N",
+                        help='Number of workflow tests to run in parallel (default is 1)')
+    parser.add_argument('--engine', choices=ExecutionEngine, default=ExecutionEngine.threads,
+                        help='Engine used to run parallel tests (default is {0})'.format(ExecutionEngine.threads))
+    parser.add_argument('--upload-jobs', type=int, default=_core.DEFAULT_UPLOAD_JOBS, metavar="N",
+                        help='Maximum number of concurrent uploads of input datasets (default is {0})'
+                        .format(_core.DEFAULT_UPLOAD_JOBS))
+    parser.add_argument('--download-jobs', type=int, default=_core.DEFAULT_DOWNLOAD_JOBS, metavar="N",
+                        help='Maximum number of concurrent downloads of output datasets (default is {0})'
+                        .format(_core.DEFAULT_DOWNLOAD_JOBS))
+    parser.add_argument('--stream-outputs', action='store_true', default=None,
+                        help='Compare output datasets while they are downloaded')
+    parser.add_argument('--enable-input-cache', action='store_true', default=None,
+                        help='Reuse input datasets already uploaded to the Galaxy server')
+    parser.add_argument('--enable-comparison-cache', action='store_true', default=None,
+                        help='Reuse the verdicts of previous comparisons of identical outputs')
+    parser.add_argument('--reuse-workflows', action='store_true', default=None,
+                        help='Keep imported workflows on the Galaxy server and reuse them across runs')
+    parser.add_argument('--tool-index-ttl', type=int, default=None, metavar="SECONDS",
+                        help='Persist the index of the installed tools and reuse it for SECONDS (e.g., {0})'
+                        .format(_cache.DEFAULT_TOOL_INDEX_TTL))
+    parser.add_argument('--comparator-jobs', type=int, default=None, metavar="N",
+                        help='Run comparators on a pool of N worker processes')
+    parser.add_argument('--comparator-timeout', type=float, default=None, metavar="SECONDS",
+                        help='Kill comparators running longer than SECONDS')
+    parser.add_argument('--wait-timeout', type=float, default=None, metavar="SECONDS",
+                        help='Fail the workflow tests whose outputs are not completed by Galaxy within SECONDS')
+    parser.add_argument('--trace-file', default=None, metavar="FILE_PATH",
+                        help='Write the timed phases of the workflow tests to a Chrome trace file '
+                             '(absolute or relative to the output folder)')
+    parser.add_argument('--profile-api', action='store_true', default=None,
+                        help='Profile the calls to the Galaxy API, printing a summary and writing it to a file')
+    parser.add_argument('--profile-api-file', default=None, metavar="FILE_PATH",
+                        help='Set the path of the Galaxy API profile file (absolute or relative to the output folder, '
+                             'default is {0}); implies --profile-api'.format(_profiling.DEFAULT_API_PROFILE_FILENAME))
+    parser.add_argument('--record-api', default=None, metavar="FILE_PATH",
+                        help='Record the calls to the Galaxy API to a cassette file '
+                             '(absolute or relative to the output folder)')
+    parser.add_argument('--replay-api', default=None, metavar="FILE_PATH",
+                        help='Replay offline the calls to the Galaxy API recorded in a cassette file '
+                             '(absolute or relative to the output folder)')
+    parser.add_argument('--replay-timing', action='store_true', default=None,
+                        help='Replay the calls to the Galaxy API with their original latency')
 
     parser.add_argument('--output-format', choices=OutputFormat, help='Choose output type', default=OutputFormat.text)
 
@@ -50,6 +96,24 @@ def _parse_cli_arguments(parser, cmd_args):
         parser.error("Permission error.  Test file {} isn't accessible for reading".format(args.file))
     if args.xunit_file and args.output_format != OutputFormat.xunit:
         parser.error("--xunit-file can only be specified when using the xUnit output format")
+    if args.jobs < 1:
+        parser.error("--jobs must be a positive integer")
+    if args.upload_jobs < 1:
+        parser.error("--upload-jobs must be a positive integer")
+    if args.download_jobs < 1:
+        parser.error("--download-jobs must be a positive integer")
+    if args.tool_index_ttl is not None and args.tool_index_ttl < 0:
+        parser.error("--tool-index-ttl must be a non-negative integer")
+    if args.comparator_jobs is not None and args.comparator_jobs < 1:
+        parser.error("--comparator-jobs must be a positive integer")
+    if args.comparator_timeout is not None and args.comparator_timeout <= 0:
+        parser.error("--comparator-timeout must be a positive number")
+    if args.wait_timeout is not None and args.wait_timeout <= 0:
+        parser.error("--wait-timeout must be a positive number")
+    if args.record_api and args.replay_api:
+        parser.error("--record-api and --replay-api cannot be used together")
+    if args.replay_timing and not args.replay_api:
+        parser.error("--replay-timing can only be specified when using --replay-api")
 
     return args
 
@@ -104,7 +168,11 @@ def run_tests(filename,
               galaxy_url=None, galaxy_api_key=None,
               enable_logger=None, enable_debug=None,
               disable_cleanup=None, disable_assertions=None,
-              output_folder=None, enable_xunit=False, xunit_file=None, tests=None):
+              output_folder=None, enable_xunit=False, xunit_file=None, tests=None, jobs=None, engine=None,
+              upload_jobs=None, download_jobs=None, stream_outputs=None, enable_input_cache=None,
+              enable_comparison_cache=None, reuse_workflows=None,
+              tool_index_ttl=None, comparator_jobs=None, comparator_timeout=None, wait_timeout=None, trace_file=None,
+              profile_api=None, profile_api_file=None, record_api=None, replay_api=None, replay_timing=None):
     """
     Run a workflow test suite defined in a configuration file.
 
@@ -121,6 +189,65 @@ def run_tests(filename,
     :type disable_assertions: bool
     :param disable_assertions: ``True`` to disable assertions during the execution of the workflow test;
         ``False`` (default) otherwise.
+
+    :type jobs: int
+    :param jobs: maximum number of workflow tests which can run concurrently (default is 1)
+
+    :type engine: str
+    :param engine: the execution engine used to run concurrent tests: ``threads`` (default) or ``coroutines``
+
+    :type upload_jobs: int
+    :param upload_jobs: maximum number of concurrent uploads of the input datasets of the workflow tests
+
+    :type download_jobs: int
+    :param download_jobs: maximum number of concurrent downloads of output datasets
+
+    :type stream_outputs: bool
+    :param stream_outputs: ``True`` to compare output datasets while they are downloaded
+
+    :type enable_input_cache: bool
+    :param enable_input_cache: ``True`` to reuse input datasets already uploaded to the Galaxy server
+
+    :type enable_comparison_cache: bool
+    :param enable_comparison_cache: ``True`` to reuse the verdicts of previous comparisons of identical outputs
+
+    :type reuse_workflows: bool
+    :param reuse_workflows: ``True`` to keep the imported workflows on the Galaxy server and reuse them across runs
+
+    :type tool_index_ttl: int
+    :param tool_index_ttl: time to live (in seconds) of the persisted index of the installed tools
+
+    :type comparator_jobs: int
+    :param comparator_jobs: number of worker processes which run the comparators of the output datasets
+
+    :type comparator_timeout: float
+    :param comparator_timeout: maximum time (in seconds) granted to each comparator
+
+    :type wait_timeout: float
+    :param wait_timeout: maximum time (in seconds) granted to Galaxy to complete the outputs of each workflow test
+
+    :type trace_file: str
+    :param trace_file: path of the file (absolute or relative to the output folder) where the timed phases
+        of the workflow tests are written in the Chrome trace-event format
+
+    :type profile_api: bool
+    :param profile_api: ``True`` to profile the calls to the Galaxy API (see :class:`wft4galaxy.profiling.ApiProfiler`);
+        a summary of the profile is printed at the end of the run and the profile is written to ``profile_api_file``
+
+    :type profile_api_file: str
+    :param profile_api_file: path of the file (absolute or relative to the output folder) where the profile
+        of the calls to the Galaxy API is written (default is ``api-profile.json``); implies ``profile_api``
+
+    :type record_api: str
+    :param record_api: path of the cassette file (absolute or relative to the output folder)
+        where the calls to the Galaxy API are recorded (see :class:`wft4galaxy.cassettes.ApiCassette`)
+
+    :type replay_api: str
+    :param replay_api: path of the cassette file (absolute or relative to the output folder)
+        whose recorded calls to the Galaxy API are replayed offline
+
+    :type replay_timing: bool
+    :param replay_timing: ``True`` to replay the calls to the Galaxy API with their original latency
     """
 
     # load suite configuration
@@ -131,10 +258,46 @@ def run_tests(filename,
                     enable_logger=enable_logger, enable_debug=enable_debug,
                     disable_cleanup=disable_cleanup, disable_assertions=disable_assertions)
 
+    # record (or replay) the calls to the Galaxy API
+    cassette = None
+    if record_api or replay_api:
+        cassette_file = record_api or replay_api
+        if not _os.path.isabs(cassette_file) and not cassette_file.startswith("./"):
+            cassette_file = _os.path.join(suite.output_folder, cassette_file)
+        if replay_api and not _os.path.isfile(cassette_file):
+            raise _common.TestConfigError("Cassette file {0} doesn't exist".format(cassette_file))
+        cassette = _cassettes.ApiCassette(cassette_file,
+                                          _cassettes.RECORD_MODE if record_api else _cassettes.REPLAY_MODE,
+                                          realtime=bool(replay_timing))
+        cassette.start()
+
+    # profile the calls to the Galaxy API (replayed calls included)
+    profiler = _profiling.ApiProfiler() if profile_api or profile_api_file else None
+    if profiler:
+        profiler.start()
+
     # run the configured test suite
-    result = suite.run(galaxy_url=galaxy_url, galaxy_api_key=galaxy_api_key, verbosity=2,
-                       enable_xunit=enable_xunit or (xunit_file != None), xunit_file=xunit_file,
-                       enable_logger=enable_logger, enable_debug=enable_debug, disable_cleanup=disable_cleanup)
+    try:
+        result = suite.run(galaxy_url=galaxy_url, galaxy_api_key=galaxy_api_key, verbosity=2,
+                           enable_xunit=enable_xunit or (xunit_file != None), xunit_file=xunit_file,
+                           jobs=jobs, engine=engine, upload_jobs=upload_jobs, download_jobs=download_jobs,
+                           stream_outputs=stream_outputs,
+                           enable_input_cache=enable_input_cache, enable_comparison_cache=enable_comparison_cache,
+                           reuse_workflows=reuse_workflows,
+                           tool_index_ttl=tool_index_ttl,
+                           comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                           wait_timeout=wait_timeout, trace_file=trace_file,
+                           enable_logger=enable_logger, enable_debug=enable_debug, disable_cleanup=disable_cleanup)
+    finally:
+        if profiler:
+            profiler.stop()
+            profiler.print_summary()
+            profile_api_file = profile_api_file or _profiling.DEFAULT_API_PROFILE_FILENAME
+            if not _os.path.isabs(profile_api_file) and not profile_api_file.startswith("./"):
+                profile_api_file = _os.path.join(suite.output_folder, profile_api_file)
+            profiler.save(profile_api_file)
+        if cassette:
+            cassette.stop()
     # compute exit code
     exit_code = len([r for r in result.test_case_results if r.failed()])
     _logger.debug("wft4galaxy.run_tests exiting with code: %s", exit_code)
@@ -163,7 +326,25 @@ def main():
                          disable_cleanup=options.disable_cleanup,
                          enable_xunit=(options.output_format == OutputFormat.xunit),
                          xunit_file=options.xunit_file,
-                         tests=options.test)
+                         tests=options.test,
+                         jobs=options.jobs,
+                         engine=options.engine,
+                         upload_jobs=options.upload_jobs,
+                         download_jobs=options.download_jobs,
+                         stream_outputs=options.stream_outputs,
+                         enable_input_cache=options.enable_input_cache,
+                         enable_comparison_cache=options.enable_comparison_cache,
+                         reuse_workflows=options.reuse_workflows,
+                         tool_index_ttl=options.tool_index_ttl,
+                         comparator_jobs=options.comparator_jobs,
+                         comparator_timeout=options.comparator_timeout,
+                         wait_timeout=options.wait_timeout,
+                         trace_file=options.trace_file,
+                         profile_api=options.profile_api,
+                         profile_api_file=options.profile_api_file,
+                         record_api=options.record_api,
+                         replay_api=options.replay_api,
+                         replay_timing=options.replay_timing)
 
         # report exit code to the system
         _sys.exit(code)
@@ -0,0 +1,690 @@
+from __future__ import print_function
+from future.utils import iteritems as _iteritems
+
+import os as _os
+import sys as _sys
+import json as _json
+import time as _time
+import hashlib as _hashlib
+import inspect as _inspect
+import marshal as _marshal
+import threading as _threading
+import functools as _functools
+
+# wft4galaxy dependencies
+from wft4galaxy import common as _common
+
+# package level logger
+_logger = _common.LoggerManager.get_logger(__name__)
+
+# default folder of the local cache indexes
+DEFAULT_CACHE_FOLDER = _os.path.join(_os.path.expanduser("~"), ".wft4galaxy", "cache")
+
+# default settings of the input dataset cache
+DEFAULT_INPUT_CACHE_HISTORY_NAME = "wft4galaxy-input-cache"
+DEFAULT_INPUT_CACHE_MAX_ENTRIES = 256
+DEFAULT_INPUT_CACHE_MAX_SIZE = 10 * 1024 ** 3
+
+# states of the cached datasets which can't be reused
+INVALID_INPUT_CACHE_STATES = ("error", "failed_metadata", "discarded", "paused")
+
+# default time to live (in seconds) of the persisted tool index
+DEFAULT_TOOL_INDEX_TTL = 3600
+
+# algorithm used to compute the digests of output files
+DIGEST_ALGORITHM = "sha1"
+
+# default settings of the comparison cache
+DEFAULT_COMPARISON_CACHE_MAX_ENTRIES = 4096
+DEFAULT_COMPARISON_CACHE_MAX_SIZE = 256 * 1024 ** 2
+
+# maximum size (in bytes) of the diff summary stored along with a comparison verdict
+COMPARISON_SUMMARY_MAX_SIZE = 64 * 1024
+
+
+def get_galaxy_cache_key(galaxy_instance):
+    """
+    Return a key which identifies a Galaxy server within local cache indexes.
+
+    :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+    :param galaxy_instance: a Galaxy instance
+
+    :rtype: str
+    :return: a short digest of the Galaxy server URL
+    """
+    url = getattr(getattr(galaxy_instance, "gi", None), "base_url", None) or "galaxy"
+    return _hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+
+class JsonIndex(object):
+    """
+    A thread-safe dictionary persisted as a JSON file.
+    """
+
+    def __init__(self, filename):
+        """
+        :type filename: str
+        :param filename: the path of the JSON file (``None`` to keep the index in memory only)
+        """
+        self.filename = filename
+        self.lock = _threading.RLock()
+        self.entries = {}
+        if filename and _os.path.exists(filename):
+            try:
+                with open(filename) as f:
+                    self.entries = _json.load(f)
+            except ValueError as e:
+                _logger.warning("Ignoring the corrupted cache index '%s': %s", filename, e)
+
+    def save(self):
+        """
+        Write the index to its file.
+        """
+        if not self.filename:
+            return
+        with self.lock:
+            folder = _os.path.dirname(self.filename)
+            if folder and not _os.path.exists(folder):
+                _common.makedirs(folder)
+            tmp_filename = "{0}.{1}.tmp".format(self.filename, _os.getpid())
+            with open(tmp_filename, "w") as f:
+                _json.dump(self.entries, f, indent=2, sort_keys=True)
+            if _os.path.exists(self.filename):
+                _os.remove(self.filename)
+            _os.rename(tmp_filename, self.filename)
+
+
+class ToolIndex(object):
+    """
+    Index of the (tool_id, tool_version) pairs installed on a Galaxy server.
+
+    The tool list is downloaded once and shared by all the workflow tests of a suite,
+    so that checking whether a tool is available is a constant-time lookup.
+    When a ``ttl`` is given, the index is also persisted on disk and reused
+    by later runs until it expires.
+    """
+
+    def __init__(self, galaxy_instance, ttl=None, index_filename=None):
+        """
+        :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+        :param galaxy_instance: the Galaxy instance whose tools are indexed
+
+        :type ttl: int
+        :param ttl: time to live (in seconds) of the persisted index (``None`` disables persistence)
+
+        :type index_filename: str
+        :param index_filename: the path of the local index (default is a file of :data:`DEFAULT_CACHE_FOLDER`)
+        """
+        self._galaxy_instance = galaxy_instance
+        self._ttl = ttl
+        self._tools = None
+        self._fetched = False
+        self._lock = _threading.RLock()
+        self._index = JsonIndex(index_filename or _os.path.join(
+            DEFAULT_CACHE_FOLDER, "tools-{0}.json".format(get_galaxy_cache_key(galaxy_instance)))) if ttl else None
+
+    def __len__(self):
+        return len(self._get_tools())
+
+    def __contains__(self, tool):
+        return tuple(tool) in self._get_tools()
+
+    def refresh(self):
+        """
+        Download the list of tools from the Galaxy server and rebuild the index.
+        """
+        with self._lock:
+            tools = self._galaxy_instance.tools.list()
+            self._tools = frozenset([(t.id, t.version) for t in tools])
+            self._fetched = True
+            _logger.debug("Indexed %d tools", len(self._tools))
+            if self._index:
+                with self._index.lock:
+                    self._index.entries["timestamp"] = _time.time()
+                    self._index.entries["tools"] = sorted([list(t) for t in self._tools])
+                    self._index.save()
+
+    def _get_tools(self):
+        with self._lock:
+            if self._tools is None:
+                if self._index and self._index.entries.get("tools") is not None \
+                        and _time.time() - self._index.entries.get("timestamp", 0) < self._ttl:
+                    self._tools = frozenset([tuple(t) for t in self._index.entries["tools"]])
+                    _logger.debug("Loaded %d tools from the tool index '%s'", len(self._tools), self._index.filename)
+                else:
+                    self.refresh()
+            return self._tools
+
+    def find_missing_tools(self, tools):
+        """
+        Filter the tools which are not installed on the Galaxy server.
+        If the index has been loaded from disk and some tools are missing,
+        the index is refreshed before reporting them.
+
+        :type tools: list
+        :param tools: list of (tool_id, tool_version) pairs
+
+        :rtype: list
+        :return: the list of missing (tool_id, tool_version) pairs
+        """
+        missing_tools = [t for t in tools if t not in self]
+        with self._lock:
+            if missing_tools and not self._fetched:
+                self.refresh()
+                missing_tools = [t for t in tools if t not in self]
+        return missing_tools
+
+
+class DigestManifest(object):
+    """
+    Manifest of the digests of the files of a folder (e.g., the expected outputs of a test suite).
+
+    The manifest of a folder is stored in :data:`DEFAULT_CACHE_FOLDER`, indexed by the absolute path of the folder,
+    and the digest of a file is recomputed only when its size or modification time change.
+    """
+
+    _instances = {}
+    _instances_lock = _threading.Lock()
+
+    @classmethod
+    def get_instance(cls, folder):
+        """
+        Return the (shared) manifest of a folder.
+
+        :type folder: str
+        :param folder: the folder of a test suite definition
+
+        :rtype: :class:`DigestManifest`
+        """
+        folder = _os.path.abspath(folder)
+        with cls._instances_lock:
+            if folder not in cls._instances:
+                cls._instances[folder] = DigestManifest(folder)
+            return cls._instances[folder]
+
+    def __init__(self, folder, index_filename=None):
+        """
+        :type folder: str
+        :param folder: the folder of a test suite definition
+
+        :type index_filename: str
+        :param index_filename: the path of the manifest (default is a file of :data:`DEFAULT_CACHE_FOLDER`)
+        """
+        self._folder = _os.path.abspath(folder)
+        self._index = JsonIndex(index_filename or _os.path.join(
+            DEFAULT_CACHE_FOLDER, "digests-{0}.json".format(
+                _hashlib.sha1(self._folder.encode("utf-8")).hexdigest()[:12])))
+
+    def get_digest(self, filename):
+        """
+        Return the digest of a file, computing it only if the file has changed since it was last computed.
+
+        :type filename: str
+        :param filename: the path of the file
+
+        :rtype: str
+        :return: the hex digest of the file content (computed by :data:`DIGEST_ALGORITHM`)
+        """
+        path = _os.path.abspath(filename)
+        key = _os.path.relpath(path, self._folder) if path.startswith(self._folder + _os.sep) else path
+        st = _os.stat(path)
+        with self._index.lock:
+            entry = self._index.entries.get(key)
+            if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime \
+                    and entry["algorithm"] == DIGEST_ALGORITHM:
+                return entry["digest"]
+        digest = _common.file_digest(path, algorithm=DIGEST_ALGORITHM)
+        with self._index.lock:
+            self._index.entries[key] = {"size": st.st_size, "mtime": st.st_mtime,
+                                        "algorithm": DIGEST_ALGORITHM, "digest": digest}
+            try:
+                self._index.save()
+            except (IOError, OSError) as e:
+                _logger.debug("Unable to save the digest manifest of '%s': %s", self._folder, e)
+        return digest
+
+
+class InputDatasetCache(object):
+    """
+    Content-addressed cache of the uploaded input datasets.
+
+    Datasets are uploaded once to a long-lived Galaxy history (the `cache history`)
+    and indexed locally by the digest of the file content and by the dataset type.
+    On a cache hit, the cached dataset is copied to the history of the workflow test
+    instead of uploading the file again. Entries are invalidated when the content of
+    the local file changes or the cached dataset is deleted or in an error state on the Galaxy server,
+    and evicted in LRU order when the number of entries or the total size of the cached files
+    exceeds the configured limits. File digests are memoized by the :class:`DigestManifest` of their folder.
+    """
+
+    def __init__(self, galaxy_instance, index_filename=None,
+                 history_name=DEFAULT_INPUT_CACHE_HISTORY_NAME,
+                 max_entries=DEFAULT_INPUT_CACHE_MAX_ENTRIES, max_size=DEFAULT_INPUT_CACHE_MAX_SIZE):
+        """
+        :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+        :param galaxy_instance: the Galaxy instance where datasets are cached
+
+        :type index_filename: str
+        :param index_filename: the path of the local index (default is a file of :data:`DEFAULT_CACHE_FOLDER`)
+
+        :type history_name: str
+        :param history_name: the name of the Galaxy history containing the cached datasets
+
+        :type max_entries: int
+        :param max_entries: maximum number of cached datasets
+
+        :type max_size: int
+        :param max_size: maximum size (in bytes) of the cached datasets
+        """
+        self._galaxy_instance = galaxy_instance
+        self._history_name = history_name
+        self._history = None
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._index = JsonIndex(index_filename or _os.path.join(
+            DEFAULT_CACHE_FOLDER, "inputs-{0}.json".format(get_galaxy_cache_key(galaxy_instance))))
+        self._index.entries.setdefault("datasets", {})
+        self._index.entries.setdefault("files", {})
+        # locks of the keys being looked up and number of copies in progress of the dataset of each key
+        self._key_locks = {}
+        self._pinned = {}
+
+    @property
+    def history(self):
+        """
+        The Galaxy history containing the cached datasets (it is created if it doesn't exist).
+
+        :rtype: :class:`bioblend.galaxy.objects.wrappers.History`
+        """
+        with self._index.lock:
+            if self._history is None:
+                histories = self._galaxy_instance.histories.list(name=self._history_name)
+                if histories:
+                    self._history = histories[0]
+                else:
+                    self._history = self._galaxy_instance.histories.create(self._history_name)
+                    _logger.info("Created the input cache history '%s' (id: %r)", self._history_name,
+                                 self._history.id)
+            return self._history
+
+    def get_dataset(self, history, filename, file_type=None):
+        """
+        Make the dataset contained in ``filename`` available in ``history``,
+        copying it from the cache history or uploading (and caching) it.
+
+        :type history: :class:`bioblend.galaxy.objects.wrappers.History`
+        :param history: the history of the workflow test
+
+        :type filename: str
+        :param filename: the path of the dataset file
+
+        :type file_type: str
+        :param file_type: the optional Galaxy type of the dataset
+
+        :rtype: :class:`bioblend.galaxy.objects.wrappers.HistoryDatasetAssociation`
+        :return: the dataset within ``history``
+        """
+        path = _os.path.abspath(filename)
+        key = "{0}:{1}".format(DigestManifest.get_instance(_os.path.dirname(path)).get_digest(path), file_type or "")
+        cache_history = self.history
+        with self._index.lock:
+            key_lock = self._key_locks.setdefault(key, _threading.Lock())
+        # the entry of a key is looked up (and its file uploaded) by one workflow test at a time,
+        # so that the tests which miss the same input concurrently upload it only once
+        with key_lock:
+            dataset_id = self._get_cached_dataset_id(path, key, cache_history)
+            if dataset_id is None:
+                _logger.debug("Input cache miss: '%s'", filename)
+                dataset = cache_history.upload_dataset(filename, file_type=file_type) if file_type \
+                    else cache_history.upload_dataset(filename)
+                dataset_id = dataset.id
+                with self._index.lock:
+                    self._index.entries["datasets"][key] = {"dataset_id": dataset_id, "history_id": cache_history.id,
+                                                            "size": _os.path.getsize(filename),
+                                                            "last_used": _time.time()}
+            else:
+                _logger.debug("Input cache hit: '%s' (dataset %s)", filename, dataset_id)
+            with self._index.lock:
+                # the entry is not evicted until its dataset has been copied
+                self._pinned[key] = self._pinned.get(key, 0) + 1
+        try:
+            copy = self._galaxy_instance.gi.histories.copy_dataset(history.id, dataset_id, source="hda")
+        finally:
+            with self._index.lock:
+                self._pinned[key] -= 1
+                if not self._pinned[key]:
+                    del self._pinned[key]
+                evicted = self._evict()
+                self._index.save()
+            self._delete_datasets(evicted)
+        return history.get_dataset(copy["id"])
+
+    def _get_cached_dataset_id(self, path, key, cache_history):
+        """
+        Return the ID of the cached dataset of ``key``, if it can be reused (``None`` otherwise).
+        """
+        datasets = self._index.entries["datasets"]
+        with self._index.lock:
+            invalidated = self._invalidate(path, key)
+            entry = datasets.get(key)
+            if entry and entry["history_id"] != cache_history.id:
+                entry = None
+        self._delete_datasets(invalidated)
+        if not entry:
+            return None
+        try:
+            self._check_dataset(entry["dataset_id"])
+        except Exception as e:
+            _logger.debug("Input cache entry of '%s' not available: %s", path, e)
+            with self._index.lock:
+                invalidated = [self._pop_entry(key)]
+                self._index.save()
+            self._delete_datasets(invalidated)
+            return None
+        with self._index.lock:
+            entry["last_used"] = _time.time()
+        return entry["dataset_id"]
+
+    def _check_dataset(self, dataset_id):
+        """
+        Raise a ``RuntimeError`` if the cached dataset can't be reused.
+        """
+        dataset = self._galaxy_instance.gi.datasets.show_dataset(dataset_id)
+        if dataset.get("deleted") or dataset.get("purged"):
+            raise RuntimeError("the dataset {0} has been deleted".format(dataset_id))
+        if dataset.get("state") in INVALID_INPUT_CACHE_STATES:
+            raise RuntimeError("the dataset {0} is in state '{1}'".format(dataset_id, dataset.get("state")))
+
+    def _invalidate(self, path, key):
+        """
+        Drop the entry previously associated to ``path`` if the file content has changed.
+
+        :rtype: list
+        :return: the dropped entries, whose datasets have to be deleted
+        """
+        files = self._index.entries["files"]
+        old_key = files.get(path)
+        files[path] = key
+        if old_key and old_key != key and old_key not in files.values() and old_key not in self._pinned:
+            _logger.debug("Input cache: '%s' changed, invalidating its entry", path)
+            return [self._pop_entry(old_key)]
+        return []
+
+    def _evict(self):
+        """
+        Evict the least recently used entries exceeding the cache limits,
+        except the entries whose datasets are being copied.
+
+        :rtype: list
+        :return: the evicted entries, whose datasets have to be deleted
+        """
+        datasets = self._index.entries["datasets"]
+        total_size = sum([e["size"] for e in datasets.values()])
+        lru = sorted([(k, e) for k, e in _iteritems(datasets) if k not in self._pinned],
+                     key=lambda e: e[1]["last_used"])
+        evicted = []
+        while lru and (len(datasets) > self._max_entries or total_size > self._max_size):
+            key, entry = lru.pop(0)
+            total_size -= entry["size"]
+            _logger.debug("Input cache: evicting dataset %s", entry["dataset_id"])
+            evicted.append(self._pop_entry(key))
+        files = self._index.entries["files"]
+        for path in [p for p, k in _iteritems(files) if k not in datasets]:
+            del files[path]
+        return evicted
+
+    def _pop_entry(self, key):
+        return self._index.entries["datasets"].pop(key, None)
+
+    def _delete_datasets(self, entries):
+        """
+        Delete the datasets of the given cache entries from the Galaxy server
+        (not holding the lock of the index, as it takes a request per dataset).
+        """
+        for entry in entries:
+            if not entry:
+                continue
+            try:
+                self._galaxy_instance.gi.histories.delete_dataset(entry["history_id"], entry["dataset_id"])
+            except Exception as e:
+                _logger.debug("Unable to delete the cached dataset %s: %s", entry["dataset_id"], e)
+
+
+# version of the installed wft4galaxy ('' if unknown)
+_wft4galaxy_version = None
+
+# digests of the source files of the comparator modules: <FILENAME> -> (<SIZE>, <MTIME>, <DIGEST>)
+_code_digests = {}
+_code_digests_lock = _threading.Lock()
+
+
+def get_comparator_version(comparator):
+    """
+    Return the version of a comparator function, i.e., the version of wft4galaxy,
+    the ``__version__`` (if any) of the top-level package of the comparator module
+    and the digest of the code of the comparator, so that any change of the comparator
+    (even within a source checkout, where the wft4galaxy version is not available) changes its version.
+
+    :type comparator: function
+    :param comparator: the comparator function (or a :class:`functools.partial` of it)
+
+    :rtype: list
+    :return: the list [<WFT4GALAXY_VERSION>, <COMPARATOR_MODULE>, <COMPARATOR_MODULE_VERSION>, <COMPARATOR_DIGEST>]
+    """
+    global _wft4galaxy_version
+    if _wft4galaxy_version is None:
+        try:
+            import pkg_resources
+            _wft4galaxy_version = pkg_resources.get_distribution("wft4galaxy").version
+        except Exception:
+            _wft4galaxy_version = ""
+    while isinstance(comparator, _functools.partial):
+        comparator = comparator.func
+    module_name = getattr(comparator, "__module__", None)
+    package = _sys.modules.get(module_name.split(".")[0]) if module_name else None
+    return [_wft4galaxy_version, module_name, getattr(package, "__version__", None), _get_code_digest(comparator)]
+
+
+def _get_code_digest(comparator):
+    """
+    Return the digest of the source file of the module of a comparator
+    (recomputed only when its size or modification time change)
+    or, if the source is not available, the digest of the comparator bytecode.
+
+    :rtype: str
+    """
+    try:
+        filename = _inspect.getsourcefile(_inspect.getmodule(comparator))
+        st = _os.stat(filename)
+    except (TypeError, OSError):
+        code = getattr(comparator, "__code__", None)
+        return _hashlib.new(DIGEST_ALGORITHM, _marshal.dumps(code)).hexdigest() if code else None
+    with _code_digests_lock:
+        entry = _code_digests.get(filename)
+        if entry is None or entry[:2] != (st.st_size, st.st_mtime):
+            entry = _code_digests[filename] = (st.st_size, st.st_mtime,
+                                               _common.file_digest(filename, algorithm=DIGEST_ALGORITHM))
+        return entry[2]
+
+
+class ComparisonCache(object):
+    """
+    Persistent cache of the verdicts of the comparators.
+
+    A verdict is indexed by the digests of the actual and expected outputs and by the comparator
+    (name, options and version, see :func:`get_comparator_version`) which produced it, so that
+    byte-identical outputs of later runs are not compared again. The diff summary written by the comparator
+    (i.e., the file ``<ACTUAL_OUTPUT>.diff``) and the messages it printed (e.g., the summary of the mismatches),
+    if any, are stored along with the verdict and restored on a cache hit.
+    Entries are evicted in LRU order when the number of entries or the total size
+    of the stored summaries exceeds the configured limits.
+
+    The cache can be cleared by removing its folder (by default, ``~/.wft4galaxy/cache/comparisons``).
+    """
+
+    def __init__(self, folder=None,
+                 max_entries=DEFAULT_COMPARISON_CACHE_MAX_ENTRIES, max_size=DEFAULT_COMPARISON_CACHE_MAX_SIZE):
+        """
+        :type folder: str
+        :param folder: the folder of the cache (default is a subfolder of :data:`DEFAULT_CACHE_FOLDER`)
+
+        :type max_entries: int
+        :param max_entries: maximum number of cached verdicts
+
+        :type max_size: int
+        :param max_size: maximum size (in bytes) of the cached diff summaries
+        """
+        self._folder = folder or _os.path.join(DEFAULT_CACHE_FOLDER, "comparisons")
+        self._max_entries = max_entries
+        self._max_size = max_size
+        self._index = JsonIndex(_os.path.join(self._folder, "index.json"))
+        self._index.entries.setdefault("verdicts", {})
+
+    @staticmethod
+    def get_key(actual_digest, expected_digest, comparator=None, options=None, version=None):
+        """
+        Return the key of a comparison.
+
+        :type actual_digest: str
+        :param actual_digest: the digest of the actual output
+
+        :type expected_digest: str
+        :param expected_digest: the digest of the expected output
+
+        :type comparator: str or dict
+        :param comparator: the configured comparator (see :func:`wft4galaxy.comparators.get_comparator`)
+
+        :type options: dict
+        :param options: the configured options of the comparator
+
+        :type version: list
+        :param version: the version of the comparator (see :func:`get_comparator_version`)
+
+        :rtype: str
+        """
+        return _hashlib.sha1(_json.dumps([actual_digest, expected_digest, comparator, options or {}, version],
+                                         sort_keys=True, default=repr).encode("utf-8")).hexdigest()
+
+    def get(self, key, diff_filename=None, replay_messages=False):
+        """
+        Return the cached verdict of a comparison, restoring its diff summary (if any) to ``diff_filename``
+        and, if required, replaying the messages printed by the comparator on ``sys.stdout`` and ``sys.stderr``.
+
+        :type key: str
+        :param key: the key of the comparison (see :meth:`get_key`)
+
+        :type diff_filename: str
+        :param diff_filename: the optional path where the diff summary has to be restored
+
+        :type replay_messages: bool
+        :param replay_messages: ``True`` to replay the messages printed by the comparator
+
+        :rtype: bool
+        :return: the cached verdict (``None`` on a cache miss)
+        """
+        with self._index.lock:
+            entry = self._index.entries["verdicts"].get(key)
+            if entry is None:
+                return None
+            messages = None
+            try:
+                if entry["summary_size"] and diff_filename:
+                    with open(self._get_summary_filename(key), "rb") as summary, open(diff_filename, "wb") as out:
+                        out.write(summary.read())
+                if entry.get("messages_size") and replay_messages:
+                    with open(self._get_messages_filename(key), "rb") as f:
+                        messages = _json.loads(f.read().decode("utf-8"))
+            except (IOError, OSError) as e:
+                _logger.debug("Comparison cache: summary of %s not available: %s", key, e)
+                self._delete_entry(key)
+                return None
+            entry["last_used"] = _time.time()
+            self._save()
+        for stream_name, text in messages or []:
+            getattr(_sys, stream_name).write(text)
+        return entry["verdict"]
+
+    def put(self, key, verdict, diff_filename=None, messages=None):
+        """
+        Store the verdict of a comparison, its diff summary and the messages printed by the comparator.
+
+        :type key: str
+        :param key: the key of the comparison (see :meth:`get_key`)
+
+        :type verdict: bool
+        :param verdict: the result of the comparator
+
+        :type diff_filename: str
+        :param diff_filename: the optional path of the diff summary written by the comparator
+            (only its first :data:`COMPARISON_SUMMARY_MAX_SIZE` bytes are stored)
+
+        :type messages: list
+        :param messages: the optional list of tuples (<STREAM_NAME>, <TEXT>) printed by the comparator
+            on the standard output (``stdout``) and error (``stderr``);
+            only their first :data:`COMPARISON_SUMMARY_MAX_SIZE` characters are stored
+        """
+        summary = None
+        if diff_filename and _os.path.exists(diff_filename):
+            with open(diff_filename, "rb") as f:
+                summary = f.read(COMPARISON_SUMMARY_MAX_SIZE)
+        stored_messages, size = [], 0
+        for stream_name, text in messages or []:
+            if size >= COMPARISON_SUMMARY_MAX_SIZE:
+                break
+            stored_messages.append((stream_name, text[:COMPARISON_SUMMARY_MAX_SIZE - size]))
+            size += len(text)
+        messages = _json.dumps(stored_messages).encode("utf-8") if stored_messages else None
+        with self._index.lock:
+            if (summary or messages) and not _os.path.exists(self._folder):
+                _common.makedirs(self._folder)
+            for filename, content in ((self._get_summary_filename(key), summary),
+                                      (self._get_messages_filename(key), messages)):
+                if content:
+                    with open(filename, "wb") as f:
+                        f.write(content)
+            self._index.entries["verdicts"][key] = {"verdict": bool(verdict), "summary_size": len(summary or b""),
+                                                    "messages_size": len(messages or b""),
+                                                    "last_used": _time.time()}
+            self._evict()
+            self._save()
+
+    def _get_summary_filename(self, key):
+        return _os.path.join(self._folder, "{0}.diff".format(key))
+
+    def _get_messages_filename(self, key):
+        return _os.path.join(self._folder, "{0}.messages".format(key))
+
+    @staticmethod
+    def _get_entry_size(entry):
+        return entry["summary_size"] + entry.get("messages_size", 0)
+
+    def _evict(self):
+        """
+        Evict the least recently used entries exceeding the cache limits.
+        """
+        verdicts = self._index.entries["verdicts"]
+        lru = sorted(_iteritems(verdicts), key=lambda e: e[1]["last_used"])
+        total_size = sum([self._get_entry_size(e) for _, e in lru])
+        while lru and (len(lru) > self._max_entries or total_size > self._max_size):
+            key, entry = lru.pop(0)
+            total_size -= self._get_entry_size(entry)
+            _logger.debug("Comparison cache: evicting %s", key)
+            self._delete_entry(key)
+
+    def _delete_entry(self, key):
+        entry = self._index.entries["verdicts"].pop(key, None)
+        if entry is None:
+            return
+        for filename, size in ((self._get_summary_filename(key), entry["summary_size"]),
+                               (self._get_messages_filename(key), entry.get("messages_size"))):
+            if size:
+                try:
+                    _os.remove(filename)
+                except OSError as e:
+                    _logger.debug("Unable to delete the summary of %s: %s", key, e)
+
+    def _save(self):
+        try:
+            self._index.save()
+        except (IOError, OSError) as e:
+            _logger.debug("Unable to save the comparison cache index '%s': %s", self._index.filename, e)
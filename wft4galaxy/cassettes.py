@@ -0,0 +1,369 @@
+from __future__ import print_function
+from future.moves.urllib.parse import urlparse as _urlparse, parse_qsl as _parse_qsl
+
+import os as _os
+import json as _json
+import time as _time
+import base64 as _base64
+import hashlib as _hashlib
+import tempfile as _tempfile
+import threading as _threading
+from datetime import timedelta as _timedelta
+from collections import deque as _deque
+
+# requests is a dependency of bioblend
+import requests as _requests
+from requests.structures import CaseInsensitiveDict as _CaseInsensitiveDict
+
+# wft4galaxy dependencies
+from wft4galaxy import common as _common
+
+# package level logger
+_logger = _common.LoggerManager.get_logger(__name__)
+
+# modes of a cassette
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+
+# version of the cassette file format
+CASSETTE_FORMAT_VERSION = 1
+
+# response bodies larger than this size (in bytes) are stored, content-addressed,
+# in the body folder of the cassette (see :meth:`ApiCassette.get_body_folder`)
+DEFAULT_BODY_SIZE_THRESHOLD = 16 * 1024
+
+# query parameters which are never recorded
+_IGNORED_QUERY_PARAMS = ("key",)
+
+# response headers which are recorded
+_RECORDED_HEADERS = ("Content-Type", "Content-Disposition")
+
+# the active cassette and the original `requests.Session.send` method
+_active_cassette = None
+_original_send = None
+_install_lock = _threading.Lock()
+
+
+def get_active_cassette():
+    """
+    :rtype: :class:`ApiCassette`
+    :return: the cassette which is currently recording or replaying Galaxy API calls
+        (``None`` if recording and replay are disabled)
+    """
+    return _active_cassette
+
+
+class CassetteError(_requests.ConnectionError):
+    """ Raised when a request to the Galaxy API has no recorded response to replay """
+
+
+class ApiCassette(object):
+    """
+    Recorder (and player) of the HTTP interactions with the Galaxy API.
+
+    In ``record`` mode, the requests addressed to the Galaxy servers of the instances
+    created by :func:`wft4galaxy.common.get_galaxy_instance` are forwarded to the server
+    and their responses are written to the cassette file when the cassette is stopped.
+    Response bodies larger than ``body_size_threshold`` (e.g., dataset contents) are stored
+    by their SHA-256 digest in the body folder of the cassette, so that identical bodies are stored once.
+
+    In ``replay`` mode, the same requests are answered offline with the recorded responses,
+    served as fast as possible or, if ``realtime`` is ``True``, with their original latency.
+    Requests are matched by method, path and query (or, failing that, by method and path only,
+    since queries may contain the random names of the test histories); the responses recorded
+    for the same request are served in their original order, repeating the last one when exhausted
+    (e.g., when polling the state of a dataset).  Replay is deterministic for runs without concurrent tests.
+
+    .. code-block:: Python
+
+        with ApiCassette("suite.cassette.json", RECORD_MODE):
+            suite.run()
+        ...
+        with ApiCassette("suite.cassette.json", REPLAY_MODE):
+            suite.run()
+    """
+
+    def __init__(self, filename, mode=RECORD_MODE, realtime=False,
+                 body_size_threshold=DEFAULT_BODY_SIZE_THRESHOLD):
+        """
+        :type filename: str
+        :param filename: the path of the cassette file
+
+        :type mode: str
+        :param mode: ``record`` or ``replay``
+
+        :type realtime: bool
+        :param realtime: ``True`` to replay the responses with their original latency
+
+        :type body_size_threshold: int
+        :param body_size_threshold: minimum size (in bytes) of the response bodies stored in the body folder
+        """
+        if mode not in (RECORD_MODE, REPLAY_MODE):
+            raise ValueError("Invalid cassette mode: {0}".format(mode))
+        self.filename = filename
+        self.mode = mode
+        self.realtime = realtime
+        self.body_size_threshold = body_size_threshold
+        self._lock = _threading.Lock()
+        self._servers = {}
+        self._interactions = []
+        self._responses = {}
+        self._started = None
+        if mode == REPLAY_MODE:
+            self._load()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def get_body_folder(self):
+        """
+        :rtype: str
+        :return: the folder of the response bodies stored by their digest
+        """
+        return self.filename + ".bodies"
+
+    def start(self):
+        """
+        Start recording (or replaying) the Galaxy API calls.
+        """
+        global _active_cassette, _original_send
+        with _install_lock:
+            if _active_cassette is not None and _active_cassette is not self:
+                raise RuntimeError("Another API cassette is already active")
+            if _original_send is None:
+                _original_send = _requests.Session.send
+                _requests.Session.send = _cassette_send
+            _active_cassette = self
+        self._started = _time.time()
+        _logger.debug("API cassette started (mode: %s)", self.mode)
+
+    def stop(self):
+        """
+        Stop recording (or replaying) the Galaxy API calls; recorded calls are saved to the cassette file.
+        """
+        global _active_cassette, _original_send
+        with _install_lock:
+            if _active_cassette is self:
+                _active_cassette = None
+                _requests.Session.send = _original_send
+                _original_send = None
+        if self.mode == RECORD_MODE and self._started is not None:
+            self.save()
+        self._started = None
+        _logger.debug("API cassette stopped")
+
+    def watch(self, galaxy_instance):
+        """
+        Record (or replay) the calls to the Galaxy server of the given instance.
+
+        :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+        :param galaxy_instance: a Galaxy instance
+        """
+        url = _urlparse(galaxy_instance.gi.base_url)
+        with self._lock:
+            self._servers[(url.scheme, url.netloc)] = url.path.rstrip("/")
+
+    def is_watched(self, url):
+        """
+        :rtype: bool
+        :return: ``True`` if ``url`` belongs to a watched Galaxy server
+        """
+        url = _urlparse(url)
+        return (url.scheme, url.netloc) in self._servers
+
+    def get_interactions(self):
+        """
+        :rtype: list
+        :return: the recorded (or loaded) interactions
+        """
+        with self._lock:
+            return list(self._interactions)
+
+    def _get_request_key(self, method, url):
+        url = _urlparse(url)
+        path = url.path
+        base_path = self._servers.get((url.scheme, url.netloc), "")
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        query = sorted([k, v] for k, v in _parse_qsl(url.query, keep_blank_values=True)
+                       if k not in _IGNORED_QUERY_PARAMS)
+        return method.upper(), path, query
+
+    def record(self, request, response, latency):
+        """
+        Record the interaction of ``request`` and ``response``;
+        the body of streamed responses is recorded as it is consumed.
+        """
+        method, path, query = self._get_request_key(request.method, request.url)
+        interaction = {
+            "method": method, "path": path, "query": query,
+            "offset": _time.time() - latency - self._started, "latency": latency,
+            "status": response.status_code, "reason": response.reason,
+            "headers": {h: response.headers[h] for h in _RECORDED_HEADERS if h in response.headers}
+        }
+        with self._lock:
+            self._interactions.append(interaction)
+        if response._content_consumed:
+            self._set_body(interaction, response.content)
+        else:
+            iter_content = response.iter_content
+
+            def recording_iter_content(*args, **kwargs):
+                writer = _BodyWriter(self)
+                try:
+                    for chunk in iter_content(*args, **kwargs):
+                        writer.write(chunk)
+                        yield chunk
+                    writer.close(interaction)
+                finally:
+                    if not writer.closed:
+                        interaction["truncated"] = True
+                        writer.close(interaction)
+
+            response.iter_content = recording_iter_content
+
+    def _set_body(self, interaction, body):
+        interaction["body_size"] = len(body)
+        if len(body) > self.body_size_threshold:
+            interaction["body_digest"] = self._store_body(body)
+        else:
+            try:
+                interaction["body"] = body.decode("utf-8")
+            except UnicodeDecodeError:
+                interaction["body_base64"] = _base64.b64encode(body).decode("ascii")
+
+    def _store_body(self, body):
+        digest = _hashlib.sha256(body).hexdigest()
+        filename = _os.path.join(self.get_body_folder(), digest)
+        if not _os.path.exists(filename):
+            fd, tmp_filename = _tempfile.mkstemp(dir=self._make_body_folder())
+            with _os.fdopen(fd, "wb") as f:
+                f.write(body)
+            _os.rename(tmp_filename, filename)
+        return digest
+
+    def _make_body_folder(self):
+        folder = self.get_body_folder()
+        with self._lock:
+            if not _os.path.isdir(folder):
+                _os.makedirs(folder)
+        return folder
+
+    def save(self):
+        """
+        Write the recorded interactions to the cassette file.
+        """
+        folder = _os.path.dirname(self.filename)
+        if folder and not _os.path.isdir(folder):
+            _os.makedirs(folder)
+        with open(self.filename, "w") as f:
+            _json.dump({"version": CASSETTE_FORMAT_VERSION, "interactions": self.get_interactions()}, f, indent=1)
+        _logger.info("Galaxy API cassette available @ %s", self.filename)
+
+    def _load(self):
+        with open(self.filename) as f:
+            cassette = _json.load(f)
+        if cassette.get("version") != CASSETTE_FORMAT_VERSION:
+            raise ValueError("Unsupported cassette version: {0}".format(cassette.get("version")))
+        self._interactions = cassette["interactions"]
+        for interaction in self._interactions:
+            method, path, query = interaction["method"], interaction["path"], interaction["query"]
+            for key in ((method, path, _json.dumps(query)), (method, path)):
+                self._responses.setdefault(key, _deque()).append(interaction)
+
+    def replay(self, request, stream=False):
+        """
+        :rtype: :class:`requests.Response`
+        :return: the recorded response to ``request``
+        """
+        method, path, query = self._get_request_key(request.method, request.url)
+        with self._lock:
+            responses = self._responses.get((method, path, _json.dumps(query))) \
+                        or self._responses.get((method, path))
+            if not responses:
+                raise CassetteError("No recorded response to {0} {1}".format(method, request.url),
+                                    request=request)
+            # serve the recorded responses in order, repeating the last one
+            interaction = responses.popleft() if len(responses) > 1 else responses[0]
+        if self.realtime:
+            _time.sleep(interaction["latency"])
+        response = _requests.Response()
+        response.status_code = interaction["status"]
+        response.reason = interaction["reason"]
+        response.headers = _CaseInsensitiveDict(interaction["headers"])
+        response.url = request.url
+        response.request = request
+        response.elapsed = _timedelta(seconds=interaction["latency"])
+        if "body_digest" in interaction:
+            body_filename = _os.path.join(self.get_body_folder(), interaction["body_digest"])
+            if stream:
+                # stream stored bodies from their file
+                response.raw = open(body_filename, "rb")
+            else:
+                with open(body_filename, "rb") as f:
+                    response._content = f.read()
+                response._content_consumed = True
+        else:
+            response._content = _base64.b64decode(interaction["body_base64"]) if "body_base64" in interaction \
+                else interaction.get("body", "").encode("utf-8")
+            response._content_consumed = True
+        return response
+
+
+class _BodyWriter(object):
+    """ Store the body of a streamed response while it is consumed """
+
+    def __init__(self, cassette):
+        self._cassette = cassette
+        self._chunks = []
+        self._size = 0
+        self._digest = _hashlib.sha256()
+        self._file = None
+        self._filename = None
+        self.closed = False
+
+    def write(self, chunk):
+        self._size += len(chunk)
+        self._digest.update(chunk)
+        if self._file is None:
+            self._chunks.append(chunk)
+            if self._size > self._cassette.body_size_threshold:
+                # spill large bodies to a temporary file of the body folder
+                fd, self._filename = _tempfile.mkstemp(dir=self._cassette._make_body_folder())
+                self._file = _os.fdopen(fd, "wb")
+                self._file.write(b"".join(self._chunks))
+                self._chunks = None
+        else:
+            self._file.write(chunk)
+
+    def close(self, interaction):
+        self.closed = True
+        if self._file is None:
+            self._cassette._set_body(interaction, b"".join(self._chunks))
+            return
+        self._file.close()
+        digest = self._digest.hexdigest()
+        filename = _os.path.join(self._cassette.get_body_folder(), digest)
+        if _os.path.exists(filename):
+            _os.remove(self._filename)
+        else:
+            _os.rename(self._filename, filename)
+        interaction["body_size"] = self._size
+        interaction["body_digest"] = digest
+
+
+def _cassette_send(session, request, **kwargs):
+    cassette = _active_cassette
+    send = _original_send
+    if cassette is None or not cassette.is_watched(request.url):
+        return send(session, request, **kwargs)
+    if cassette.mode == REPLAY_MODE:
+        return cassette.replay(request, stream=kwargs.get("stream", False))
+    start = _time.time()
+    response = send(session, request, **kwargs)
+    cassette.record(request, response, _time.time() - start)
+    return response
@@ -5,7 +5,9 @@ from past.builtins import basestring as _basestring
 import os as _os
 import json as _json
 import types as _types
+import hashlib as _hashlib
 import logging as _logging
+import threading as _threading
 import datetime as _datetime
 
 # bioblend dependencies
@@ -50,7 +52,39 @@ class Configuration(DynamicObject):
     pass
 
 
+class _LogContextFilter(_logging.Filter):
+    """ Accept only the records logged within the given log context (see :meth:`LoggerManager.log_context`) """
+
+    def __init__(self, context):
+        super(_LogContextFilter, self).__init__()
+        self.context = context
+
+    def filter(self, record):
+        return LoggerManager.get_log_context() == self.context
+
+
 class LoggerManager(object):
+    # the log context of the current thread
+    _context = _threading.local()
+
+    @staticmethod
+    def get_log_context():
+        return getattr(LoggerManager._context, "name", None)
+
+    @staticmethod
+    def set_log_context(name):
+        """
+        Set the log context of the current thread, i.e., the name which identifies
+        the messages logged to file handlers enabled with the same ``context``
+        (see :meth:`enable_log_to_file`).
+
+        :rtype: str
+        :return: the previous log context of the current thread
+        """
+        previous = LoggerManager.get_log_context()
+        LoggerManager._context.name = name
+        return previous
+
     @staticmethod
     def get_string_format(show_logger_name=False):
         return "%(asctime)s [{0}] [%(levelname)+5.5s]  %(message)s".format(
@@ -93,7 +127,20 @@ class LoggerManager(object):
         return _logging.getLogger(name_or_class)
 
     @staticmethod
-    def enable_log_to_file(log_filename=None, output_folder=None):
+    def enable_log_to_file(log_filename=None, output_folder=None, level=None, context=None):
+        """
+        Add a file handler to the root logger.
+
+        :type level: int
+        :param level: the optional level of the handler
+
+        :type context: str
+        :param context: if not ``None``, only the messages logged by the threads
+            in the given log context (see :meth:`set_log_context`) are written to the file
+
+        :rtype: :class:`logging.FileHandler`
+        :return: the added handler
+        """
         logger = _logging.getLogger()
         if output_folder is None and log_filename is None:
             raise ValueError("You must provide at least one the arguments: log_filename or output_folder")
@@ -108,6 +155,10 @@ class LoggerManager(object):
         fileHandler = _logging.FileHandler(log_filename)
         log_format = LoggerManager.get_string_format(logger.getEffectiveLevel() == _logging.DEBUG)
         fileHandler.setFormatter(_logging.Formatter(log_format))
+        if level is not None:
+            fileHandler.setLevel(level)
+        if context is not None:
+            fileHandler.addFilter(_LogContextFilter(context))
         logger.addHandler(fileHandler)
         return fileHandler
 
@@ -139,6 +190,26 @@ def makedirs(path, check_if_exists=False):
             raise OSError(e.message)
 
 
+def file_digest(filename, algorithm="sha1", chunk_size=1024 * 1024):
+    """
+    Compute the digest of a file reading it in chunks.
+
+    :type filename: str
+    :param filename: the path of the file
+
+    :type algorithm: str
+    :param algorithm: the name of a hash algorithm supported by :mod:`hashlib`
+
+    :rtype: str
+    :return: the hexadecimal digest of the file content
+    """
+    h = _hashlib.new(algorithm)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def configure_env_galaxy_server_instance(config, options, base_config=None):
     config["galaxy_url"] = options.galaxy_url \
                            or base_config and base_config.get("galaxy_url") \
@@ -165,6 +236,11 @@ def get_galaxy_instance(galaxy_url=None, galaxy_api_key=None):
     :type galaxy_api_key: str
     :param galaxy_api_key: a registered Galaxy API KEY
 
+    If an API profiler is active (see :class:`wft4galaxy.profiling.ApiProfiler`),
+    the calls to the Galaxy server of the new instance are recorded.
+    Likewise, if an API cassette is active (see :class:`wft4galaxy.cassettes.ApiCassette`),
+    they are recorded to (or replayed from) the cassette.
+
     :rtype: :class:`bioblend.objects.GalaxyInstance`
     :return: a new :class:`bioblend.objects.GalaxyInstance` instance
     """
@@ -185,12 +261,31 @@ def get_galaxy_instance(galaxy_url=None, galaxy_api_key=None):
             galaxy_api_key = _os.environ[ENV_KEY_GALAXY_API_KEY]
 
     # initialize the galaxy instance
-    return ObjGalaxyInstance(galaxy_url, galaxy_api_key)
+    galaxy_instance = ObjGalaxyInstance(galaxy_url, galaxy_api_key)
+
+    # record the API calls of the instance if profiling is enabled
+    from wft4galaxy import profiling as _profiling
+    profiler = _profiling.get_active_profiler()
+    if profiler is not None:
+        profiler.watch(galaxy_instance)
+    # record (or replay) the API calls of the instance if a cassette is active
+    from wft4galaxy import cassettes as _cassettes
+    cassette = _cassettes.get_active_cassette()
+    if cassette is not None:
+        cassette.watch(galaxy_instance)
+    return galaxy_instance
 
 
 class WorkflowLoader(object):
     """
     Singleton utility class responsible for loading (unloading) workflows to (from) a Galaxy server.
+
+    Loaded workflows are registered by the digest of their normalized definition, so that
+    a workflow is imported only once and shared by all the tests which use it:
+    a reference counter keeps track of its users and the workflow is removed
+    from the Galaxy server only when the last of them unloads it.
+    When persistence is enabled (see :meth:`set_persistent`), workflows are never removed
+    and the registry is saved to a local index, so that they are also reused across runs.
     """
 
     _instance = None
@@ -225,6 +320,10 @@ class WorkflowLoader(object):
         """
         self._galaxy_instance = None
         self._workflows = {}
+        self._registry = {}
+        self._refcounts = {}
+        self._persistent_index = None
+        self._lock = _threading.RLock()
         # if galaxy_instance exists, complete initialization
         if galaxy_instance:
             self._initialize(galaxy_instance)
@@ -250,6 +349,44 @@ class WorkflowLoader(object):
             # initialize the galaxy instance
             self._galaxy_instance = galaxy_instance
 
+    def set_persistent(self, persistent=True, index_filename=None):
+        """
+        Enable (or disable) the reuse of loaded workflows across runs.
+
+        :type persistent: bool
+        :param persistent: ``True`` to keep loaded workflows on the Galaxy server
+            and to save the registry to a local index; ``False`` otherwise
+
+        :type index_filename: str
+        :param index_filename: the path of the local index
+            (default is a file of :data:`wft4galaxy.cache.DEFAULT_CACHE_FOLDER`)
+        """
+        with self._lock:
+            if not persistent:
+                self._persistent_index = None
+            elif self._persistent_index is None:
+                if not self._galaxy_instance:
+                    raise RuntimeError("WorkflowLoader not initialized")
+                from wft4galaxy import cache as _cache
+                self._persistent_index = _cache.JsonIndex(index_filename or _os.path.join(
+                    _cache.DEFAULT_CACHE_FOLDER,
+                    "workflows-{0}.json".format(_cache.get_galaxy_cache_key(self._galaxy_instance))))
+
+    @staticmethod
+    def get_workflow_key(wf_json, workflow_name=None, workflow_name_prefix=""):
+        """
+        Return the key which identifies a workflow definition within the registry.
+
+        :type wf_json: dict
+        :param wf_json: the workflow definition
+
+        :rtype: str
+        :return: the digest of the normalized workflow definition
+        """
+        normalized = _json.dumps(wf_json, sort_keys=True, separators=(",", ":"))
+        return _hashlib.sha1("\n".join([normalized, workflow_name_prefix or "", workflow_name or ""])
+                             .encode("utf-8")).hexdigest()
+
     def load_workflow(self, workflow_test_config,
                       workflow_name=None, workflow_name_prefix="", workflow_name_suffix=""):
         """
@@ -288,27 +425,77 @@ class WorkflowLoader(object):
         with open(workflow_filename) as f:
             wf_json = _json.load(f)
         self._logger.debug("Workflow definition loaded from file: done")
-        wf_json["name"] = "-".join([workflow_name_prefix,
-                                    (workflow_name if workflow_name else wf_json["name"]).replace(" ", ""),
-                                    workflow_name_suffix])
-        self._logger.debug("Uploading the Workflow to the Galaxy instance ...")
-        wf = self._galaxy_instance.workflows.import_new(wf_json)
-        self._logger.debug("Uploading the Workflow to the Galaxy instance: done")
-        self._workflows[wf.id] = wf
+        key = self.get_workflow_key(wf_json, workflow_name, workflow_name_prefix)
+        with self._lock:
+            wf = self._registry.get(key) or self._get_persistent_workflow(key)
+            if wf is None:
+                wf_json["name"] = "-".join([workflow_name_prefix,
+                                            (workflow_name if workflow_name else wf_json["name"]).replace(" ", ""),
+                                            workflow_name_suffix])
+                self._logger.debug("Uploading the Workflow to the Galaxy instance ...")
+                wf = self._galaxy_instance.workflows.import_new(wf_json)
+                self._logger.debug("Uploading the Workflow to the Galaxy instance: done")
+                if self._persistent_index is not None:
+                    self._persistent_index.entries[key] = wf.id
+                    self._persistent_index.save()
+            else:
+                self._logger.debug("Reusing the already loaded workflow '%s' (id: %s)", wf.name, wf.id)
+            self._registry[key] = wf
+            self._workflows[wf.id] = wf
+            self._refcounts[wf.id] = self._refcounts.get(wf.id, 0) + 1
         return wf
 
-    def unload_workflow(self, workflow_id):
+    def _get_persistent_workflow(self, key):
+        """
+        Return the workflow registered with ``key`` by a previous run, if it is still available
+        (Galaxy keeps serving deleted workflows, which are not reused).
+        """
+        if self._persistent_index is None or key not in self._persistent_index.entries:
+            return None
+        workflow_id = self._persistent_index.entries[key]
+        try:
+            wf = self._galaxy_instance.workflows.get(workflow_id)
+            if getattr(wf, "deleted", False):
+                raise RuntimeError("the workflow has been deleted")
+            return wf
+        except Exception as e:
+            self._logger.debug("Workflow %s not available anymore: %s", workflow_id, e)
+            del self._persistent_index.entries[key]
+            self._persistent_index.save()
+            return None
+
+    def unload_workflow(self, workflow_id, force=False):
         """
         Unload the workflow identified by ``workflow_id`` from the configured Galaxy server.
+        The workflow is actually removed only when no other test is using it
+        and persistence is disabled, unless ``force`` is ``True``.
 
         :type workflow_id: str
         :param workflow_id: the ID of the workflow to unload from the connected Galaxy server.
+
+        :type force: bool
+        :param force: ``True`` to remove the workflow regardless of its users
         """
         if not self._galaxy_instance:
             raise RuntimeError("WorkflowLoader not initialized")
-        self._galaxy_instance.workflows.delete(workflow_id)
-        if workflow_id in self._workflows:
-            del self._workflows[workflow_id]
+        with self._lock:
+            refcount = self._refcounts.get(workflow_id, 1) - 1
+            if refcount > 0 and not force:
+                self._refcounts[workflow_id] = refcount
+                return
+            self._refcounts.pop(workflow_id, None)
+            if self._persistent_index is not None and not force \
+                    and workflow_id in self._persistent_index.entries.values():
+                return
+            self._galaxy_instance.workflows.delete(workflow_id)
+            if workflow_id in self._workflows:
+                del self._workflows[workflow_id]
+            for key in [k for k, wf in _iteritems(self._registry) if wf.id == workflow_id]:
+                del self._registry[key]
+            if self._persistent_index is not None:
+                for key in [k for k, v in _iteritems(self._persistent_index.entries) if v == workflow_id]:
+                    del self._persistent_index.entries[key]
+                self._persistent_index.save()
 
     def unload_workflows(self):
         """
@@ -316,5 +503,5 @@ class WorkflowLoader(object):
         """
         if not self._galaxy_instance:
             raise RuntimeError("WorkflowLoader not initialized")
-        for _, wf in _iteritems(self._workflows):
-            self.unload_workflow(wf.id)
+        for _, wf in list(_iteritems(self._workflows)):
+            self.unload_workflow(wf.id, force=True)
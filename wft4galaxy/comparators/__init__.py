@@ -1,13 +1,57 @@
 from __future__ import print_function
+from future.utils import iteritems as _iteritems
 
 import os as _os
 import sys as _sys
+import json as _json
+import mmap as _mmap
+import heapq as _heapq
+import functools as _functools
+import threading as _threading
+import shutil as _shutil
 import logging as _logging
-from difflib import unified_diff as _unified_diff
+import tempfile as _tempfile
+from collections import deque as _deque
+from difflib import SequenceMatcher as _SequenceMatcher
 from wft4galaxy import common as _common
 
+try:
+    from itertools import izip_longest as _zip_longest
+except ImportError:
+    from itertools import zip_longest as _zip_longest
+from itertools import islice as _islice
+
 _logger = _common.LoggerManager.get_logger(__name__)
 
+# try to load NumPy, used to vectorize the comparison of tables
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+    _logger.debug("Package 'numpy' is not available")
+
+# size (in bytes) of the chunks read from files by streaming comparators
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# limits of the diff computed by the default comparator
+DIFF_CONTEXT_LINES = 3
+DIFF_PREVIEW_LINES = 20
+MAX_DIFF_LINES = 10000
+MAX_DIFF_BYTES = 16 * 1024 * 1024
+MAX_DIFF_HUNKS = 100
+
+# size (in bytes) of the blocks compared by the binary comparator
+BINARY_BLOCK_SIZE = 4 * 1024 * 1024
+
+# number of rows of the blocks compared by the table comparator
+TABLE_BLOCK_SIZE = 10000
+
+# default memory budget (in bytes) of the unordered lines comparator
+UNORDERED_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# entry point group of the comparators provided by other packages
+COMPARATORS_ENTRY_POINT_GROUP = "wft4galaxy.comparators"
+
 
 def load_comparator(fully_qualified_comparator_function):
     """
@@ -34,80 +78,926 @@ def load_comparator(fully_qualified_comparator_function):
     return mod
 
 
+# registry of named comparators
+_registry = {}
+
+# cache of resolved comparators: <(NAME, OPTIONS)>:<COMPARATOR>
+_resolved_comparators = {}
+_resolved_comparators_lock = _threading.Lock()
+
+
+def register_comparator(*names):
+    """
+    Decorator which registers a comparator function by one or more names
+    (the function name, if no name is given), so that it can be referenced by its short name
+    in the ``comparator`` key of an expected output.
+
+    Comparators provided by other packages can also be registered through the ``wft4galaxy.comparators``
+    entry point group (see :data:`COMPARATORS_ENTRY_POINT_GROUP`).
+
+    :Example:
+
+        .. code-block:: python
+
+            @register_comparator("my_comparator")
+            def compare_outputs(actual_output_filename, expected_output_filename, **options):
+                ....
+                return True | False
+    """
+    if len(names) == 1 and callable(names[0]):
+        _registry[names[0].__name__] = names[0]
+        return names[0]
+
+    def register(comparator):
+        for name in names or (comparator.__name__,):
+            _registry[name] = comparator
+        return comparator
+
+    return register
+
+
+def get_comparator(comparator=None, options=None):
+    """
+    Resolve a comparator configuration to a callable which accepts the filenames
+    of the actual and expected outputs. Resolved comparators are cached, so that
+    names are looked up and options are bound once per process.
+
+    :type comparator: str or dict
+    :param comparator: the name of a registered comparator, a fully qualified name of a comparator function
+        or a dictionary with the ``name`` of the comparator and its options
+        (e.g., ``{name: table, rel_tol: 1e-6}``); ``None`` means :func:`base_comparator`
+
+    :type options: dict
+    :param options: further options of the comparator (overridden by the ones within ``comparator``)
+
+    :return: a callable reference to the comparator (``None`` if it cannot be loaded)
+    """
+    options = dict(options or {})
+    if isinstance(comparator, dict):
+        comparator = dict(comparator)
+        name = comparator.pop("name", None)
+        options.update(comparator)
+    else:
+        name = comparator
+    key = (name, _json.dumps(options, sort_keys=True, default=repr))
+    with _resolved_comparators_lock:
+        if key not in _resolved_comparators:
+            fn = _lookup_comparator(name) if name else base_comparator
+            _resolved_comparators[key] = _functools.partial(fn, **options) if fn and options else fn
+        return _resolved_comparators[key]
+
+
+def _lookup_comparator(name):
+    if name not in _registry:
+        _load_comparator_entry_points()
+    if name in _registry:
+        return _registry[name]
+    comparator = load_comparator(name)
+    return comparator if callable(comparator) else None
+
+
+def _load_comparator_entry_points():
+    try:
+        import pkg_resources
+    except ImportError:
+        return
+    for entry_point in pkg_resources.iter_entry_points(COMPARATORS_ENTRY_POINT_GROUP):
+        if entry_point.name not in _registry:
+            try:
+                _registry[entry_point.name] = entry_point.load()
+            except Exception as e:
+                _logger.error("Unable to load the comparator '%s': %s", entry_point.name, e)
+
+
+def compare_records(actual_records, expected_records, predicate=None, on_mismatch=None, context=None):
+    """
+    Streaming comparison engine shared by the built-in comparators: compare pairwise the records
+    of two iterators (e.g., lines, CSV rows or blocks of bytes; see :func:`line_records`,
+    :func:`csv_records` and :func:`block_records`), reading them only until the verdict is known.
+
+    :type actual_records: iterator
+    :param actual_records: the records of the actual output
+
+    :type expected_records: iterator
+    :param expected_records: the records of the expected output
+
+    :type predicate: callable
+    :param predicate: a function ``(actual_record, expected_record)`` which returns ``True``
+        if the two records are equal (default is the ``==`` operator)
+
+    :type on_mismatch: callable
+    :param on_mismatch: a function ``(index, actual_record, expected_record)`` called for each pair
+        of mismatching records (a record missing from the shorter iterator is ``None``);
+        the comparison goes on while it returns ``True``. By default, the comparison stops at the first mismatch.
+
+    :type context: :class:`collections.deque`
+    :param context: an optional (bounded) deque collecting the matching actual records
+
+    :rtype: int
+    :return: the number of mismatching pairs of records found before stopping
+    """
+    mismatches = 0
+    for index, (actual_record, expected_record) in enumerate(_zip_longest(actual_records, expected_records)):
+        if actual_record is not None and expected_record is not None and \
+                (predicate(actual_record, expected_record) if predicate else actual_record == expected_record):
+            if context is not None:
+                context.append(actual_record)
+            continue
+        mismatches += 1
+        if not on_mismatch or not on_mismatch(index, actual_record, expected_record):
+            break
+    return mismatches
+
+
+def compare_files(actual_output_filename, expected_output_filename, reader=None,
+                  predicate=None, on_mismatch=None, **reader_options):
+    """
+    Compare two files by :func:`compare_records`, reading their records by ``reader``.
+
+    :type reader: callable
+    :param reader: a generator function ``(filename, **reader_options)`` which yields the records of a file
+        (default is :func:`line_records`)
+
+    :rtype: int
+    :return: the number of mismatching pairs of records found before stopping
+    """
+    reader = reader or line_records
+    actual_records = reader(actual_output_filename, **reader_options)
+    expected_records = reader(expected_output_filename, **reader_options)
+    try:
+        return compare_records(actual_records, expected_records, predicate=predicate, on_mismatch=on_mismatch)
+    finally:
+        actual_records.close()
+        expected_records.close()
+
+
+def line_records(filename):
+    """
+    Iterate over the lines of a file, read in chunks of :data:`STREAM_CHUNK_SIZE` bytes.
+    Lines are bytes and their line endings are normalized to ``\\n``.
+    """
+    with open(filename, "rb") as f:
+        for line in _iter_normalized_lines(iter(lambda: f.read(STREAM_CHUNK_SIZE), b"")):
+            yield line
+
+
+def csv_records(filename, delimiter=","):
+    """
+    Iterate over the rows (lists of fields) of a delimited file.
+    """
+    import csv
+    with open(filename) as f:
+        for row in csv.reader(f, delimiter=str(delimiter)):
+            yield row
+
+
+def block_records(filename, block_size=None):
+    """
+    Iterate over the blocks of ``block_size`` bytes (default is :data:`BINARY_BLOCK_SIZE`)
+    of a memory-mapped file. Blocks are memoryviews of the mapped file (i.e., they are not copied),
+    which are released as soon as the next block is read.
+    """
+    block_size = block_size or BINARY_BLOCK_SIZE
+    with open(filename, "rb") as f:
+        if _os.fstat(f.fileno()).st_size == 0:
+            return
+        data = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        view = _buffer_view(data)
+        try:
+            for start in range(0, len(data), block_size):
+                block = view[start:start + block_size]
+                try:
+                    yield block
+                finally:
+                    _release(block)
+        finally:
+            # the views of the mapped file have to be released before closing it
+            _release(view)
+            data.close()
+
+
+def _buffer_view(data):
+    """
+    Return a memoryview of ``data``, if supported (Python 2 can't create memoryviews of memory-mapped files).
+    """
+    try:
+        return memoryview(data)
+    except TypeError:
+        return data
+
+
+def _release(view):
+    if isinstance(view, memoryview) and hasattr(view, "release"):
+        view.release()
+
+
+def _buffers_equal(a, b):
+    """
+    Compare two buffers (e.g., blocks of :func:`block_records`) without copying them:
+    memoryviews are compared as arrays of 64-bit words, which is much faster than comparing their bytes.
+    """
+    if len(a) != len(b):
+        return False
+    if not isinstance(a, memoryview) or not hasattr(a, "cast"):
+        return a == b
+    a, b = a.cast("B"), _buffer_view(b).cast("B")
+    size = len(a) - len(a) % 8
+    return a[:size].cast("Q") == b[:size].cast("Q") and a[size:] == b[size:]
+
+
+def _iter_blocks(records, size):
+    """
+    Group the records of an iterator in lists of ``size`` records.
+    """
+    return iter(lambda: list(_islice(records, size)), [])
+
+
+@register_comparator("base")
 def base_comparator(actual_output_filename, expected_output_filename):
+    """
+    Default comparator: check whether the actual output is equal to the expected one, line by line
+    and regardless of the line endings.
+
+    Files of the same size are first compared chunk by chunk; a unified diff is computed
+    only on mismatch, starting from the first differing line and within a bounded window
+    (see :data:`MAX_DIFF_LINES`, :data:`MAX_DIFF_BYTES` and :data:`MAX_DIFF_HUNKS`).
+    The diff is streamed to the file ``<actual_output_filename>.diff``.
+
+    :type actual_output_filename: str
+    :param actual_output_filename: the path of the actual output file
+
+    :type expected_output_filename: str
+    :param expected_output_filename: the path of the expected output file
+
+    :rtype: bool
+    :return: ``True`` if the actual output is equal to the expected one
+    """
     _logger.debug("Using default comparator....")
-    with open(actual_output_filename) as aout, open(expected_output_filename) as eout:
-        diff = _unified_diff(aout.readlines(), eout.readlines(), actual_output_filename, expected_output_filename)
-        ldiff = list(diff)
-        if len(ldiff) > 0:
-            print("\n{0}\n...\n".format("".join(ldiff[:20])))
-            diff_filename = _os.path.join(_os.path.dirname(actual_output_filename),
-                                          _os.path.basename(actual_output_filename) + ".diff")
-            with open(diff_filename, "w") as  out_fp:
-                out_fp.writelines("%r\n" % item.rstrip('\n') for item in ldiff)
-        return len(ldiff) == 0
+    if _os.path.getsize(actual_output_filename) == _os.path.getsize(expected_output_filename) \
+            and compare_files(actual_output_filename, expected_output_filename, reader=block_records,
+                              predicate=_buffers_equal, block_size=STREAM_CHUNK_SIZE) == 0:
+        return True
+    # skip the common lines, keeping the last ones as context of the diff
+    context = _deque(maxlen=DIFF_CONTEXT_LINES)
+    mismatch = []
+    aout, eout = line_records(actual_output_filename), line_records(expected_output_filename)
+    try:
+        compare_records(aout, eout, on_mismatch=lambda *m: mismatch.extend(m), context=context)
+        if not mismatch:
+            return True
+        offset, actual_line, expected_line = mismatch
+        offset -= len(context)
+        actual_lines = [_to_text(line) for line in list(context) + _read_lines(aout, actual_line)]
+        expected_lines = [_to_text(line) for line in list(context) + _read_lines(eout, expected_line)]
+        truncated = next(aout, None) is not None or next(eout, None) is not None
+    finally:
+        aout.close()
+        eout.close()
+    diff_filename = _os.path.join(_os.path.dirname(actual_output_filename),
+                                  _os.path.basename(actual_output_filename) + ".diff")
+    preview = []
+    with open(diff_filename, "w") as out_fp:
+        for item in _bounded_unified_diff(actual_lines, expected_lines, offset, offset,
+                                          actual_output_filename, expected_output_filename, truncated):
+            if len(preview) < DIFF_PREVIEW_LINES:
+                preview.append(item)
+            out_fp.write("%r\n" % item.rstrip('\n'))
+    print("\n{0}\n...\n".format("".join(preview)))
+    return False
 
 
-def csv_same_row_and_col_lengths(actual_output_filename, expected_output_filename):
-    import csv
+def _read_lines(lines, first_line):
+    """
+    Read the lines of the diff window, starting with ``first_line`` (``None`` at the end of file)
+    and bounded by :data:`MAX_DIFF_LINES` and :data:`MAX_DIFF_BYTES`.
+    """
+    window = []
+    size = 0
+    line = first_line
+    while line is not None:
+        window.append(line)
+        size += len(line)
+        if len(window) >= MAX_DIFF_LINES or size >= MAX_DIFF_BYTES:
+            break
+        line = next(lines, None)
+    return window
 
-    with open(actual_output_filename) as af, open(expected_output_filename) as ef:
-        aout = csv.reader(af)
-        eout = csv.reader(ef)
-        colsActual = []
-        colsExpected = []
-        for row in aout:
-            colsActual.append(len(row))
 
-        for row in eout:
-            colsExpected.append(len(row))
+def _to_text(line):
+    return line if isinstance(line, str) else line.decode("utf-8", "replace")
+
+
+def _format_range_unified(start, stop):
+    # see difflib.unified_diff
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return "{0}".format(beginning)
+    if not length:
+        beginning -= 1
+    return "{0},{1}".format(beginning, length)
+
+
+def _bounded_unified_diff(a, b, a_offset, b_offset, fromfile, tofile, truncated=False, n=DIFF_CONTEXT_LINES):
+    """
+    Generate the unified diff of two windows of lines starting at the given line offsets,
+    emitting at most :data:`MAX_DIFF_HUNKS` hunks.
+    """
+    yield "--- {0}\n".format(fromfile)
+    yield "+++ {0}\n".format(tofile)
+    for count, group in enumerate(_SequenceMatcher(None, a, b).get_grouped_opcodes(n)):
+        if count == MAX_DIFF_HUNKS:
+            truncated = True
+            break
+        first, last = group[0], group[-1]
+        yield "@@ -{0} +{1} @@\n".format(_format_range_unified(first[1] + a_offset, last[2] + a_offset),
+                                         _format_range_unified(first[3] + b_offset, last[4] + b_offset))
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                for line in a[i1:i2]:
+                    yield " " + line
+                continue
+            if tag in ("replace", "delete"):
+                for line in a[i1:i2]:
+                    yield "-" + line
+            if tag in ("replace", "insert"):
+                for line in b[j1:j2]:
+                    yield "+" + line
+    if truncated:
+        yield "... (diff truncated)\n"
+
+
+def base_stream_comparator(actual_output_chunks, expected_output_filename):
+    """
+    Streaming version of :func:`base_comparator`: compare, line by line, an iterator over the chunks
+    of the actual output to the expected output file, stopping at the first mismatch.
+    As in :func:`base_comparator`, line endings are not significant.
+
+    :type actual_output_chunks: iterator
+    :param actual_output_chunks: iterator over the chunks (bytes) of the actual output
+
+    :type expected_output_filename: str
+    :param expected_output_filename: the path of the expected output file
+
+    :rtype: bool
+    :return: ``True`` if the actual output is equal to the expected one
+    """
+    _logger.debug("Using default streaming comparator....")
+    expected_lines = line_records(expected_output_filename)
+    try:
+        return compare_records(_iter_normalized_lines(actual_output_chunks), expected_lines) == 0
+    finally:
+        expected_lines.close()
+
+
+# the default comparator supports streaming
+base_comparator.stream_comparator = base_stream_comparator
+
+
+def get_stream_comparator(comparator):
+    """
+    Return the streaming version of a comparator function, i.e., a function which accepts
+    an iterator over the chunks of the actual output in place of its filename.
+    A comparator declares its streaming version by its ``stream_comparator`` attribute.
+
+    :param comparator: a comparator function
+
+    :return: a callable reference to the streaming comparator (``None`` if not available)
+    """
+    return getattr(comparator, "stream_comparator", None)
+
+
+def _iter_lines(chunks):
+    """
+    Iterate over the lines (with their line ending) contained in a sequence of chunks of bytes.
+    """
+    pending = b""
+    for chunk in chunks:
+        lines = (pending + chunk).splitlines(True)
+        # the last line may continue in the next chunk (a trailing '\r' may be followed by '\n')
+        pending = lines.pop() if lines and not lines[-1].endswith(b"\n") else b""
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+def _normalize_eol(line):
+    stripped = line.rstrip(b"\r\n")
+    return stripped + b"\n" if len(stripped) < len(line) else line
+
+
+def _iter_normalized_lines(chunks):
+    for line in _iter_lines(chunks):
+        yield _normalize_eol(line)
+
+
+@register_comparator("binary")
+def binary_comparator(actual_output_filename, expected_output_filename):
+    """
+    Comparator of binary outputs (e.g., images, compressed archives or BAM files):
+    both files are memory-mapped and compared in blocks of :data:`BINARY_BLOCK_SIZE` bytes (see :func:`block_records`).
+    The offset of the first differing byte is reported on mismatch.
+
+    :type actual_output_filename: str
+    :param actual_output_filename: the path of the actual output file
+
+    :type expected_output_filename: str
+    :param expected_output_filename: the path of the expected output file
+
+    :rtype: bool
+    :return: ``True`` if the two files have the same content
+    """
+    _logger.debug("Using binary comparator....")
+    actual_size = _os.path.getsize(actual_output_filename)
+    expected_size = _os.path.getsize(expected_output_filename)
+    block_size = BINARY_BLOCK_SIZE
+    mismatch = []
+
+    def locate(index, actual_block, expected_block):
+        actual_block, expected_block = actual_block or b"", expected_block or b""
+        size = min(len(actual_block), len(expected_block))
+        offset = _find_first_difference(actual_block, expected_block, size)
+        mismatch.append(index * block_size + (size if offset is None else offset))
+
+    compare_files(actual_output_filename, expected_output_filename, reader=block_records,
+                  predicate=_buffers_equal, on_mismatch=locate, block_size=block_size)
+    if mismatch:
+        print("Binary outputs differ at offset {0} (actual size: {1}, expected size: {2})"
+              .format(mismatch[0], actual_size, expected_size), file=_sys.stderr)
+        return False
+    return True
+
+
+def _find_first_difference(a, b, size):
+    """
+    Return the offset of the first differing byte of two buffers within ``size`` bytes
+    (``None`` if they are equal). Buffers are sliced as memoryviews, i.e., without copying them.
+    """
+    a, b = _buffer_view(a), _buffer_view(b)
+    for start in range(0, size, BINARY_BLOCK_SIZE):
+        stop = min(start + BINARY_BLOCK_SIZE, size)
+        if not _buffers_equal(a[start:stop], b[start:stop]):
+            # narrow down the differing block by bisection
+            while stop - start > 1:
+                middle = (start + stop) // 2
+                if not _buffers_equal(a[start:middle], b[start:middle]):
+                    stop = middle
+                else:
+                    start = middle
+            return start
+    return None
+
 
-        if colsActual and colsExpected:
-            return _common.cmp(colsActual, colsExpected) == 0
+@register_comparator("csv_same_row_and_col_lengths")
+def csv_same_row_and_col_lengths(actual_output_filename, expected_output_filename):
+    """
+    Check whether two non-empty CSV files have the same number of rows
+    and their rows have the same number of fields.
+    """
+    if _os.path.getsize(actual_output_filename) == 0 or _os.path.getsize(expected_output_filename) == 0:
         return False
+    return compare_files(actual_output_filename, expected_output_filename, reader=csv_records,
+                         predicate=lambda actual_row, expected_row: len(actual_row) == len(expected_row)) == 0
 
 
 def _get_float(s):
     try:
         return float(s)
-    except ValueError:
+    except (TypeError, ValueError):
         return None
 
 
-def _compare_strings_as_floats(precision, a, b):
-    a_float = _get_float(a)
-    b_float = _get_float(b)
-    if a_float is not None and b_float is not None:
-        return round(a_float, precision) == round(b_float, precision)
-    else:
-        return False
+@register_comparator("rounded_csv")
+def rounded_comparison_csv(actual_output, expected_output):
+    """
+    Compare two CSV files, numeric fields being rounded to two decimal digits
+    (see :func:`table_comparator`).
+    """
+    return table_comparator(actual_output, expected_output, delimiter=",", precision=2)
 
 
-def rounded_comparison_csv(actual_output, expected_output):
-    import csv
+@register_comparator("table", "csv_tolerance")
+def table_comparator(actual_output_filename, expected_output_filename, delimiter="\t", abs_tol=0.0, rel_tol=0.0,
+                     precision=None, columns=None, header=False, max_mismatches=10, block_size=TABLE_BLOCK_SIZE):
+    """
+    Compare two delimited tables (e.g., TSV or CSV files) field by field, tolerating numeric differences.
+
+    Two fields are equal if they are the same string or if they are both numbers and
+    ``|a - b| <= max(abs_tol, rel_tol * max(|a|, |b|))`` (or, if ``precision`` is given,
+    they are equal once rounded to ``precision`` decimal digits). Tolerances can be overridden
+    for single columns by ``columns``, a dictionary which maps column indexes (starting from 0)
+    or column names (if the tables have a ``header``) to a dictionary of rules
+    (``abs_tol``, ``rel_tol``, ``precision`` and ``ignore``, to skip the column).
+
+    Tables are processed in blocks of ``block_size`` rows; the comparison of blocks
+    is vectorized when NumPy is available. The coordinates of the first ``max_mismatches``
+    mismatching fields are reported.
+
+    All the parameters but the file names can be set by the ``comparator_options`` of an expected output:
+
+    .. code-block:: YAML
+
+        expected:
+          variableMetadata:
+            file: "expected/variableMetadata.tsv"
+            comparator: "wft4galaxy.comparators.table_comparator"
+            comparator_options:
+              header: true
+              rel_tol: 1e-6
+              columns:
+                pvalue: {abs_tol: 1e-3}
+                id: {ignore: true}
+
+    :rtype: bool
+    :return: ``True`` if the two tables are equal
+    """
+    _logger.debug("Using table comparator....")
+    rules = _TableRules(abs_tol, rel_tol, precision, columns)
+    compare_block = _compare_table_block_numpy if _np is not None else _compare_table_block
+    mismatches = []
+    aout = csv_records(actual_output_filename, delimiter=delimiter)
+    eout = csv_records(expected_output_filename, delimiter=delimiter)
     try:
-        from itertools import izip
-    except ImportError:
-        # in Python 3 zip() function returns an iterator
-        izip = zip
-    precision = 2
+        row_offset = 0
+        if header:
+            actual_header, expected_header = next(aout, None), next(eout, None)
+            if actual_header != expected_header:
+                mismatches.append((0, None, actual_header, expected_header))
+            rules.set_header(expected_header or [])
+            row_offset = 1
+
+        def check_block(index, actual_block, expected_block):
+            # blocks which are not identical are compared field by field
+            block_offset = row_offset + index * block_size
+            mismatches.extend([(block_offset + r, c, a, e) for r, c, a, e
+                               in compare_block(actual_block or [], expected_block or [], rules)])
+            return len(mismatches) < max_mismatches
+
+        if len(mismatches) < max_mismatches:
+            compare_records(_iter_blocks(aout, block_size), _iter_blocks(eout, block_size), on_mismatch=check_block)
+    finally:
+        aout.close()
+        eout.close()
+    for row, column, actual_value, expected_value in mismatches[:max_mismatches]:
+        if column is None:
+            print("Difference found at row {0}: actual row {1!r}, expected row {2!r}"
+                  .format(row + 1, actual_value, expected_value), file=_sys.stderr)
+        else:
+            print("Difference found at row {0}, column {1}: actual field {2!r}, expected field {3!r}"
+                  .format(row + 1, rules.get_column_label(column), actual_value, expected_value),
+                  file=_sys.stderr)
+    return len(mismatches) == 0
+
+
+class _TableRules(object):
+    """
+    Comparison rules of the columns of a table.
+    """
+
+    def __init__(self, abs_tol=0.0, rel_tol=0.0, precision=None, columns=None):
+        self._default = {"abs_tol": float(abs_tol), "rel_tol": float(rel_tol),
+                         "precision": precision, "ignore": False}
+        self._columns = columns or {}
+        self._header = []
+        self._rules = {}
+
+    def set_header(self, header):
+        self._header = header
+        self._rules = {}
+
+    def get_column_label(self, index):
+        if index < len(self._header):
+            return "{0} ('{1}')".format(index + 1, self._header[index])
+        return "{0}".format(index + 1)
+
+    def get_column_index(self, column):
+        if isinstance(column, int):
+            return column
+        if column in self._header:
+            return self._header.index(column)
+        try:
+            return int(column)
+        except ValueError:
+            raise ValueError("Unknown column '{0}'".format(column))
+
+    def get(self, index):
+        rule = self._rules.get(index)
+        if rule is None:
+            rule = dict(self._default)
+            name = self._header[index] if index < len(self._header) else None
+            for key in (index, str(index), name):
+                if key is not None and key in self._columns:
+                    rule.update(self._columns[key])
+                    break
+            rule["abs_tol"], rule["rel_tol"] = float(rule["abs_tol"]), float(rule["rel_tol"])
+            self._rules[index] = rule
+        return rule
+
+
+def _fields_equal(a, b, rule):
+    if a == b or rule["ignore"]:
+        return True
+    a_float, b_float = _get_float(a), _get_float(b)
+    if a_float is None or b_float is None:
+        return False
+    if a_float != a_float and b_float != b_float:
+        # NaN
+        return True
+    if rule["precision"] is not None:
+        return round(a_float, rule["precision"]) == round(b_float, rule["precision"])
+    return abs(a_float - b_float) <= max(rule["abs_tol"], rule["rel_tol"] * max(abs(a_float), abs(b_float)))
+
+
+def _compare_table_block(actual_block, expected_block, rules):
+    """
+    Return the list of mismatches (row, column, actual, expected) of two blocks of rows;
+    ``column`` is ``None`` if the two rows have a different number of fields.
+    """
+    mismatches = []
+    for r, (actual_row, expected_row) in enumerate(_zip_longest(actual_block, expected_block)):
+        if actual_row == expected_row:
+            continue
+        if actual_row is None or expected_row is None or len(actual_row) != len(expected_row):
+            mismatches.append((r, None, actual_row, expected_row))
+            continue
+        for c, (a, e) in enumerate(zip(actual_row, expected_row)):
+            if not _fields_equal(a, e, rules.get(c)):
+                mismatches.append((r, c, a, e))
+    return mismatches
+
+
+def _compare_table_block_numpy(actual_block, expected_block, rules):
+    """
+    Vectorized version of :func:`_compare_table_block`, used when all the rows of both blocks
+    have the same number of fields.
+    """
+    widths = set([len(row) for row in actual_block]) | set([len(row) for row in expected_block])
+    if len(actual_block) != len(expected_block) or len(widths) != 1:
+        return _compare_table_block(actual_block, expected_block, rules)
+    actual, expected = _np.array(actual_block, dtype=object), _np.array(expected_block, dtype=object)
+    different = actual != expected
+    mismatches = []
+    for c in _np.nonzero(different.any(axis=0))[0]:
+        rule = rules.get(c)
+        if rule["ignore"]:
+            continue
+        rows = _np.nonzero(different[:, c])[0]
+        a, e = actual[rows, c], expected[rows, c]
+        try:
+            a_float, e_float = a.astype(float), e.astype(float)
+        except ValueError:
+            equal = _np.array([_fields_equal(x, y, rule) for x, y in zip(a, e)], dtype=bool)
+        else:
+            if rule["precision"] is not None:
+                equal = _np.round(a_float, rule["precision"]) == _np.round(e_float, rule["precision"])
+            else:
+                with _np.errstate(invalid="ignore"):
+                    equal = _np.abs(a_float - e_float) <= _np.maximum(
+                        rule["abs_tol"], rule["rel_tol"] * _np.maximum(_np.abs(a_float), _np.abs(e_float)))
+            equal |= _np.isnan(a_float) & _np.isnan(e_float)
+        mismatches.extend([(int(r), int(c), actual[r, c], expected[r, c]) for r in rows[~equal]])
+    mismatches.sort(key=lambda m: (m[0], m[1]))
+    return mismatches
+
+
+@register_comparator("keyed_table")
+def keyed_table_comparator(actual_output_filename, expected_output_filename, key_columns=0, delimiter="\t",
+                           header=False, abs_tol=0.0, rel_tol=0.0, precision=None, columns=None, max_mismatches=10):
+    """
+    Compare two delimited tables whose rows are identified by one or more key columns, regardless of the row order.
+
+    The expected table is indexed in memory by its keys, while the actual table is streamed
+    and each of its rows is compared to the expected row with the same key, applying
+    the same rules of :func:`table_comparator` (``abs_tol``, ``rel_tol``, ``precision`` and ``columns``).
+    If the tables have a ``header``, columns are matched by name, so that their order is not significant
+    (fields missing from the actual rows are reported as changed fields).
+    Missing, unexpected and changed keys are reported (at most ``max_mismatches``).
+
+    .. code-block:: YAML
+
+        expected:
+          variableMetadata:
+            file: "expected/variableMetadata.tsv"
+            comparator: "wft4galaxy.comparators.keyed_table_comparator"
+            comparator_options:
+              header: true
+              key_columns: variableMetadata
+              rel_tol: 1e-6
+
+    :type key_columns: list
+    :param key_columns: the key column (or list of columns), given by index (starting from 0) or by name
+
+    :rtype: bool
+    :return: ``True`` if the two tables contain the same keys with equal rows
+    """
+    _logger.debug("Using keyed table comparator....")
+    rules = _TableRules(abs_tol, rel_tol, precision, columns)
+    # number of mismatches
+    mismatches = [0]
+
+    def report(message):
+        """
+        Report a mismatch, returning ``False`` as soon as no more mismatches have to be reported.
+        """
+        if mismatches[0] < max_mismatches:
+            print(message, file=_sys.stderr)
+        else:
+            print("...", file=_sys.stderr)
+        mismatches[0] += 1
+        return mismatches[0] <= max_mismatches
+
+    aout = csv_records(actual_output_filename, delimiter=delimiter)
+    eout = csv_records(expected_output_filename, delimiter=delimiter)
     try:
-        with open(actual_output) as actual, open(expected_output) as expected:
-            aout = csv.reader(actual)
-            eout = csv.reader(expected)
-            for expected_row in eout:
-                actual_row = next(aout)
-                for actual_field, expected_field in izip(actual_row, expected_row):
-                    if not _compare_strings_as_floats(precision, actual_field, expected_field) \
-                            and actual_field != expected_field:
-                        print("Difference found between expected and actual output", file=_sys.stderr)
-                        print("Expected field text:", expected_field, file=_sys.stderr)
-                        print("Actual field text:", actual_field, file=_sys.stderr)
-                        print("Expected row:", expected_row, file=_sys.stderr)
-                        print("Actual row:", actual_row, file=_sys.stderr)
+        expected_header = next(eout, []) if header else []
+        actual_header = next(aout, []) if header else []
+        rules.set_header(expected_header)
+        # map expected columns to actual columns
+        column_map = None
+        if header:
+            positions = dict([(name, i) for i, name in enumerate(actual_header)])
+            missing_columns = [name for name in expected_header if name not in positions]
+            extra_columns = [name for name in actual_header if name not in set(expected_header)]
+            if missing_columns or extra_columns:
+                report("Different columns: missing {0}, unexpected {1}".format(missing_columns, extra_columns))
+                return False
+            column_map = [positions[name] for name in expected_header]
+        keys = [rules.get_column_index(k) for k in
+                (key_columns if isinstance(key_columns, (list, tuple)) else [key_columns])]
+        # index the expected table
+        index = {}
+        for row in eout:
+            index.setdefault(tuple([row[k] if k < len(row) else None for k in keys]), []).append(row)
+        # stream the actual table
+        for actual_row in aout:
+            if column_map is not None:
+                # missing fields are padded with None, extra fields are kept after the mapped ones
+                actual_row = [actual_row[i] if i < len(actual_row) else None for i in column_map] + \
+                             actual_row[len(column_map):]
+            key = tuple([actual_row[k] if k < len(actual_row) else None for k in keys])
+            expected_rows = index.get(key)
+            if not expected_rows:
+                if not report("Unexpected key {0!r}".format(key if len(key) > 1 else key[0])):
+                    return False
+                continue
+            expected_row = expected_rows.pop(0)
+            if not expected_rows:
+                del index[key]
+            if actual_row == expected_row:
+                continue
+            if len(actual_row) != len(expected_row):
+                if not report("Changed key {0!r}: actual row {1!r}, expected row {2!r}".format(
+                        key if len(key) > 1 else key[0], actual_row, expected_row)):
+                    return False
+                continue
+            for c, (a, e) in enumerate(zip(actual_row, expected_row)):
+                if not _fields_equal(a, e, rules.get(c)):
+                    if not report("Changed key {0!r}, column {1}: actual field {2!r}, expected field {3!r}".format(
+                            key if len(key) > 1 else key[0], rules.get_column_label(c), a, e)):
                         return False
-    except StopIteration:
-        print("Actual output is shorted than expected output", file=_sys.stderr)
-        return False
+        for key, expected_rows in _iteritems(index):
+            for _ in expected_rows:
+                if not report("Missing key {0!r}".format(key if len(key) > 1 else key[0])):
+                    return False
+    finally:
+        aout.close()
+        eout.close()
+    return mismatches[0] == 0
 
-    return True
+
+@register_comparator("unordered_lines")
+def unordered_lines_comparator(actual_output_filename, expected_output_filename,
+                               memory_budget=UNORDERED_MEMORY_BUDGET, max_mismatches=10):
+    """
+    Compare two files as multisets of lines, i.e., regardless of the order of their lines
+    (line endings are not significant). Lines are compared as bytes.
+
+    Lines are counted in memory by a hash table which only holds the lines
+    not yet matched by the other file; if its size exceeds ``memory_budget`` bytes,
+    both files are sorted on disk (external sort) and the sorted runs are merged and compared.
+
+    :type memory_budget: int
+    :param memory_budget: approximate maximum memory (in bytes) used by the comparison
+
+    :type max_mismatches: int
+    :param max_mismatches: maximum number of reported mismatching lines
+
+    :rtype: bool
+    :return: ``True`` if the two files contain the same lines
+    """
+    _logger.debug("Using unordered lines comparator....")
+    memory_budget = int(memory_budget)
+    actual_lines, expected_lines = line_records(actual_output_filename), line_records(expected_output_filename)
+    try:
+        counter = {}
+        size = 0
+        for actual_line, expected_line in _zip_longest(actual_lines, expected_lines):
+            for line, count in ((actual_line, 1), (expected_line, -1)):
+                if line is None:
+                    continue
+                line = _strip_eol(line)
+                value = counter.get(line, 0) + count
+                if value == 0:
+                    del counter[line]
+                    size -= _sys.getsizeof(line) + _COUNTER_ENTRY_SIZE
+                else:
+                    if line not in counter:
+                        size += _sys.getsizeof(line) + _COUNTER_ENTRY_SIZE
+                    counter[line] = value
+            if size > memory_budget:
+                break
+        else:
+            mismatches = [(line, count) for line, count in _iteritems(counter)]
+            mismatches.sort()
+            return _report_unordered_mismatches(mismatches, max_mismatches)
+    finally:
+        actual_lines.close()
+        expected_lines.close()
+    counter = None
+    _logger.debug("Memory budget exceeded: using external sort")
+    tmp_folder = _tempfile.mkdtemp(prefix="wft4galaxy-sort-")
+    try:
+        actual_lines = _external_sort(actual_output_filename, tmp_folder, memory_budget // 2)
+        expected_lines = _external_sort(expected_output_filename, tmp_folder, memory_budget // 2)
+        return _report_unordered_mismatches(_merge_mismatches(actual_lines, expected_lines), max_mismatches)
+    finally:
+        _shutil.rmtree(tmp_folder, ignore_errors=True)
+
+
+# approximate memory overhead (in bytes) of an entry of the line counter
+_COUNTER_ENTRY_SIZE = 100
+
+
+def _strip_eol(line):
+    return line[:-1] if line.endswith(b"\n") else line
+
+
+def _external_sort(filename, tmp_folder, run_size):
+    """
+    Return an iterator over the sorted lines of a file, sorting runs of ``run_size`` bytes
+    in memory, storing them in ``tmp_folder`` and merging them.
+    """
+    runs = []
+    records = line_records(filename)
+    try:
+        lines = []
+        size = 0
+        for line in records:
+            line = _strip_eol(line)
+            lines.append(line)
+            size += _sys.getsizeof(line) + 8
+            if size >= run_size:
+                runs.append(_write_run(lines, tmp_folder))
+                lines, size = [], 0
+        if lines or not runs:
+            runs.append(_write_run(lines, tmp_folder))
+    finally:
+        records.close()
+    return _heapq.merge(*[_read_run(run) for run in runs])
+
+
+def _write_run(lines, tmp_folder):
+    lines.sort()
+    fd, run_filename = _tempfile.mkstemp(dir=tmp_folder, suffix=".run")
+    with _os.fdopen(fd, "wb") as run:
+        for line in lines:
+            run.write(line)
+            run.write(b"\n")
+    return run_filename
+
+
+def _read_run(run_filename):
+    with open(run_filename, "rb") as run:
+        for line in iter(run.readline, b""):
+            yield line[:-1]
+
+
+def _merge_mismatches(actual_lines, expected_lines):
+    """
+    Iterate over the mismatches (line, count) of two sorted iterators of lines,
+    where ``count`` is positive for lines in excess in the actual output.
+    """
+    actual_line, expected_line = next(actual_lines, None), next(expected_lines, None)
+    while actual_line is not None or expected_line is not None:
+        if expected_line is None or (actual_line is not None and actual_line < expected_line):
+            yield actual_line, 1
+            actual_line = next(actual_lines, None)
+        elif actual_line is None or expected_line < actual_line:
+            yield expected_line, -1
+            expected_line = next(expected_lines, None)
+        else:
+            actual_line, expected_line = next(actual_lines, None), next(expected_lines, None)
+
+
+def _report_unordered_mismatches(mismatches, max_mismatches):
+    reported = 0
+    for line, count in mismatches:
+        if reported == max_mismatches:
+            print("...", file=_sys.stderr)
+            break
+        print("{0} line {1!r} ({2} occurrence{3})".format(
+            "Unexpected" if count > 0 else "Missing", _to_text(line), abs(count), "s" if abs(count) > 1 else ""),
+            file=_sys.stderr)
+        reported += 1
+    return reported == 0
@@ -0,0 +1,291 @@
+from __future__ import print_function
+from past.builtins import basestring as _basestring
+
+import re as _re
+
+from wft4galaxy import common as _common
+
+_logger = _common.LoggerManager.get_logger(__name__)
+
+
+class AssertionsChecker(object):
+    """
+    Check a set of Galaxy-style assertions on the content of an output dataset in a single streaming scan.
+
+    Assertions are given as a list of single-key dictionaries ``{<ASSERTION>: <OPTIONS>}``
+    (or, as in Galaxy test definitions, dictionaries ``{that: <ASSERTION>, <OPTION>: <VALUE>, ...}``):
+
+    .. code-block:: YAML
+
+        assertions:
+          - has_text: {text: "variableMetadata"}
+          - has_line_matching: {expression: "^name\\t"}
+          - has_n_lines: {n: 100, delta: 5}
+          - has_n_columns: {n: 12}
+
+    Supported assertions are ``has_text``, ``not_has_text``, ``has_line``, ``has_line_matching``,
+    ``has_text_matching`` (the expression is searched within each line), ``has_n_lines``
+    (``n``, ``delta``, ``min``, ``max``) and ``has_n_columns`` (``n``, ``delta``, ``min``, ``max``,
+    ``sep`` and ``comment``, checked on the first line not starting with ``comment``).
+
+    The content is fed by chunks (see :meth:`feed`); lines are decoded as UTF-8 and
+    assertions already satisfied (or violated) are not evaluated on the following lines.
+    """
+
+    def __init__(self, assertions):
+        """
+        :type assertions: list
+        :param assertions: the list of assertions
+
+        A ``ValueError`` is raised if an assertion is not supported or not valid.
+        """
+        self._assertions = [_make_assertion(a) for a in (assertions or [])]
+        self._active = list(self._assertions)
+        self._pending = b""
+        self._closed = False
+
+    def feed(self, chunk):
+        """
+        Check the assertions on the next chunk (bytes) of the output.
+        """
+        lines = (self._pending + chunk).splitlines(True)
+        # the last line may continue in the next chunk (a trailing '\r' may be followed by '\n')
+        self._pending = lines.pop() if lines and not lines[-1].endswith(b"\n") else b""
+        for line in lines:
+            self._feed_line(line)
+
+    def close(self):
+        """
+        Notify the end of the output.
+        """
+        if not self._closed:
+            if self._pending:
+                self._feed_line(self._pending)
+                self._pending = b""
+            self._closed = True
+
+    def _feed_line(self, line):
+        if not self._active:
+            return
+        text = line.decode("utf-8", "replace")
+        self._active = [a for a in self._active if not a.feed(text)]
+
+    def get_failures(self):
+        """
+        :rtype: list
+        :return: the descriptions of the violated assertions
+        """
+        self.close()
+        return [failure for failure in [a.get_failure() for a in self._assertions] if failure]
+
+
+def check_assertions(filename, assertions, chunk_size=1024 * 1024):
+    """
+    Check a set of assertions (see :class:`AssertionsChecker`) on the content of a file.
+
+    :rtype: list
+    :return: the descriptions of the violated assertions
+    """
+    checker = AssertionsChecker(assertions)
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            checker.feed(chunk)
+    return checker.get_failures()
+
+
+def _make_assertion(config):
+    if not isinstance(config, dict):
+        raise ValueError("Invalid assertion: {0!r}".format(config))
+    options = dict(config)
+    name = options.pop("that", None)
+    if name is None:
+        if len(options) != 1:
+            raise ValueError("Invalid assertion: {0!r}".format(config))
+        name, options = list(options.items())[0]
+        options = dict(options or {})
+    if name not in _ASSERTIONS:
+        raise ValueError("Unsupported assertion '{0}'".format(name))
+    try:
+        return _ASSERTIONS[name](**options)
+    except TypeError as e:
+        raise ValueError("Invalid options of the assertion '{0}': {1}".format(name, e))
+
+
+class _Assertion(object):
+
+    def feed(self, line):
+        """
+        Evaluate the assertion on the next line (with its line ending).
+
+        :rtype: bool
+        :return: ``True`` if the assertion does not need more lines to be decided
+        """
+        raise NotImplementedError()
+
+    def get_failure(self):
+        """
+        :rtype: str
+        :return: the description of the violation (``None`` if the assertion holds)
+        """
+        raise NotImplementedError()
+
+
+class _HasText(_Assertion):
+
+    def __init__(self, text, negate=False):
+        self._text = _to_text(text)
+        self._negate = negate
+        self._tail = ""
+        self._found = False
+
+    def feed(self, line):
+        # the text may span multiple lines
+        content = self._tail + line
+        self._found = self._text in content
+        self._tail = content[-(len(self._text) - 1):] if len(self._text) > 1 else ""
+        return self._found
+
+    def get_failure(self):
+        if self._found == self._negate:
+            return "Output {0} the text {1!r}".format("contains" if self._negate else "doesn't contain", self._text)
+
+
+class _NotHasText(_HasText):
+
+    def __init__(self, text):
+        super(_NotHasText, self).__init__(text, negate=True)
+
+
+class _HasLine(_Assertion):
+
+    def __init__(self, line):
+        self._line = _to_text(line)
+        self._found = False
+
+    def feed(self, line):
+        self._found = line.rstrip("\r\n") == self._line
+        return self._found
+
+    def get_failure(self):
+        if not self._found:
+            return "Output doesn't contain the line {0!r}".format(self._line)
+
+
+class _HasLineMatching(_Assertion):
+
+    def __init__(self, expression):
+        self._expression = expression
+        self._regex = _compile(expression, "(?:{0})$".format(expression))
+        self._found = False
+
+    def feed(self, line):
+        self._found = self._regex.match(line.rstrip("\r\n")) is not None
+        return self._found
+
+    def get_failure(self):
+        if not self._found:
+            return "Output doesn't contain a line matching {0!r}".format(self._expression)
+
+
+class _HasTextMatching(_Assertion):
+
+    def __init__(self, expression):
+        self._expression = expression
+        self._regex = _compile(expression)
+        self._found = False
+
+    def feed(self, line):
+        self._found = self._regex.search(line.rstrip("\r\n")) is not None
+        return self._found
+
+    def get_failure(self):
+        if not self._found:
+            return "Output doesn't contain text matching {0!r}".format(self._expression)
+
+
+class _Count(object):
+    """
+    Expected value of a count: ``n`` (with a tolerance ``delta``) and/or the range [``min``, ``max``].
+    """
+
+    def __init__(self, n=None, delta=0, min=None, max=None):
+        if n is None and min is None and max is None:
+            raise TypeError("one of 'n', 'min' or 'max' is required")
+        self.n = int(n) if n is not None else None
+        self.delta = int(delta)
+        self.min = int(min) if min is not None else None
+        self.max = int(max) if max is not None else None
+
+    def __contains__(self, value):
+        return (self.n is None or abs(value - self.n) <= self.delta) \
+               and (self.min is None or value >= self.min) and (self.max is None or value <= self.max)
+
+    def __str__(self):
+        conditions = []
+        if self.n is not None:
+            conditions.append("{0}".format(self.n) + (" +/- {0}".format(self.delta) if self.delta else ""))
+        if self.min is not None:
+            conditions.append(">= {0}".format(self.min))
+        if self.max is not None:
+            conditions.append("<= {0}".format(self.max))
+        return " and ".join(conditions)
+
+
+class _HasNLines(_Assertion):
+
+    def __init__(self, **count):
+        self._count = _Count(**count)
+        self._lines = 0
+
+    def feed(self, line):
+        self._lines += 1
+        return False
+
+    def get_failure(self):
+        if self._lines not in self._count:
+            return "Output has {0} lines, expected {1}".format(self._lines, self._count)
+
+
+class _HasNColumns(_Assertion):
+
+    def __init__(self, sep="\t", comment="", **count):
+        self._count = _Count(**count)
+        self._sep = sep
+        self._comment = comment
+        self._columns = None
+
+    def feed(self, line):
+        line = line.rstrip("\r\n")
+        if self._comment and line.startswith(self._comment):
+            return False
+        self._columns = len(line.split(self._sep))
+        return True
+
+    def get_failure(self):
+        if self._columns is None:
+            return "Output has no lines, expected {0} columns".format(self._count)
+        if self._columns not in self._count:
+            return "Output has {0} columns, expected {1}".format(self._columns, self._count)
+
+
+def _to_text(value):
+    return value if isinstance(value, _basestring) else "{0}".format(value)
+
+
+def _compile(expression, pattern=None):
+    try:
+        return _re.compile(pattern or expression)
+    except _re.error as e:
+        raise ValueError("Invalid regular expression {0!r}: {1}".format(expression, e))
+
+
+# supported assertions
+_ASSERTIONS = {
+    "has_text": _HasText,
+    "not_has_text": _NotHasText,
+    "has_line": _HasLine,
+    "has_line_matching": _HasLineMatching,
+    "has_text_matching": _HasTextMatching,
+    "has_n_lines": _HasNLines,
+    "has_n_columns": _HasNColumns
+}
@@ -14,6 +14,7 @@ from yaml import load as _yaml_load
 
 # wft4galaxy dependencies
 import wft4galaxy.common as _common
+from wft4galaxy.comparators import assertions as _assertions
 
 # set logger
 _logger = _common.LoggerManager.get_logger(__name__)
@@ -42,6 +43,15 @@ class Enum(object):
 # Define an Enum for supported output types
 OutputFormat = Enum(text='text', xunit='xunit')
 
+# Define an Enum for supported execution engines
+ExecutionEngine = Enum(threads='threads', coroutines='coroutines')
+
+# default maximum number of concurrent uploads of input datasets (shared by the workflow tests of a suite)
+DEFAULT_UPLOAD_JOBS = 4
+
+# default maximum number of concurrent downloads of output datasets (shared by the workflow tests of a suite)
+DEFAULT_DOWNLOAD_JOBS = 4
+
 
 class FileFormats(object):
     YAML = "YAML"
@@ -102,7 +112,13 @@ class WorkflowTestCase(object):
         with an expected output. It is also possible to specify the python function which has to be used
         to perform the actual comparison. Such a function takes two parameters, i.e., ``actual_output_filename`` and
         ``expected_output_filename``, and returns ``True`` whether the comparison between the two files succeeds and
-        ``False`` otherwise.
+        ``False`` otherwise. Comparators registered by :func:`wft4galaxy.comparators.register_comparator`
+        can be referenced by their short name (e.g., ``table``). Further keyword arguments can be passed
+        to the comparator by the ``comparator_options`` dictionary of an expected output or
+        by a ``comparator`` dictionary (e.g., ``{'name': 'table', 'rel_tol': 1e-6}``).
+        An expected output can also define a list of ``assertions`` on the content of the actual output
+        (see :class:`wft4galaxy.comparators.assertions.AssertionsChecker`), which are checked
+        while the output is downloaded; the expected ``file`` is optional for such outputs.
 
 
         :Example: Skeleton of a user-defined comparator:
@@ -115,8 +131,9 @@ class WorkflowTestCase(object):
 
 
         :Example: The example below shows an ``expected_outputs`` dictionary that configures
-            the expected output datasets for the two actual workflow outputs ``output1`` and ``output2``.
-            A user defined 'comparator' is also given to compare the expected to the actual ``output2``.
+            the expected output datasets for the actual workflow outputs ``output1``, ``output2`` and ``output3``.
+            A user defined 'comparator' is also given to compare the expected to the actual ``output2``,
+            while ``output3`` is only checked by assertions.
 
             .. code-block:: python
 
@@ -125,6 +142,9 @@ class WorkflowTestCase(object):
                     'output2': {
                         'comparator': 'filecmp.cmp',
                         'file': 'change_case_2/expected_output_2'
+                    },
+                    'output3': {
+                        'assertions': [{'has_line': {'line': 'THE END'}}, {'has_n_lines': {'n': 46}}]
                     }
                 }
 
@@ -379,9 +399,11 @@ class WorkflowTestCase(object):
         :param expected_outputs: a dictionary structured as specified in :class:`WorkflowTestCase`
         """
         for name, config in _iteritems(expected_outputs):
-            self.add_expected_output(name, config["file"], config.get("comparator"))
+            self.add_expected_output(name, config.get("file"), config.get("comparator"),
+                                     config.get("comparator_options"), config.get("assertions"))
 
-    def add_expected_output(self, name, filename, comparator="filecmp.cmp"):
+    def add_expected_output(self, name, filename=None, comparator="filecmp.cmp", comparator_options=None,
+                            assertions=None):
         """
         Add a new expected output to the workflow test configuration.
 
@@ -391,12 +413,30 @@ class WorkflowTestCase(object):
         :type filename: str
         :param filename: the path (relative to the ``base_path``) of the file containing the expected output dataset
 
-        :type comparator: str
-        :param comparator: a fully qualified name of a `comparator`function (see :class:`WorkflowTestCase`)
+        :type comparator: str or dict
+        :param comparator: the name of a registered `comparator`, a fully qualified name of a `comparator` function
+            or a dictionary with the ``name`` of the `comparator` and its options (see :class:`WorkflowTestCase`)
+
+        :type comparator_options: dict
+        :param comparator_options: optional keyword arguments of the `comparator` function
+
+        :type assertions: list
+        :param assertions: optional assertions on the content of the output
+            (see :class:`wft4galaxy.comparators.assertions.AssertionsChecker`),
+            checked in place of or in addition to the comparison with the expected output file
         """
         if not name:
             raise ValueError("Input name not defined")
+        if not filename and not assertions:
+            raise ValueError("Expected output '{0}': neither a file nor assertions defined".format(name))
+        if assertions:
+            # validate assertions
+            _assertions.AssertionsChecker(assertions)
         self._expected_outputs[name] = {"name": name, "file": filename, "comparator": comparator}
+        if comparator_options:
+            self._expected_outputs[name]["comparator_options"] = comparator_options
+        if assertions:
+            self._expected_outputs[name]["assertions"] = assertions
 
     def remove_expected_output(self, name):
         """
@@ -537,8 +577,48 @@ class WorkflowTestCase(object):
         return config
 
     def run(self, galaxy_url=None, galaxy_api_key=None, output_folder=None,
-            enable_xunit=False, xunit_file=None, verbosity=0,
+            enable_xunit=False, xunit_file=None, verbosity=0, upload_jobs=None, download_jobs=None,
+            stream_outputs=None, enable_input_cache=None, enable_comparison_cache=None,
+            reuse_workflows=None, tool_index_ttl=None,
+            comparator_jobs=None, comparator_timeout=None, wait_timeout=None, trace_file=None,
             enable_logger=None, enable_debug=None, disable_cleanup=None):
+        """
+        Run this workflow test.
+
+        :type upload_jobs: int
+        :param upload_jobs: maximum number of concurrent uploads of the input datasets
+
+        :type download_jobs: int
+        :param download_jobs: maximum number of concurrent downloads of the output datasets
+
+        :type stream_outputs: bool
+        :param stream_outputs: ``True`` to compare the output datasets while they are downloaded
+
+        :type enable_input_cache: bool
+        :param enable_input_cache: ``True`` to reuse input datasets already uploaded to the Galaxy server
+
+        :type enable_comparison_cache: bool
+        :param enable_comparison_cache: ``True`` to reuse the verdicts of previous comparisons of identical outputs
+
+        :type reuse_workflows: bool
+        :param reuse_workflows: ``True`` to keep the imported workflows on the Galaxy server and reuse them across runs
+
+        :type tool_index_ttl: int
+        :param tool_index_ttl: time to live (in seconds) of the persisted index of the installed tools
+
+        :type comparator_jobs: int
+        :param comparator_jobs: number of worker processes which run the comparators of the output datasets
+
+        :type comparator_timeout: float
+        :param comparator_timeout: maximum time (in seconds) granted to each comparator
+
+        :type wait_timeout: float
+        :param wait_timeout: maximum time (in seconds) granted to Galaxy to complete the output datasets
+
+        :type trace_file: str
+        :param trace_file: path of the file (absolute or relative to the output folder) where the timed phases
+            of the workflow tests are written in the Chrome trace-event format
+        """
         _common.LoggerManager.configure_logging(
             _logging.DEBUG if enable_debug is True else _logging.INFO if enable_logger is True else _logging.ERROR)
         import wft4galaxy.runner as _runner
@@ -546,7 +626,14 @@ class WorkflowTestCase(object):
             galaxy_url, galaxy_api_key).run(self, verbosity=verbosity,
                                             output_folder=output_folder or self.output_folder,
                                             report_format="xunit" if enable_xunit else None,
-                                            report_filename=xunit_file,
+                                            report_filename=xunit_file, upload_jobs=upload_jobs,
+                                            download_jobs=download_jobs, stream_outputs=stream_outputs,
+                                            enable_input_cache=enable_input_cache,
+                                            enable_comparison_cache=enable_comparison_cache,
+                                            reuse_workflows=reuse_workflows,
+                                            tool_index_ttl=tool_index_ttl,
+                                            comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                                            wait_timeout=wait_timeout, trace_file=trace_file,
                                             enable_logger=enable_logger, enable_debug=enable_debug,
                                             disable_cleanup=disable_cleanup)
 
@@ -658,8 +745,55 @@ class WorkflowTestSuite(object):
             raise ValueError("Filename '{0}' not found".format(filename))
 
     def run(self, galaxy_url=None, galaxy_api_key=None, tests=None, output_folder=None,
-            enable_xunit=False, xunit_file=None, verbosity=0,
-            enable_logger=None, enable_debug=None, disable_cleanup=None):
+            enable_xunit=False, xunit_file=None, verbosity=0, jobs=None, engine=None,
+            upload_jobs=None, download_jobs=None, stream_outputs=None, enable_input_cache=None,
+            enable_comparison_cache=None, reuse_workflows=None, tool_index_ttl=None,
+            comparator_jobs=None, comparator_timeout=None,
+            wait_timeout=None, trace_file=None, enable_logger=None, enable_debug=None, disable_cleanup=None):
+        """
+        Run the workflow tests of this suite.
+
+        :type jobs: int
+        :param jobs: maximum number of workflow tests which can run concurrently (default is 1)
+
+        :type engine: str
+        :param engine: the execution engine used to run concurrent tests (see :data:`ExecutionEngine`):
+            ``threads`` (default) or ``coroutines``
+
+        :type upload_jobs: int
+        :param upload_jobs: maximum number of concurrent uploads of the input datasets of the workflow tests
+
+        :type download_jobs: int
+        :param download_jobs: maximum number of concurrent downloads of the output datasets
+
+        :type stream_outputs: bool
+        :param stream_outputs: ``True`` to compare the output datasets while they are downloaded
+
+        :type enable_input_cache: bool
+        :param enable_input_cache: ``True`` to reuse input datasets already uploaded to the Galaxy server
+
+        :type enable_comparison_cache: bool
+        :param enable_comparison_cache: ``True`` to reuse the verdicts of previous comparisons of identical outputs
+
+        :type reuse_workflows: bool
+        :param reuse_workflows: ``True`` to keep the imported workflows on the Galaxy server and reuse them across runs
+
+        :type tool_index_ttl: int
+        :param tool_index_ttl: time to live (in seconds) of the persisted index of the installed tools
+
+        :type comparator_jobs: int
+        :param comparator_jobs: number of worker processes which run the comparators of the output datasets
+
+        :type comparator_timeout: float
+        :param comparator_timeout: maximum time (in seconds) granted to each comparator
+
+        :type wait_timeout: float
+        :param wait_timeout: maximum time (in seconds) granted to Galaxy to complete the output datasets
+
+        :type trace_file: str
+        :param trace_file: path of the file (absolute or relative to the output folder) where the timed phases
+            of the workflow tests are written in the Chrome trace-event format
+        """
         _common.LoggerManager.configure_logging(
             _logging.DEBUG if enable_debug is True else _logging.INFO if enable_logger is True else _logging.ERROR)
         import wft4galaxy.runner as _runner
@@ -668,6 +802,14 @@ class WorkflowTestSuite(object):
                                             output_folder=output_folder or self.output_folder,
                                             report_format="xunit" if enable_xunit else None,
                                             report_filename=xunit_file,
+                                            jobs=jobs, engine=engine, upload_jobs=upload_jobs,
+                                            download_jobs=download_jobs, stream_outputs=stream_outputs,
+                                            enable_input_cache=enable_input_cache,
+                                            enable_comparison_cache=enable_comparison_cache,
+                                            reuse_workflows=reuse_workflows,
+                                            tool_index_ttl=tool_index_ttl,
+                                            comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                                            wait_timeout=wait_timeout, trace_file=trace_file,
                                             enable_logger=enable_logger, enable_debug=enable_debug,
                                             disable_cleanup=disable_cleanup)
 
@@ -0,0 +1,614 @@
+from __future__ import print_function
+from future.utils import raise_ as _raise
+
+import sys as _sys
+import time as _time
+import threading as _threading
+import multiprocessing as _multiprocessing
+from collections import deque as _deque
+from multiprocessing.pool import ThreadPool as _ThreadPool
+
+# wft4galaxy dependencies
+from wft4galaxy import common as _common
+
+# package level logger
+_logger = _common.LoggerManager.get_logger(__name__)
+
+# Galaxy dataset states
+OK_STATES = ("ok", "empty")
+# Galaxy pauses the datasets downstream of a failed job: they never complete by themselves
+ERROR_STATES = ("error", "failed_metadata", "discarded", "paused")
+TERMINAL_STATES = OK_STATES + ERROR_STATES
+
+# states of datasets which are waiting for a job to start
+QUEUED_STATES = ("new", "upload", "queued")
+
+# polling intervals (in seconds)
+DEFAULT_POLLING_INTERVAL = 0.5
+MAX_POLLING_INTERVAL = 10.0
+POLLING_BACKOFF_FACTOR = 1.5
+
+# time (in seconds) granted to idle comparator workers to exit
+WORKER_SHUTDOWN_TIMEOUT = 5.0
+
+# default number of threads which run the blocking calls of the workflow tests multiplexed by the engine
+DEFAULT_ENGINE_CALL_THREADS = 4
+
+
+class ComparatorTimeoutError(RuntimeError):
+    """ Raised when a comparator does not complete within its timeout. """
+
+
+class DatasetsWaitTimeoutError(RuntimeError):
+    """ Raised when the datasets of a :class:`DatasetsWait` request do not complete within its timeout. """
+
+
+class DatasetsWait(object):
+    """
+    Request issued by the steps of a workflow test to suspend its execution
+    until a set of datasets of a Galaxy history reaches a terminal state.
+    """
+
+    def __init__(self, history, datasets, timeout=None):
+        """
+        :type history: :class:`bioblend.galaxy.objects.wrappers.History`
+        :param history: the history containing the datasets
+
+        :type datasets: list
+        :param datasets: list of :class:`bioblend.galaxy.objects.wrappers.HistoryDatasetAssociation` instances
+
+        :type timeout: float
+        :param timeout: maximum time (in seconds) granted to the datasets to reach a terminal state
+            (``None`` means no limit)
+        """
+        self.history = history
+        self.datasets = list(datasets)
+        self.timeout = timeout
+        self.created = _time.time()
+        # time (in seconds since the epoch) at which the first job left the queue, as observed by polling
+        self.started = None
+
+    def __str__(self):
+        return "DatasetsWait: history={0}, datasets=[{1}]".format(
+            self.history.id if self.history else None, ",".join([d.id for d in self.datasets]))
+
+    def check(self):
+        """
+        Refresh the state of the pending datasets.
+
+        :rtype: bool
+        :return: ``True`` if all datasets are in a terminal state; ``False`` otherwise.
+            A ``RuntimeError`` is raised if a dataset is in an error state.
+        """
+        for ds in self.datasets:
+            ds.refresh()
+        return self.update({ds.id: ds.state for ds in self.datasets})
+
+    def update(self, states):
+        """
+        Update the request with a map <DATASET_ID>:<STATE> of known dataset states.
+
+        :type states: dict
+        :param states: map of dataset states
+
+        :rtype: bool
+        :return: ``True`` if all datasets are in a terminal state; ``False`` otherwise.
+            A ``RuntimeError`` is raised if a dataset is in an error state
+            and a :class:`DatasetsWaitTimeoutError` if the request has timed out.
+        """
+        done = True
+        for ds in self.datasets:
+            state = states.get(ds.id)
+            if self.started is None and state is not None and state not in QUEUED_STATES:
+                self.started = _time.time()
+            if state in ERROR_STATES:
+                raise RuntimeError("Dataset '{0}' (id: {1}) is in state '{2}'".format(ds.name, ds.id, state))
+            if state not in OK_STATES:
+                done = False
+        if not done and self.timeout is not None and _time.time() - self.created > self.timeout:
+            raise DatasetsWaitTimeoutError("Datasets [{0}] not completed after {1} seconds".format(
+                ",".join([d.id for d in self.datasets]), self.timeout))
+        return done
+
+
+class Call(object):
+    """
+    Request issued by the steps of a workflow test to run a blocking function (e.g., an upload or a download)
+    and to be resumed with its result. The :func:`drive` function runs the call in the current thread,
+    whereas the :class:`WorkflowTestsEngine` runs it on a helper thread while the other tests go on.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        """
+        :type fn: callable
+        :param fn: the function to call with the given positional and keyword arguments
+        """
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return "Call: {0}".format(getattr(self.fn, "__name__", self.fn))
+
+    def __call__(self):
+        return self.fn(*self.args, **self.kwargs)
+
+
+def wait(request, polling_interval=DEFAULT_POLLING_INTERVAL):
+    """
+    Block until the given request is satisfied.
+
+    :type request: :class:`DatasetsWait`
+    :param request: the request to wait for
+    """
+    if request is None:
+        return
+    while not request.check():
+        _time.sleep(polling_interval)
+
+
+def drive(steps, wait_fn=wait):
+    """
+    Run the steps of a workflow test to completion within the current thread,
+    blocking on each request which they issue.
+
+    :type steps: generator
+    :param steps: a generator of :class:`DatasetsWait` and :class:`Call` requests
+
+    :type wait_fn: callable
+    :param wait_fn: the function which blocks until a :class:`DatasetsWait` request is satisfied
+    """
+    value, exc_info = None, None
+    while True:
+        try:
+            request = steps.throw(exc_info[1]) if exc_info else steps.send(value)
+        except StopIteration:
+            return
+        value, exc_info = None, None
+        try:
+            value = request() if isinstance(request, Call) else wait_fn(request)
+        except Exception:
+            exc_info = _sys.exc_info()
+
+
+class StatusPoller(object):
+    """
+    Suite-wide poller of the state of the datasets which running workflow tests are waiting for.
+
+    Pending requests are grouped by history and the state of all their datasets is fetched
+    by a single history-contents call per history. The polling interval backs off
+    while the tracked jobs are queued and it is reset as soon as the states change
+    or most of the tracked datasets are complete.
+    """
+
+    def __init__(self, galaxy_instance, min_interval=DEFAULT_POLLING_INTERVAL,
+                 max_interval=MAX_POLLING_INTERVAL, backoff_factor=POLLING_BACKOFF_FACTOR):
+        """
+        :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+        :param galaxy_instance: the Galaxy instance to poll
+
+        :type min_interval: float
+        :param min_interval: minimum time (in seconds) between two polling rounds
+
+        :type max_interval: float
+        :param max_interval: maximum time (in seconds) between two polling rounds
+
+        :type backoff_factor: float
+        :param backoff_factor: growth factor of the polling interval while jobs are queued
+        """
+        self._galaxy_instance = galaxy_instance
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff_factor = backoff_factor
+        self._interval = min_interval
+        self._requests = {}
+        self._states = {}
+        self._lock = _threading.Lock()
+        self._thread = None
+
+    @property
+    def interval(self):
+        """
+        The current polling interval (in seconds).
+        """
+        return self._interval
+
+    def register(self, request, callback):
+        """
+        Track a request until it is satisfied.
+
+        :type request: :class:`DatasetsWait`
+        :param request: the request to track
+
+        :type callback: callable
+        :param callback: a function called with the ``exc_info`` triple of the raised exception
+            (or ``None``) as soon as the request is satisfied (or failed)
+        """
+        with self._lock:
+            self._requests[request] = callback
+            self._interval = self._min_interval
+
+    def wait(self, request):
+        """
+        Block the calling thread until the given request is satisfied.
+        Requests of all the waiting threads are served by one background polling thread.
+
+        :type request: :class:`DatasetsWait`
+        :param request: the request to wait for
+        """
+        if request is None:
+            return
+        outcome = []
+        event = _threading.Event()
+
+        def notify(exc_info):
+            outcome.append(exc_info)
+            event.set()
+
+        self.register(request, notify)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = _threading.Thread(target=self._poll_forever, name="StatusPoller")
+                self._thread.daemon = True
+                self._thread.start()
+        while not event.wait(self._max_interval):
+            pass
+        if outcome[0]:
+            _raise(*outcome[0])
+
+    def _poll_forever(self):
+        while True:
+            with self._lock:
+                if not self._requests:
+                    self._thread = None
+                    return
+            self.poll()
+            _time.sleep(self._interval)
+
+    def poll(self):
+        """
+        Perform a polling round, notifying the satisfied requests and updating the polling interval.
+
+        :rtype: int
+        :return: the number of notified requests
+        """
+        with self._lock:
+            requests = list(self._requests.items())
+        if not requests:
+            return 0
+        # group requests by history
+        histories = {}
+        for request, callback in requests:
+            histories.setdefault(request.history.id, []).append((request, callback))
+        # fetch states in batch
+        states = {}
+        for history_id in histories:
+            try:
+                contents = self._galaxy_instance.gi.histories.show_history(history_id, contents=True)
+                states.update({c["id"]: c.get("state") for c in contents})
+            except Exception as e:
+                _logger.warning("Unable to get the contents of the history %s: %s", history_id, e)
+        # notify satisfied requests
+        notified = []
+        for history_id, history_requests in histories.items():
+            for request, callback in history_requests:
+                exc_info = None
+                try:
+                    if not request.update(states):
+                        continue
+                except Exception:
+                    exc_info = _sys.exc_info()
+                notified.append(request)
+                callback(exc_info)
+        with self._lock:
+            for request in notified:
+                del self._requests[request]
+            self._update_interval(states, len(notified) > 0)
+        _logger.debug("Polled %d histories: %d requests notified, next round in %.1fs",
+                      len(histories), len(notified), self._interval)
+        return len(notified)
+
+    def _update_interval(self, states, notified):
+        tracked = [states.get(ds.id) for request in self._requests for ds in request.datasets]
+        changed = any(self._states.get(k) != v for k, v in states.items())
+        completed = len([s for s in tracked if s in TERMINAL_STATES])
+        if notified or changed or completed * 2 >= len(tracked):
+            self._interval = self._min_interval
+        elif all(s in QUEUED_STATES for s in tracked if s not in TERMINAL_STATES):
+            self._interval = min(self._interval * self._backoff_factor, self._max_interval)
+        self._states = states
+
+
+class WorkflowTestsEngine(object):
+    """
+    Single-threaded engine which multiplexes the execution of many workflow tests.
+
+    Each workflow test is provided as a generator of steps (see :meth:`WorkflowTestCaseRunner.run_test_steps`):
+    the engine advances a generator until it issues a request and resumes it as soon as the request is satisfied.
+    :class:`DatasetsWait` requests are tracked by the :class:`StatusPoller`, so that only one thread
+    is needed to keep many workflow invocations in flight, whereas :class:`Call` requests
+    (i.e., the uploads, downloads and comparisons of the tests) run on a small pool of helper threads.
+    """
+
+    def __init__(self, poller, max_in_flight=None, call_threads=DEFAULT_ENGINE_CALL_THREADS):
+        """
+        :type poller: :class:`StatusPoller`
+        :param poller: the poller which tracks the requests of the running tests
+
+        :type max_in_flight: int
+        :param max_in_flight: maximum number of workflow tests which can be in flight at the same time
+            (``None`` means no limit)
+
+        :type call_threads: int
+        :param call_threads: maximum number of threads which run the :class:`Call` requests of the tests
+        """
+        self._poller = poller
+        self._max_in_flight = max_in_flight
+        self._call_threads = call_threads
+        self._call_pool = None
+        self._pending = _deque()
+        self._ready = _deque()
+        self._wakeup = _threading.Event()
+        self._in_flight = 0
+
+    def add(self, steps_factory, callback):
+        """
+        Schedule a workflow test.
+
+        :type steps_factory: callable
+        :param steps_factory: a function returning the generator of the test steps;
+            it is called when the test is started, so that pending tests hold no state
+
+        :type callback: callable
+        :param callback: a function called with the ``exc_info`` triple of the exception
+            raised by the test steps (or ``None``) when the test terminates
+        """
+        self._pending.append((steps_factory, callback))
+
+    def run(self):
+        """
+        Run all the scheduled workflow tests and wait for their termination.
+        """
+        _logger.debug("Engine started: %d scheduled tests", len(self._pending))
+        try:
+            while self._pending or self._in_flight:
+                self._start_pending()
+                if not self._ready and self._in_flight:
+                    if self._poller.poll() == 0:
+                        # sleep until the next polling round or the completion of a call
+                        self._wakeup.wait(self._poller.interval)
+                        self._wakeup.clear()
+                while self._ready:
+                    task, value, exc_info = self._ready.popleft()
+                    self._advance(task, value, exc_info)
+        finally:
+            if self._call_pool is not None:
+                self._call_pool.close()
+                self._call_pool.join()
+                self._call_pool = None
+        _logger.debug("Engine stopped")
+
+    def _start_pending(self):
+        while self._pending and (not self._max_in_flight or self._in_flight < self._max_in_flight):
+            steps_factory, callback = self._pending.popleft()
+            try:
+                steps = steps_factory()
+            except Exception:
+                callback(_sys.exc_info())
+                continue
+            self._in_flight += 1
+            self._advance((steps, callback), None, None)
+
+    def _advance(self, task, value, exc_info):
+        """
+        Resume the steps of a task until its next request, which is then registered to the poller
+        or, if it is a :class:`Call`, submitted to the helper threads.
+        """
+        steps, callback = task
+        try:
+            request = steps.throw(exc_info[1]) if exc_info else steps.send(value)
+        except StopIteration:
+            self._in_flight -= 1
+            callback(None)
+            return
+        except Exception:
+            self._in_flight -= 1
+            callback(_sys.exc_info())
+            return
+        if request is None:
+            self._ready.append((task, None, None))
+        elif isinstance(request, Call):
+            self._submit(task, request)
+        else:
+            self._poller.register(request, lambda e: self._resume(task, None, e))
+
+    def _submit(self, task, call):
+        if self._call_pool is None:
+            self._call_pool = _ThreadPool(self._call_threads)
+
+        def run():
+            try:
+                self._resume(task, call(), None)
+            except Exception:
+                self._resume(task, None, _sys.exc_info())
+
+        self._call_pool.apply_async(run)
+
+    def _resume(self, task, value, exc_info):
+        # called by the poller and by the helper threads: deques are thread-safe
+        self._ready.append((task, value, exc_info))
+        self._wakeup.set()
+
+
+class _MessageRecorder(object):
+    """
+    Stream which records what is written to it as tuples (<STREAM_NAME>, <TEXT>).
+    """
+
+    def __init__(self, name, messages):
+        self.name = name
+        self.messages = messages
+
+    def write(self, text):
+        self.messages.append((self.name, text))
+
+    def flush(self):
+        pass
+
+
+def _comparator_worker(conn):
+    """
+    Main loop of a comparator worker process: it receives tuples (<COMPARATOR>, <ARGS>)
+    and sends back tuples (``True``, <RESULT>, <MESSAGES>) or (``False``, <EXCEPTION>, <MESSAGES>)
+    until it receives ``None``, where <MESSAGES> is the list of tuples (<STREAM_NAME>, <TEXT>)
+    printed by the comparator on the standard output and error.
+    """
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        comparator, args = task
+        messages = []
+        streams = _sys.stdout, _sys.stderr
+        _sys.stdout, _sys.stderr = _MessageRecorder("stdout", messages), _MessageRecorder("stderr", messages)
+        try:
+            outcome = (True, comparator(*args))
+        except Exception as e:
+            outcome = (False, e)
+        finally:
+            _sys.stdout, _sys.stderr = streams
+        try:
+            conn.send(outcome + (messages,))
+        except Exception:
+            # the outcome cannot be pickled
+            conn.send((False, RuntimeError(repr(outcome[1])), messages))
+
+
+class ComparatorPool(object):
+    """
+    Pool of worker processes which run the comparators of output datasets,
+    so that CPU-bound comparisons of many outputs run on multiple cores without blocking
+    the runner process. Workers are started on demand and reused across comparisons;
+    a worker running a comparator for longer than the configured timeout is killed.
+
+    Comparators which cannot be pickled (e.g., locally defined functions) run in the calling thread.
+    """
+
+    def __init__(self, processes=None, timeout=None):
+        """
+        :type processes: int
+        :param processes: maximum number of worker processes (default is the number of CPUs)
+
+        :type timeout: float
+        :param timeout: maximum time (in seconds) granted to each comparator (``None`` means no limit)
+        """
+        self._processes = processes or _multiprocessing.cpu_count()
+        self._timeout = timeout
+        self._slots = _threading.BoundedSemaphore(self._processes)
+        self._idle_workers = []
+        self._lock = _threading.Lock()
+
+    @property
+    def processes(self):
+        """
+        The maximum number of worker processes.
+        """
+        return self._processes
+
+    @property
+    def timeout(self):
+        """
+        The maximum time (in seconds) granted to each comparator.
+        """
+        return self._timeout
+
+    def compare(self, comparator, actual_output_filename, expected_output_filename):
+        """
+        Run a comparator within a worker process and wait for its result.
+
+        :type comparator: callable
+        :param comparator: the comparator function
+
+        :type actual_output_filename: str
+        :param actual_output_filename: path of the actual output
+
+        :type expected_output_filename: str
+        :param expected_output_filename: path of the expected output
+
+        :rtype: bool
+        :return: the result of the comparator; exceptions raised by the comparator are re-raised
+            and a :class:`ComparatorTimeoutError` is raised if the comparator times out.
+            What the comparator prints on the standard output and error is written to
+            ``sys.stdout`` and ``sys.stderr`` of the calling thread.
+        """
+        with self._slots:
+            worker = self._get_worker()
+            process, conn = worker
+            try:
+                conn.send((comparator, (actual_output_filename, expected_output_filename)))
+            except Exception as e:
+                self._release_worker(worker)
+                _logger.warning("Unable to run the comparator %r within a worker process (%s): running it inline",
+                                comparator, e)
+                return comparator(actual_output_filename, expected_output_filename)
+            if not conn.poll(self._timeout):
+                self._kill_worker(worker)
+                raise ComparatorTimeoutError(
+                    "Comparison of '{0}' and '{1}' timed out after {2} seconds".format(
+                        actual_output_filename, expected_output_filename, self._timeout))
+            try:
+                success, value, messages = conn.recv()
+            except EOFError:
+                self._kill_worker(worker)
+                raise RuntimeError("Comparator worker (pid: {0}) exited with code {1}".format(
+                    process.pid, process.exitcode))
+            self._release_worker(worker)
+        for stream_name, text in messages:
+            getattr(_sys, stream_name).write(text)
+        if not success:
+            raise value
+        return value
+
+    def _get_worker(self):
+        with self._lock:
+            if self._idle_workers:
+                return self._idle_workers.pop()
+        parent_conn, child_conn = _multiprocessing.Pipe()
+        process = _multiprocessing.Process(target=_comparator_worker, args=(child_conn,), name="ComparatorWorker")
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        _logger.debug("Started comparator worker (pid: %s)", process.pid)
+        return process, parent_conn
+
+    def _release_worker(self, worker):
+        with self._lock:
+            self._idle_workers.append(worker)
+
+    @staticmethod
+    def _kill_worker(worker):
+        process, conn = worker
+        _logger.debug("Killing comparator worker (pid: %s)", process.pid)
+        process.terminate()
+        process.join()
+        conn.close()
+
+    def close(self):
+        """
+        Stop the idle worker processes.
+        """
+        with self._lock:
+            workers, self._idle_workers = self._idle_workers, []
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except Exception:
+                pass
+            process.join(WORKER_SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            conn.close()
@@ -0,0 +1,287 @@
+from __future__ import print_function
+from __future__ import division
+from future.utils import iteritems as _iteritems
+from future.moves.urllib.parse import urlparse as _urlparse
+from past.builtins import basestring as _basestring
+
+import re as _re
+import os as _os
+import sys as _sys
+import json as _json
+import time as _time
+import threading as _threading
+
+# requests is a dependency of bioblend
+import requests as _requests
+
+# wft4galaxy dependencies
+from wft4galaxy import common as _common
+
+# package level logger
+_logger = _common.LoggerManager.get_logger(__name__)
+
+# upper bounds (in seconds) of the buckets of the latency histograms
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# default name of the file of the API profile
+DEFAULT_API_PROFILE_FILENAME = "api-profile.json"
+
+# path segments replaced by a placeholder to group requests by endpoint:
+# encoded Galaxy IDs and numeric IDs
+_ID_SEGMENT = _re.compile(r"^(?:[0-9a-f]{16,}|\d+)$")
+
+# the active profiler and the original `requests.Session.send` method
+_active_profiler = None
+_original_send = None
+_install_lock = _threading.Lock()
+
+
+def get_active_profiler():
+    """
+    :rtype: :class:`ApiProfiler`
+    :return: the profiler which is currently recording Galaxy API calls (``None`` if profiling is disabled)
+    """
+    return _active_profiler
+
+
+class ApiProfiler(object):
+    """
+    Profiler of the calls to the Galaxy API.
+
+    While the profiler is active (see :meth:`start`), the HTTP requests addressed to the Galaxy servers
+    of the instances created by :func:`wft4galaxy.common.get_galaxy_instance` are counted per endpoint
+    and HTTP method, recording their latency (up to the response headers), a latency histogram
+    and the number of bytes sent and received (bytes of streamed responses are counted as they are consumed).
+    Path segments which are Galaxy IDs are replaced by ``{id}`` to group requests by endpoint.
+
+    .. code-block:: Python
+
+        with ApiProfiler() as profiler:
+            suite.run()
+        profiler.print_summary()
+        profiler.save("api-profile.json")
+    """
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self._servers = set()
+        self._endpoints = {}
+        self._started = None
+        self._stopped = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """
+        Start recording the Galaxy API calls.
+        """
+        global _active_profiler, _original_send
+        with _install_lock:
+            if _active_profiler is not None and _active_profiler is not self:
+                raise RuntimeError("Another API profiler is already active")
+            if _original_send is None:
+                _original_send = _requests.Session.send
+                _requests.Session.send = _profiled_send
+            _active_profiler = self
+        self._started = _time.time()
+        self._stopped = None
+        _logger.debug("API profiler started")
+
+    def stop(self):
+        """
+        Stop recording the Galaxy API calls.
+        """
+        global _active_profiler, _original_send
+        with _install_lock:
+            if _active_profiler is self:
+                _active_profiler = None
+                _requests.Session.send = _original_send
+                _original_send = None
+        if self._started is not None and self._stopped is None:
+            self._stopped = _time.time()
+        _logger.debug("API profiler stopped")
+
+    def watch(self, galaxy_instance):
+        """
+        Record the calls to the Galaxy server of the given instance.
+
+        :type galaxy_instance: :class:`bioblend.galaxy.objects.GalaxyInstance`
+        :param galaxy_instance: a Galaxy instance
+        """
+        url = _urlparse(galaxy_instance.gi.base_url)
+        with self._lock:
+            self._servers.add((url.scheme, url.netloc))
+
+    def is_watched(self, url):
+        """
+        :rtype: bool
+        :return: ``True`` if ``url`` belongs to a watched Galaxy server
+        """
+        url = _urlparse(url)
+        return (url.scheme, url.netloc) in self._servers
+
+    def record(self, method, url, latency, bytes_sent=0, bytes_received=0, error=False):
+        """
+        Record a call to the Galaxy API.
+
+        :rtype: dict
+        :return: the statistics of the endpoint of the call
+        """
+        key = (method.upper(), get_endpoint(url))
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = {"latencies": [], "errors": 0, "bytes_sent": 0, "bytes_received": 0}
+            stats["latencies"].append(latency)
+            stats["errors"] += 1 if error else 0
+            stats["bytes_sent"] += bytes_sent
+            stats["bytes_received"] += bytes_received
+        return stats
+
+    def add_bytes_received(self, stats, size):
+        with self._lock:
+            stats["bytes_received"] += size
+
+    def get_profile(self):
+        """
+        :rtype: dict
+        :return: the recorded statistics: the profiled time, the totals and, for each endpoint and method,
+            the number of calls and errors, the latencies (in seconds), their histogram and the bytes transferred
+        """
+        with self._lock:
+            endpoints = [(key, dict(stats, latencies=list(stats["latencies"])))
+                         for key, stats in _iteritems(self._endpoints)]
+        profile = []
+        for (method, endpoint), stats in endpoints:
+            latencies = sorted(stats["latencies"])
+            histogram = [0] * len(LATENCY_BUCKETS)
+            for latency in latencies:
+                histogram[next(i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound)] += 1
+            profile.append({
+                "method": method,
+                "endpoint": endpoint,
+                "calls": len(latencies),
+                "errors": stats["errors"],
+                "total_time": sum(latencies),
+                "mean_latency": sum(latencies) / len(latencies),
+                "p50_latency": _percentile(latencies, 0.50),
+                "p95_latency": _percentile(latencies, 0.95),
+                "max_latency": latencies[-1],
+                "bytes_sent": stats["bytes_sent"],
+                "bytes_received": stats["bytes_received"],
+                "latency_histogram": [{"le": "+Inf" if bound == float("inf") else bound, "count": count}
+                                      for bound, count in zip(LATENCY_BUCKETS, histogram)]
+            })
+        profile.sort(key=lambda e: e["total_time"], reverse=True)
+        end = self._stopped or _time.time()
+        return {
+            "profiled_time": end - self._started if self._started is not None else 0.0,
+            "calls": sum(e["calls"] for e in profile),
+            "errors": sum(e["errors"] for e in profile),
+            "total_time": sum(e["total_time"] for e in profile),
+            "bytes_sent": sum(e["bytes_sent"] for e in profile),
+            "bytes_received": sum(e["bytes_received"] for e in profile),
+            "endpoints": profile
+        }
+
+    def print_summary(self, stream=_sys.stderr):
+        """
+        Print a table which summarizes the recorded calls, sorted by the total time spent on each endpoint.
+        """
+        profile = self.get_profile()
+        row = "{0:<7} {1:<48} {2:>6} {3:>6} {4:>9} {5:>9} {6:>9} {7:>9} {8:>10} {9:>10}"
+        print("", file=stream)
+        print("Galaxy API profile", file=stream)
+        print(row.format("METHOD", "ENDPOINT", "CALLS", "ERRORS", "TOTAL(s)", "MEAN(ms)", "P95(ms)", "MAX(ms)",
+                         "SENT", "RECEIVED"), file=stream)
+        for e in profile["endpoints"]:
+            print(row.format(e["method"], e["endpoint"], e["calls"], e["errors"],
+                             "{0:.3f}".format(e["total_time"]), "{0:.1f}".format(e["mean_latency"] * 1000),
+                             "{0:.1f}".format(e["p95_latency"] * 1000), "{0:.1f}".format(e["max_latency"] * 1000),
+                             _format_size(e["bytes_sent"]), _format_size(e["bytes_received"])), file=stream)
+        print("{0} calls ({1} errors), {2:.3f}s spent in API calls over {3:.3f}s of profiled time".format(
+            profile["calls"], profile["errors"], profile["total_time"], profile["profiled_time"]), file=stream)
+
+    def save(self, filename):
+        """
+        Write the recorded statistics (see :meth:`get_profile`) to ``filename`` as JSON.
+        """
+        folder = _os.path.dirname(filename)
+        if folder and not _os.path.isdir(folder):
+            _os.makedirs(folder)
+        with open(filename, "w") as f:
+            _json.dump(self.get_profile(), f, indent=2)
+        _logger.info("Galaxy API profile available @ %s", filename)
+
+
+def get_endpoint(url):
+    """
+    Map the URL of a Galaxy API call to its endpoint, i.e., its path with IDs replaced by ``{id}``.
+
+    :rtype: str
+    :return: the endpoint
+    """
+    path = _urlparse(url).path
+    index = path.find("/api/")
+    if index > 0:
+        path = path[index:]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def _profiled_send(session, request, **kwargs):
+    profiler = _active_profiler
+    send = _original_send
+    if profiler is None or not profiler.is_watched(request.url):
+        return send(session, request, **kwargs)
+    bytes_sent = _body_size(request)
+    start = _time.time()
+    try:
+        response = send(session, request, **kwargs)
+    except Exception:
+        profiler.record(request.method, request.url, _time.time() - start, bytes_sent, error=True)
+        raise
+    latency = _time.time() - start
+    if not kwargs.get("stream"):
+        profiler.record(request.method, request.url, latency, bytes_sent, len(response.content),
+                        error=response.status_code >= 400)
+    else:
+        stats = profiler.record(request.method, request.url, latency, bytes_sent,
+                                error=response.status_code >= 400)
+        iter_content = response.iter_content
+
+        def counting_iter_content(*args, **kwargs):
+            for chunk in iter_content(*args, **kwargs):
+                profiler.add_bytes_received(stats, len(chunk))
+                yield chunk
+
+        response.iter_content = counting_iter_content
+    return response
+
+
+def _body_size(request):
+    body = request.body
+    if body is None:
+        return 0
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, _basestring):
+        # size of the encoded text
+        return len(body.encode("utf-8"))
+    return int(request.headers.get("Content-Length", 0))
+
+
+def _percentile(values, fraction):
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return "{0:.0f}{1}".format(size, unit) if unit == "B" else "{0:.1f}{1}".format(size, unit)
+        size /= 1024
+    return "{0:.1f}GB".format(size)
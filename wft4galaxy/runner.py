@@ -1,14 +1,20 @@
 from __future__ import print_function
+from future.utils import raise_ as _raise
 from future.utils import iteritems as _iteritems
 
 import os as _os
 import sys as _sys
 import copy as _copy
+import hashlib as _hashlib
 import time as _time
 import shutil as _shutil
 import logging as _logging
 import unittest as _unittest
+import threading as _threading
+from collections import OrderedDict as _OrderedDict
+from contextlib import contextmanager as _contextmanager
 from uuid import uuid1 as _uuid1
+from multiprocessing.pool import ThreadPool as _ThreadPool
 try:
     from StringIO import StringIO as _StringIO
 except ImportError:
@@ -20,8 +26,15 @@ from xmlrunner.result import _XMLTestResult
 
 # wft4galaxy dependencies
 import wft4galaxy.core as _core
+from wft4galaxy import cache as _cache
 from wft4galaxy import common as _common
+from wft4galaxy import engine as _engine
+from wft4galaxy import tracing as _tracing
 from wft4galaxy import comparators as _comparators
+from wft4galaxy.comparators import assertions as _assertions
+
+# size (in bytes) of the chunks of the downloaded output datasets
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
 # the encoding name needs to be one of
 # http://www.iana.org/assignments/character-sets/character-sets.xhtml
@@ -97,14 +110,32 @@ class WorkflowTestsRunner():
         if test.enable_logger or test.enable_debug:
             _common.LoggerManager.configure_logging(_logging.DEBUG if test.enable_debug else _logging.INFO)
 
-    def _make_wrappers(self, test, filter=None, output_folder=None,
-                       disable_assertions=None, disable_cleanup=None, enable_logger=None, enable_debug=None):
+    def _make_wrappers(self, test, filter=None, output_folder=None, jobs=None, engine=None,
+                       upload_jobs=None, download_jobs=None, stream_outputs=None, enable_input_cache=None,
+                       enable_comparison_cache=None, tool_index_ttl=None, comparator_jobs=None, comparator_timeout=None,
+                       wait_timeout=None, disable_assertions=None, disable_cleanup=None, enable_logger=None,
+                       enable_debug=None):
 
+        input_cache = _cache.InputDatasetCache(self._galaxy_instance) if enable_input_cache else None
+        comparison_cache = _cache.ComparisonCache() if enable_comparison_cache else None
         if isinstance(test, _core.WorkflowTestCase):
-            return WorkflowTestCaseRunner(self._galaxy_instance, self._workflow_loader, test)
+            return WorkflowTestCaseRunner(self._galaxy_instance, self._workflow_loader, test,
+                                          upload_jobs=upload_jobs, download_jobs=download_jobs,
+                                          stream_outputs=stream_outputs,
+                                          input_cache=input_cache, comparison_cache=comparison_cache,
+                                          tool_index_ttl=tool_index_ttl,
+                                          comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                                          wait_timeout=wait_timeout)
         elif isinstance(test, _core.WorkflowTestSuite):
             return WorkflowTestSuiteRunner(self._galaxy_instance, self._workflow_loader, test, filter,
                                            # output_folder=output_folder,
+                                           jobs=jobs, engine=engine,
+                                           upload_jobs=upload_jobs, download_jobs=download_jobs,
+                                           stream_outputs=stream_outputs,
+                                           input_cache=input_cache, comparison_cache=comparison_cache,
+                                           tool_index_ttl=tool_index_ttl,
+                                           comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                                           wait_timeout=wait_timeout,
                                            disable_assertions=disable_assertions, disable_cleanup=disable_cleanup,
                                            enable_logger=enable_logger, enable_debug=enable_debug)
         else:
@@ -112,10 +143,41 @@ class WorkflowTestsRunner():
 
     def run(self, test, filter=None, stream=_sys.stderr, verbosity=2,
             output_folder=None, output_suffix=None,
-            report_format=None, report_filename=None,
-            disable_assertions=None, disable_cleanup=None, enable_logger=None, enable_debug=None):
+            report_format=None, report_filename=None, jobs=None, engine=None,
+            upload_jobs=None, download_jobs=None, stream_outputs=None, enable_input_cache=None,
+            enable_comparison_cache=None, reuse_workflows=None, tool_index_ttl=None,
+            comparator_jobs=None, comparator_timeout=None,
+            wait_timeout=None, trace_file=None, disable_assertions=None, disable_cleanup=None, enable_logger=None,
+            enable_debug=None):
 
-        """ Run a single test case or a suite of test cases. """
+        """
+        Run a single test case or a suite of test cases.
+        ``jobs`` sets the maximum number of workflow tests of a suite which can run concurrently
+        (default is 1, i.e., tests run one after another) and ``engine`` the strategy
+        used to run them (see :data:`wft4galaxy.core.ExecutionEngine`).
+        ``upload_jobs`` sets the maximum number of concurrent uploads of the input datasets
+        of the workflow tests (default is :data:`wft4galaxy.core.DEFAULT_UPLOAD_JOBS`) and ``enable_input_cache``
+        enables the reuse of already uploaded input datasets (see :class:`wft4galaxy.cache.InputDatasetCache`).
+        ``enable_comparison_cache`` enables the reuse of the verdicts of previous comparisons
+        of identical outputs (see :class:`wft4galaxy.cache.ComparisonCache`).
+        ``download_jobs`` caps the number of concurrent downloads of output datasets
+        (default is :data:`wft4galaxy.core.DEFAULT_DOWNLOAD_JOBS`),
+        which are compared while the remaining ones are downloaded.
+        ``stream_outputs`` compares the outputs while they are downloaded, writing them to the output folder
+        only if they differ from the expected ones or ``disable_cleanup`` is set.
+        ``reuse_workflows`` keeps the imported workflows on the Galaxy server to reuse them across runs
+        (see :meth:`wft4galaxy.common.WorkflowLoader.set_persistent`).
+        ``tool_index_ttl`` persists the index of the installed tools for the given number of seconds
+        (see :class:`wft4galaxy.cache.ToolIndex`).
+        ``comparator_jobs`` runs the comparators of the output datasets on a pool of worker processes
+        and ``comparator_timeout`` kills the comparators which run longer than the given number of seconds
+        (see :class:`wft4galaxy.engine.ComparatorPool`).
+        ``wait_timeout`` fails the workflow tests whose outputs are not completed by Galaxy
+        within the given number of seconds.
+        ``trace_file`` writes the timed phases of the workflow tests to the given file
+        (absolute or relative to the output folder) in the Chrome trace-event format
+        (see :class:`wft4galaxy.tracing.Tracer`).
+        """
 
         # deepcopy to avoid side effects
         test = _copy.deepcopy(test)
@@ -125,9 +187,20 @@ class WorkflowTestsRunner():
                     disable_assertions=disable_assertions, disable_cleanup=disable_cleanup,
                     enable_logger=enable_logger, enable_debug=enable_debug)
 
+        # configure the reuse of workflows across runs
+        if reuse_workflows is not None:
+            self._workflow_loader.set_persistent(reuse_workflows)
+
         # prepare wrappers
         self._logger.debug("Creating unittest wrappers...")
         test_wrapper = self._make_wrappers(test, filter, output_folder=output_folder,
+                                           jobs=jobs, engine=engine,
+                                           upload_jobs=upload_jobs, download_jobs=download_jobs,
+                                           stream_outputs=stream_outputs, enable_input_cache=enable_input_cache,
+                                           enable_comparison_cache=enable_comparison_cache,
+                                           tool_index_ttl=tool_index_ttl,
+                                           comparator_jobs=comparator_jobs, comparator_timeout=comparator_timeout,
+                                           wait_timeout=wait_timeout,
                                            disable_assertions=disable_assertions, disable_cleanup=disable_cleanup,
                                            enable_logger=enable_logger, enable_debug=enable_debug)
         self._logger.debug("Creating unittest wrappers: done")
@@ -155,8 +228,14 @@ class WorkflowTestsRunner():
                 self._logger.exception(e)
 
         finally:
+            if test_wrapper.comparator_pool:
+                test_wrapper.comparator_pool.close()
             if not test.disable_cleanup:
                 test_wrapper.cleanup(test.output_folder)
+            if trace_file:
+                if not _os.path.isabs(trace_file) and not trace_file.startswith("./"):
+                    trace_file = _os.path.join(self._runner.output, trace_file)
+                test_wrapper.tracer.save(trace_file)
 
         # build and return the result wrapper
         return test_result
@@ -298,12 +377,29 @@ class _ExtendedXMLTestResult(_XMLTestResult):
             stream, descriptions, verbosity, elapsed_times)
         # store a reference to the test
         self.test = test
+        # store the durations of the phases of each workflow test
+        self._phase_durations = {}
         # store output handlers
         self._output_handlers = {}
         # register base handlers
         self.register_output_handler("xunit", self._generate_xml_report)
         self.register_output_handler("plaintext", self._generate_txt_report)
 
+    def stopTest(self, test):
+        execution_time = test.execution_time if isinstance(test, WorkflowTestCaseRunner) else None
+        if execution_time and self.callback:
+            # report the time of the execution of a concurrent workflow test instead of its replay
+            callback = self.callback
+
+            def replay_callback():
+                self.start_time, self.stop_time = execution_time
+                callback()
+
+            self.callback = replay_callback
+        super(_ExtendedXMLTestResult, self).stopTest(test)
+        if isinstance(test, WorkflowTestCaseRunner):
+            self._phase_durations[_XMLTestResult._test_method_name(test.id())] = test.phase_durations
+
     def register_output_handler(self, report_format, output_handler):
         self._output_handlers[report_format] = output_handler
 
@@ -344,13 +440,26 @@ class _ExtendedXMLTestResult(_XMLTestResult):
             testsuite = _XMLTestResult._report_testsuite(
                 suite_name, tests, doc, parentElement, self.properties
             )
-            xml_content = doc.toprettyxml(
-                indent='\t',
-                encoding=_UTF8
-            )
 
-        # Assume that test_runner.output is a stream
-        stream.write(xml_content)
+        # attach the durations (in seconds) of the phases of each workflow test to its testcase
+        for testcase in doc.getElementsByTagName('testcase'):
+            phase_durations = self._phase_durations.get(testcase.getAttribute('name'))
+            if phase_durations:
+                properties = doc.createElement('properties')
+                for phase, duration in _iteritems(phase_durations):
+                    prop = doc.createElement('property')
+                    prop.setAttribute('name', 'phase.{0}'.format(phase))
+                    prop.setAttribute('value', '%.3f' % duration)
+                    properties.appendChild(prop)
+                testcase.insertBefore(properties, testcase.firstChild)
+
+        xml_content = doc.toprettyxml(
+            indent='\t',
+            encoding=_UTF8
+        )
+
+        # Assume that test_runner.output is a stream (of text)
+        stream.write(xml_content if isinstance(xml_content, str) else xml_content.decode(_UTF8))
 
 
 class WorkflowTestCaseRunner(_unittest.TestCase):
@@ -358,22 +467,45 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
     Class responsible for launching a workflow test.
     """
 
-    def __init__(self, galaxy_instance, workflow_loader, workflow_test_config, test_suite_runner=None):
+    def __init__(self, galaxy_instance, workflow_loader, workflow_test_config, test_suite_runner=None,
+                 upload_jobs=None, download_jobs=None, stream_outputs=None, input_cache=None, comparison_cache=None,
+                 tool_index_ttl=None, comparator_jobs=None, comparator_timeout=None, wait_timeout=None):
         self._galaxy_instance = galaxy_instance
         self._workflow_loader = workflow_loader
         self._workflow_test_config = workflow_test_config
         self._test_suite_runner = test_suite_runner
+        self._poller = test_suite_runner.poller if test_suite_runner is not None \
+            else _engine.StatusPoller(galaxy_instance)
+        self._tool_index = test_suite_runner.tool_index if test_suite_runner is not None \
+            else _cache.ToolIndex(galaxy_instance, ttl=tool_index_ttl)
+        self._download_jobs = download_jobs or _core.DEFAULT_DOWNLOAD_JOBS
+        self._download_slots = test_suite_runner.download_slots if test_suite_runner is not None \
+            else _threading.BoundedSemaphore(self._download_jobs)
+        self._upload_jobs = upload_jobs or _core.DEFAULT_UPLOAD_JOBS
+        self._upload_slots = test_suite_runner.upload_slots if test_suite_runner is not None \
+            else _threading.BoundedSemaphore(self._upload_jobs)
+        self._comparator_pool = test_suite_runner.comparator_pool if test_suite_runner is not None \
+            else _make_comparator_pool(comparator_jobs, comparator_timeout)
+        self._tracer = test_suite_runner.tracer if test_suite_runner is not None else _tracing.Tracer()
+        self._phase_durations = _OrderedDict()
+        self._stream_outputs = stream_outputs
         self._disable_cleanup = workflow_test_config.disable_cleanup
         self._disable_assertions = workflow_test_config.disable_assertions
         self._output_folder = workflow_test_config.output_folder
         self._base_path = workflow_test_config.base_path
+        self._wait_timeout = wait_timeout
+        self._input_cache = input_cache
+        self._comparison_cache = comparison_cache
         self._test_cases = {}
         self._uuid = None
         self._galaxy_workflow = None
         self._file_handler = None
+        self._deferred_outcome = None
+        self._execution_start = None
+        self._execution_time = None
         self.test_result = None
 
-        setattr(self, "test_" + workflow_test_config.name, self.run_test)
+        setattr(self, "test_" + workflow_test_config.name, self._run_test)
         super(WorkflowTestCaseRunner, self).__init__("test_" + workflow_test_config.name)
 
     @property
@@ -384,10 +516,47 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         """
         return self._workflow_test_config
 
+    @property
+    def comparator_pool(self):
+        """
+        :rtype: :class:`wft4galaxy.engine.ComparatorPool`
+        :return: the pool of processes which run the comparators (``None`` if comparators run inline)
+        """
+        return self._comparator_pool
+
+    @property
+    def tracer(self):
+        """
+        :rtype: :class:`wft4galaxy.tracing.Tracer`
+        :return: the tracer which records the timed phases of the workflow test
+        """
+        return self._tracer
+
+    @property
+    def phase_durations(self):
+        """
+        :rtype: dict
+        :return: map <PHASE>:<SECONDS> of the time spent in each phase of the last run of the workflow test
+        """
+        return _OrderedDict(self._phase_durations)
+
+    @property
+    def execution_time(self):
+        """
+        :rtype: tuple
+        :return: the start and end timestamps of the execution of the workflow test
+                 outside the `unittest` framework (``None`` if it has been run as a `unittest` test)
+        """
+        return self._execution_time
+
     @property
     def worflow_test_name(self):
         return self._workflow_test_config.name
 
+    @property
+    def _log_context(self):
+        return "-".join(["WorkflowTestCase", self.worflow_test_name, self.uuid])
+
     def __str__(self):
         return "Workflow Test: '{0}'".format(self._workflow_test_config.name)
 
@@ -429,6 +598,66 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
             )
         return self._galaxy_workflow
 
+    def _run_test(self):
+        """
+        Run the workflow test which this runner is associated to.
+        The outcome of a previous :meth:`execute` call, if any, is replayed instead.
+        """
+        if self._deferred_outcome is None:
+            self._execution_time = None
+            return self.run_test()
+        test_result, exc_info = self._deferred_outcome
+        self._deferred_outcome = None
+        if exc_info:
+            _raise(*exc_info)
+        return test_result
+
+    def execute(self):
+        """
+        Run the workflow test outside the `unittest` framework, storing its outcome
+        (i.e., the test result or the raised exception) to be reported
+        when the test is later run as a `unittest` test.
+        """
+        try:
+            self.run_test()
+            self.set_outcome()
+        except Exception:
+            self.set_outcome(_sys.exc_info())
+
+    def set_outcome(self, exc_info=None):
+        """
+        Store the outcome of a workflow test executed outside the `unittest` framework,
+        together with the time of its execution.
+
+        :type exc_info: tuple
+        :param exc_info: the ``sys.exc_info()`` triple of the exception raised by the test, if any
+        """
+        end = _time.time()
+        self._execution_time = (self._execution_start or end, end)
+        self._deferred_outcome = (self.test_result, exc_info)
+
+    @_contextmanager
+    def _phase(self, name):
+        """ Private context manager which times a phase of the workflow test. """
+        start = _time.time()
+        try:
+            yield
+        finally:
+            self._add_phase(name, start, _time.time())
+
+    def _add_phase(self, name, start, end):
+        duration = self._tracer.add_span(name, start, end, track=self.worflow_test_name)
+        self._phase_durations[name] = self._phase_durations.get(name, 0.0) + duration
+
+    @staticmethod
+    def _call(fn, *args, **kwargs):
+        """ Private method which creates the request of a blocking call bound to the current log context. """
+        return _engine.Call(_bind_log_context(fn), *args, **kwargs)
+
+    def _span(self, name, **args):
+        """ Private method which times a step within a phase of the workflow test. """
+        return self._tracer.span(name, track=self.worflow_test_name, **args)
+
     def run_test(self, base_path=None, inputs=None, params=None, expected_outputs=None,
                  output_folder=None, disable_assertions=None, disable_cleanup=None,
                  enable_logger=None, enable_debug=None):
@@ -442,6 +671,34 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         :rtype: :class:`WorkflowTestResult`
         :return: the :class:`WorkflowTestResult` instance which represents the test result
         """
+        _engine.drive(self.run_test_steps(base_path=base_path, inputs=inputs, params=params,
+                                          expected_outputs=expected_outputs, output_folder=output_folder,
+                                          disable_assertions=disable_assertions, disable_cleanup=disable_cleanup,
+                                          enable_logger=enable_logger, enable_debug=enable_debug),
+                      self._poller.wait)
+        return self.test_result
+
+    def run_test_steps(self, base_path=None, inputs=None, params=None, expected_outputs=None,
+                       output_folder=None, disable_assertions=None, disable_cleanup=None,
+                       enable_logger=None, enable_debug=None):
+        """
+        Generator version of :meth:`run_test`: it runs the workflow test step by step,
+        suspending itself while waiting for Galaxy to complete the workflow execution
+        (i.e., yielding a :class:`wft4galaxy.engine.DatasetsWait` request) and while running
+        its blocking steps, i.e., the import of the workflow, the check of the required tools,
+        the creation of the history, the upload of the inputs, the invocation
+        of the workflow, the download and comparison of the outputs and the cleanup
+        (i.e., yielding a :class:`wft4galaxy.engine.Call` request).
+        The test result is available as ``test_result`` when the generator terminates.
+        """
+        return _with_log_context(self._log_context, self._run_test_steps(
+            base_path=base_path, inputs=inputs, params=params, expected_outputs=expected_outputs,
+            output_folder=output_folder, disable_assertions=disable_assertions, disable_cleanup=disable_cleanup,
+            enable_logger=enable_logger, enable_debug=enable_debug))
+
+    def _run_test_steps(self, base_path=None, inputs=None, params=None, expected_outputs=None,
+                        output_folder=None, disable_assertions=None, disable_cleanup=None,
+                        enable_logger=None, enable_debug=None):
 
         # update test settings
         if enable_logger is None \
@@ -460,22 +717,27 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         # set basepath
         base_path = self._base_path if not base_path else base_path
 
+        # reset the durations of the phases
+        self._phase_durations = _OrderedDict()
+        self._execution_start = _time.time()
+
         # load workflow
-        workflow = self.get_galaxy_workflow()
+        with self._phase("load_workflow"):
+            workflow = yield self._call(self.get_galaxy_workflow)
 
         # output folder
         if output_folder is None:
             output_folder = self._workflow_test_config.output_folder
 
-        # update logger
-        if enable_logger or enable_debug:
-            _common.LoggerManager.update_log_level(_logging.DEBUG if enable_debug else _logging.INFO)
-            if disable_cleanup:
-                self._file_handler = _common.LoggerManager.enable_log_to_file(
-                    output_folder=output_folder,
-                    log_filename="-".join(["WorkflowTestCase", self.worflow_test_name, self.uuid]) + ".log")
-        else:
-            _common.LoggerManager.update_log_level(_logging.ERROR)
+        # update logger: the log level of the tests of a suite is set once by the suite runner
+        # and the log file of each test only collects the messages logged within its log context
+        log_level = _get_log_level(enable_logger, enable_debug)
+        if self._test_suite_runner is None:
+            _common.LoggerManager.update_log_level(log_level)
+        if (enable_logger or enable_debug) and disable_cleanup:
+            self._file_handler = _common.LoggerManager.enable_log_to_file(
+                output_folder=output_folder, log_filename=self._log_context + ".log",
+                level=log_level, context=self._log_context)
 
         _empty_logger.info("")
         _logger.info("Running workflow testcase: %r", self._workflow_test_config.name)
@@ -516,37 +778,47 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
 
         # check tools
         errors = []
-        missing_tools = self.find_missing_tools()
+        with self._phase("check_tools"):
+            missing_tools = yield self._call(self.find_missing_tools, workflow)
         if len(missing_tools) == 0:
 
             try:
 
                 # create a new history for the current test
-                history = self._galaxy_instance.histories.create(
-                    "-".join([_core.WorkflowTestCase.DEFAULT_HISTORY_NAME_PREFIX,
-                              self._workflow_test_config.name.replace(" ", ""), test_uuid]))
+                with self._phase("create_history"):
+                    history = yield self._call(
+                        self._galaxy_instance.histories.create,
+                        "-".join([_core.WorkflowTestCase.DEFAULT_HISTORY_NAME_PREFIX,
+                                  self._workflow_test_config.name.replace(" ", ""), test_uuid]))
                 _logger.info("Create a history '%s' (id: %r)", history.name, history.id)
 
                 # upload input data to the current history
                 # and generate the datamap INPUT --> DATASET
-                datamap = {}
-                for label, config in _iteritems(inputs):
-                    datamap[label] = []
-                    for filename in config["file"]:
-                        dataset_filename = filename if _os.path.isabs(filename) else _os.path.join(base_path, filename)
-                        if config["type"]:
-                            datamap[label].append(
-                                history.upload_dataset(dataset_filename, file_type=config["type"]))
-                        else:
-                            datamap[label].append(history.upload_dataset(dataset_filename))
+                with self._phase("upload_inputs"):
+                    datamap = yield self._call(self._upload_inputs, history, inputs, base_path)
 
                 # run the workflow
                 _logger.info("Workflow '%s' (id: %s) running ...", workflow.name, workflow.id)
-                outputs, output_history = workflow.run(datamap, history, params=params, wait=True, polling_interval=0.5)
+                with self._phase("invoke_workflow"):
+                    outputs, output_history = yield self._call(workflow.run, datamap, history,
+                                                               params=params, wait=False)
+                wait_request = _engine.DatasetsWait(output_history, outputs, timeout=self._wait_timeout)
+                wait_start = _time.time()
+                try:
+                    yield wait_request
+                finally:
+                    # split the wait between the time spent in the queue and the execution time
+                    wait_end = _time.time()
+                    started = min(max(wait_request.started or wait_end, wait_start), wait_end)
+                    self._add_phase("queue", wait_start, started)
+                    self._add_phase("execution", started, wait_end)
                 _logger.info("Workflow '%s' (id: %s) executed", workflow.name, workflow.id)
 
                 # check outputs
-                results, output_file_map = self._check_outputs(base_path, outputs, expected_outputs, output_folder)
+                with self._phase("check_outputs"):
+                    results, output_file_map = yield self._call(self._check_outputs, base_path, outputs,
+                                                                expected_outputs, output_folder,
+                                                                spill_outputs=disable_cleanup)
 
                 # instantiate the result object
                 test_result = _core.WorkflowTestResult(test_uuid, workflow, inputs, outputs, output_history,
@@ -559,7 +831,7 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
                                 ", ".join(["'{0}'".format(n) for n in test_result.failed_outputs]))
 
             except RuntimeError as e:
-                error_msg = "Runtime error: {0}".format(e.message)
+                error_msg = "Runtime error: {0}".format(e)
                 errors.append(error_msg)
                 _logger.debug(error_msg)
 
@@ -583,7 +855,7 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
 
         # cleanup
         if not disable_cleanup:
-            self.cleanup(output_folder)
+            yield self._call(self.cleanup, output_folder)
 
         # disable file logger
         if self._file_handler is not None:
@@ -595,7 +867,47 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
             if not disable_assertions:
                 raise AssertionError(error_msg)
 
-        return test_result
+    def _upload_inputs(self, history, inputs, base_path):
+        """
+        Private method which uploads the input datasets of the workflow test to ``history``,
+        holding one of the upload slots shared by the workflow tests for each upload. Datasets already available
+        in the input cache (if enabled) are copied instead of uploaded.
+
+        :rtype: dict
+        :return: the datamap <INPUT_LABEL>:<LIST_OF_DATASETS>, where datasets of each input
+                 are listed in the same order of the configured files
+        """
+        uploads = []
+        for label, config in _iteritems(inputs):
+            for filename in config["file"]:
+                dataset_filename = filename if _os.path.isabs(filename) else _os.path.join(base_path, filename)
+                uploads.append((label, dataset_filename, config["type"]))
+
+        def upload(item):
+            label, dataset_filename, file_type = item
+            with self._upload_slots:
+                _logger.debug("Uploading dataset '%s' (input '%s') ...", dataset_filename, label)
+                if self._input_cache:
+                    return self._input_cache.get_dataset(history, dataset_filename, file_type)
+                if file_type:
+                    return history.upload_dataset(dataset_filename, file_type=file_type)
+                return history.upload_dataset(dataset_filename)
+
+        jobs = min(self._upload_jobs, len(uploads))
+        if jobs > 1:
+            pool = _ThreadPool(jobs)
+            try:
+                datasets = pool.map(_bind_log_context(upload), uploads)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            datasets = [upload(item) for item in uploads]
+
+        datamap = {label: [] for label in inputs}
+        for (label, _, _), dataset in zip(uploads, datasets):
+            datamap[label].append(dataset)
+        return datamap
 
     def find_missing_tools(self, workflow=None):
         """
@@ -609,13 +921,8 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         """
         _logger.debug("Checking required tools ...")
         workflow = self.get_galaxy_workflow() if not workflow else workflow
-        available_tools = self._galaxy_instance.tools.list()
-        missing_tools = []
-        _logger.debug("Available tools: %s", ", ".join(["{0}, {1}".format(t.id, t.version) for t in available_tools]))
-        for order, step in _iteritems(workflow.steps):
-            if step.tool_id and len([t for t in available_tools
-                                     if t.id == step.tool_id and t.version == step.tool_version]) == 0:
-                missing_tools.append((step.tool_id, step.tool_version))
+        missing_tools = self._tool_index.find_missing_tools(
+            [(step.tool_id, step.tool_version) for order, step in _iteritems(workflow.steps) if step.tool_id])
         _logger.debug("Missing tools: {0}".format("None"
                                                   if len(missing_tools) == 0
                                                   else ", ".join(["{0} (version {1})"
@@ -623,7 +930,7 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         _logger.debug("Checking required tools: DONE")
         return missing_tools
 
-    def _check_outputs(self, base_path, actual_outputs, expected_output_map, output_folder):
+    def _check_outputs(self, base_path, actual_outputs, expected_output_map, output_folder, spill_outputs=True):
         """
         Private method responsible for comparing actual to current outputs
 
@@ -631,6 +938,7 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         :param actual_outputs:
         :param expected_output_map:
         :param output_folder:
+        :param spill_outputs: ``False`` to write streamed outputs to ``output_folder`` only when they differ
 
         :rtype: tuple
         :return: a tuple containing a :class:`WorkflowTestResult` as first element
@@ -643,34 +951,205 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
             _os.makedirs(output_folder)
 
         _logger.info("Checking test output: ...")
-        for output in actual_outputs:
-            if output.name in expected_output_map:
-                _logger.debug("Checking OUTPUT '%s' ...", output.name)
-                output_filename = _os.path.join(output_folder, output.name)
-                with open(output_filename, "wb") as out_file:
-                    output.download(out_file)
+        outputs = [output for output in actual_outputs if output.name in expected_output_map]
+        jobs = min(self._download_jobs, len(outputs))
+        if jobs > 1:
+            # pipeline: each download task submits the comparison of its output as soon as it completes,
+            # so that comparisons overlap the downloads of the remaining outputs
+            download_pool = _ThreadPool(jobs)
+            compare_pool = _ThreadPool(jobs)
+
+            def fetch_and_submit(output):
+                config = expected_output_map[output.name]
+                with self._span("download", output=output.name):
+                    output_filename, result, digest = self._fetch_output(output, config, base_path, output_folder,
+                                                                         spill_outputs)
+                comparison = compare_pool.apply_async(
+                    _bind_log_context(self._compare_output), (output, output_filename, config, base_path, digest)) \
+                    if result is None else None
+                return output_filename, result, comparison
+
+            try:
+                fetch_and_submit = _bind_log_context(fetch_and_submit)
+                tasks = [(output, download_pool.apply_async(fetch_and_submit, (output,))) for output in outputs]
+                for output, task in tasks:
+                    output_filename, result, comparison = task.get()
                     output_file_map[output.name] = {"dataset": output, "filename": output_filename}
-                    _logger.debug(
-                        "Downloaded output {0}: dataset_id '{1}', filename '{2}'".format(output.name, output.id,
-                                                                                         output_filename))
+                    if comparison:
+                        result = comparison.get()
+                    if result is not None:
+                        results[output.name] = result
+            finally:
+                download_pool.close()
+                download_pool.join()
+                compare_pool.close()
+                compare_pool.join()
+        else:
+            for output in outputs:
                 config = expected_output_map[output.name]
-                comparator_fn = config.get("comparator", None)
-                _logger.debug("Configured comparator function: %s", comparator_fn)
-                comparator = _comparators.load_comparator(comparator_fn) \
-                    if comparator_fn else _comparators.base_comparator
-                if comparator:
-                    expected_output_filename = config["file"] if _os.path.isabs(config["file"]) \
-                        else _os.path.join(base_path, config["file"])
-                    result = comparator(output_filename, expected_output_filename)
-                    _logger.debug(
-                        "Output '{0}' {1} the expected: dataset '{2}', actual-output '{3}', expected-output '{4}'"
-                            .format(output.name, "is equal to" if result else "differs from",
-                                    output.id, output_filename, expected_output_filename))
+                with self._span("download", output=output.name):
+                    output_filename, result, digest = self._fetch_output(output, config, base_path, output_folder,
+                                                                         spill_outputs)
+                output_file_map[output.name] = {"dataset": output, "filename": output_filename}
+                if result is None:
+                    result = self._compare_output(output, output_filename, config, base_path, digest)
+                if result is not None:
                     results[output.name] = result
-                _logger.debug("Checking OUTPUT '%s': DONE", output.name)
         _logger.info("Checking test output: DONE")
         return results, output_file_map
 
+    def _fetch_output(self, output, config, base_path, output_folder, spill_output=True):
+        """
+        Private method which makes an output dataset available for comparison.
+
+        If streaming is enabled and the configured comparator supports it
+        (see :func:`wft4galaxy.comparators.get_stream_comparator`), the output is compared
+        while it is downloaded and it is written to ``output_folder`` only if ``spill_output`` is ``True``
+        or it differs from the expected one (in which case it is downloaded again);
+        otherwise, it is downloaded to ``output_folder`` and, if the default comparator is configured,
+        its digest is checked against the digest of the expected output
+        (see :class:`wft4galaxy.cache.DigestManifest`) to skip the comparison of identical files.
+        The ``assertions`` of the expected output, if any, are checked while the output is downloaded
+        and the output is compared to the expected file (if any) only if they hold.
+
+        :rtype: tuple
+        :return: the path of the output file, ``True`` if the output has already been found equal
+                 to the expected one (``None`` if it still has to be compared) and the digest
+                 of the output file (``None`` if it is not known)
+        """
+        comparator = self._get_comparator(config) if config.get("file") else None
+        assertions = _assertions.AssertionsChecker(config["assertions"]) if config.get("assertions") else None
+        stream_comparator = _comparators.get_stream_comparator(comparator) \
+            if self._stream_outputs and not assertions else None
+        if not stream_comparator:
+            output_filename, digest = self._download_output(output, output_folder, assertions)
+            if assertions:
+                failures = assertions.get_failures()
+                for failure in failures:
+                    print("Output '{0}': {1}".format(output.name, failure), file=_sys.stderr)
+                _logger.debug("Checked the assertions of output '%s': %d failed", output.name, len(failures))
+                if failures or not config.get("file"):
+                    return output_filename, not failures, digest
+            # fast path: outputs identical to the expected ones are equal for the default comparator
+            if comparator is _comparators.base_comparator:
+                expected_output_filename = self._get_expected_output_filename(config, base_path)
+                if digest == _cache.DigestManifest.get_instance(base_path).get_digest(expected_output_filename):
+                    _logger.debug("Output '%s' has the same digest of the expected one", output.name)
+                    return output_filename, True, digest
+            return output_filename, None, digest
+        output_filename = _os.path.join(output_folder, output.name)
+        expected_output_filename = self._get_expected_output_filename(config, base_path)
+        digest = _hashlib.new(_cache.DIGEST_ALGORITHM) if spill_output else None
+        with self._download_slots:
+            _logger.debug("Streaming OUTPUT '%s' ...", output.name)
+            response = _open_output_stream(output)
+            try:
+                if spill_output:
+                    # the streamed bytes are spilled to the output file, so that a differing output
+                    # is available to the comparator without downloading it again
+                    with open(output_filename, "wb") as out_file:
+                        chunks = _tee(response.iter_content(DOWNLOAD_CHUNK_SIZE), out_file, digest)
+                        equal = stream_comparator(chunks, expected_output_filename)
+                        # consume the rest of the stream skipped by the comparator
+                        for _ in chunks:
+                            pass
+                else:
+                    equal = stream_comparator(response.iter_content(DOWNLOAD_CHUNK_SIZE), expected_output_filename)
+            finally:
+                response.close()
+        _logger.debug("Streamed output {0}: dataset_id '{1}', {2}".format(
+            output.name, output.id, "equal to the expected one" if equal else "mismatch found"))
+        if equal:
+            return output_filename, True, None
+        if not spill_output:
+            # the streamed bytes have not been written: a differing output is downloaded
+            # to the output folder to be available to the comparator
+            output_filename, digest = self._download_output(output, output_folder)
+            return output_filename, None, digest
+        return output_filename, None, digest.hexdigest()
+
+    def _download_output(self, output, output_folder, assertions=None):
+        """
+        Private method which downloads an output dataset to ``output_folder``,
+        holding one of the download slots shared by the workflow tests.
+        The digest of the output is computed and the given ``assertions``
+        (see :class:`wft4galaxy.comparators.assertions.AssertionsChecker`) are checked while it is written.
+
+        :rtype: tuple
+        :return: the path of the downloaded file and its hex digest
+        """
+        output_filename = _os.path.join(output_folder, output.name)
+        digest = _hashlib.new(_cache.DIGEST_ALGORITHM)
+        with self._download_slots:
+            _logger.debug("Downloading OUTPUT '%s' ...", output.name)
+            response = _open_output_stream(output)
+            try:
+                with open(output_filename, "wb") as out_file:
+                    for chunk in _tee(response.iter_content(DOWNLOAD_CHUNK_SIZE), out_file, digest):
+                        if assertions:
+                            assertions.feed(chunk)
+            finally:
+                response.close()
+        _logger.debug("Downloaded output {0}: dataset_id '{1}', filename '{2}'".format(output.name, output.id,
+                                                                                       output_filename))
+        return output_filename, digest.hexdigest()
+
+    @staticmethod
+    def _get_comparator(config):
+        comparator_fn = config.get("comparator", None)
+        _logger.debug("Configured comparator function: %s", comparator_fn)
+        return _comparators.get_comparator(comparator_fn, config.get("comparator_options"))
+
+    @staticmethod
+    def _get_expected_output_filename(config, base_path):
+        return config["file"] if _os.path.isabs(config["file"]) else _os.path.join(base_path, config["file"])
+
+    def _compare_output(self, output, output_filename, config, base_path, digest=None):
+        """
+        Private method which compares a downloaded output to the expected one.
+        If the comparison cache is enabled, the verdict of a previous comparison
+        of the same files by the same comparator is reused (see :class:`wft4galaxy.cache.ComparisonCache`),
+        replaying the messages printed by the comparator when the verdict was computed.
+
+        :rtype: bool
+        :return: the result of the configured comparator (``None`` if it cannot be loaded)
+        """
+        with self._span("compare", output=output.name):
+            _logger.debug("Checking OUTPUT '%s' ...", output.name)
+            result = None
+            comparator = self._get_comparator(config)
+            if comparator:
+                expected_output_filename = self._get_expected_output_filename(config, base_path)
+                diff_filename = output_filename + ".diff"
+                cache_key = None
+                if self._comparison_cache:
+                    cache_key = _cache.ComparisonCache.get_key(
+                        digest or _common.file_digest(output_filename, algorithm=_cache.DIGEST_ALGORITHM),
+                        _cache.DigestManifest.get_instance(base_path).get_digest(expected_output_filename),
+                        config.get("comparator"), config.get("comparator_options"),
+                        _cache.get_comparator_version(comparator))
+                    result = self._comparison_cache.get(cache_key, diff_filename, replay_messages=True)
+                    if result is not None:
+                        _logger.debug("Output '%s': reusing the cached comparison verdict", output.name)
+                    elif _os.path.exists(diff_filename):
+                        # remove the stale diff of a previous run
+                        _os.remove(diff_filename)
+                if result is None:
+                    with _record_output() as messages:
+                        if self._comparator_pool:
+                            result = self._comparator_pool.compare(
+                                comparator, output_filename, expected_output_filename)
+                        else:
+                            result = comparator(output_filename, expected_output_filename)
+                    if cache_key:
+                        self._comparison_cache.put(cache_key, result, diff_filename, messages)
+                _logger.debug(
+                    "Output '{0}' {1} the expected: dataset '{2}', actual-output '{3}', expected-output '{4}'"
+                        .format(output.name, "is equal to" if result else "differs from",
+                                output.id, output_filename, expected_output_filename))
+        _logger.debug("Checking OUTPUT '%s': DONE", output.name)
+        return result
+
     def cleanup(self, output_folder=None):
         """
         Perform a complete clean up of the data produced during the execution of a workflow test,
@@ -678,17 +1157,22 @@ class WorkflowTestCaseRunner(_unittest.TestCase):
         output datasets (downloaded from Galaxy) are deleted from the output path of the local file system.
         """
         _logger.debug("Cleanup of workflow test '%s'...", self._uuid)
-        for test_uuid, test_result in _iteritems(self._test_cases):
-            if test_result.output_history:
-                self._galaxy_instance.histories.delete(test_result.output_history.id)
-            self.cleanup_output_folder(test_result)
-        if self._galaxy_workflow:
-            self._workflow_loader.unload_workflow(self._galaxy_workflow.id)
-            self._galaxy_workflow = None
-        _logger.debug("Cleanup of workflow test '%s': DONE", self._uuid)
-        if output_folder and _os.path.exists(output_folder):
-            _shutil.rmtree(output_folder)
-            _logger.debug("Deleted WF output folder '%s': DONE", output_folder)
+        with self._phase("cleanup"):
+            for test_uuid, test_result in _iteritems(self._test_cases):
+                if test_result.output_history:
+                    with self._span("delete_history", history=test_result.output_history.id):
+                        self._galaxy_instance.histories.delete(test_result.output_history.id)
+                with self._span("delete_outputs"):
+                    self.cleanup_output_folder(test_result)
+            if self._galaxy_workflow:
+                with self._span("unload_workflow", workflow=self._galaxy_workflow.id):
+                    self._workflow_loader.unload_workflow(self._galaxy_workflow.id)
+                self._galaxy_workflow = None
+            _logger.debug("Cleanup of workflow test '%s': DONE", self._uuid)
+            if output_folder and _os.path.exists(output_folder):
+                with self._span("delete_output_folder"):
+                    _shutil.rmtree(output_folder)
+                _logger.debug("Deleted WF output folder '%s': DONE", output_folder)
 
     def cleanup_output_folder(self, test_result=None):
         """
@@ -709,6 +1193,9 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
     """
 
     def __init__(self, galaxy_instance, workflow_loader, suite, filter=None, output_folder=".",
+                 jobs=None, engine=None, upload_jobs=None, download_jobs=None, stream_outputs=None,
+                 input_cache=None, comparison_cache=None, tool_index_ttl=None,
+                 comparator_jobs=None, comparator_timeout=None, wait_timeout=None,
                  enable_logger=None, enable_debug=None, disable_cleanup=None, disable_assertions=None):
 
         """
@@ -721,14 +1208,61 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
         :type galaxy_api_key: str
         :param galaxy_api_key: an API key from your Galaxy server instance.  If ``none``, the environment variable
             ``GALAXY_API_KEY`` is used. An error is raised when such a variable cannot be found.
+
+        :type jobs: int
+        :param jobs: maximum number of workflow tests which can run concurrently (default is 1)
+
+        :type engine: str
+        :param engine: the execution engine (see :data:`wft4galaxy.core.ExecutionEngine`):
+            ``threads`` (default) runs concurrent tests on a pool of ``jobs`` threads,
+            ``coroutines`` multiplexes up to ``jobs`` in-flight tests within the current thread
+
+        :type upload_jobs: int
+        :param upload_jobs: maximum number of concurrent uploads of input datasets (shared by all the workflow tests)
+
+        :type download_jobs: int
+        :param download_jobs: maximum number of concurrent downloads of output datasets
+            (shared by all the workflow tests)
+
+        :type stream_outputs: bool
+        :param stream_outputs: ``True`` to compare the output datasets while they are downloaded
+
+        :type input_cache: :class:`wft4galaxy.cache.InputDatasetCache`
+        :param input_cache: the optional cache of input datasets shared by the workflow tests
+
+        :type comparison_cache: :class:`wft4galaxy.cache.ComparisonCache`
+        :param comparison_cache: the optional cache of comparison verdicts shared by the workflow tests
+
+        :type tool_index_ttl: int
+        :param tool_index_ttl: time to live (in seconds) of the persisted index of the installed tools
+            (``None`` to build the index once per run)
+
+        :type comparator_jobs: int
+        :param comparator_jobs: number of worker processes which run the comparators of the output datasets
+            (``None`` to run comparators within the runner process)
+
+        :type comparator_timeout: float
+        :param comparator_timeout: maximum time (in seconds) granted to each comparator
+
+        :type wait_timeout: float
+        :param wait_timeout: maximum time (in seconds) granted to Galaxy to complete the outputs of each workflow test
         """
 
         super(WorkflowTestSuiteRunner, self).__init__()
         self._uuid = str(_uuid1())
         self._suite = suite
+        self._jobs = jobs or 1
+        self._engine = engine or _core.ExecutionEngine.threads
+        self._upload_jobs = upload_jobs or _core.DEFAULT_UPLOAD_JOBS
+        self._download_jobs = download_jobs or _core.DEFAULT_DOWNLOAD_JOBS
+        self._wait_timeout = wait_timeout
+        self._stream_outputs = stream_outputs
+        self._input_cache = input_cache
+        self._comparison_cache = comparison_cache
         self._workflows = {}
         self._workflow_runners = []
         self._workflow_test_results = []
+        self._results_lock = _threading.Lock()
         self._galaxy_instance = None
 
         # log file handler
@@ -737,6 +1271,17 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
         self._galaxy_instance = galaxy_instance
         # initialize the workflow loader
         self._workflow_loader = workflow_loader
+        # initialize the poller shared by all the workflow tests
+        self._poller = _engine.StatusPoller(galaxy_instance)
+        # initialize the index of installed tools shared by all the workflow tests
+        self._tool_index = _cache.ToolIndex(galaxy_instance, ttl=tool_index_ttl)
+        # initialize the upload and download slots shared by all the workflow tests
+        self._upload_slots = _threading.BoundedSemaphore(self._upload_jobs)
+        self._download_slots = _threading.BoundedSemaphore(self._download_jobs)
+        # initialize the pool of comparator processes shared by all the workflow tests
+        self._comparator_pool = _make_comparator_pool(comparator_jobs, comparator_timeout)
+        # initialize the tracer shared by all the workflow tests
+        self._tracer = _tracing.Tracer()
 
         self.disable_cleanup = suite.disable_cleanup
         self.disable_assertions = suite.disable_assertions
@@ -778,6 +1323,55 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
         """
         return self._workflow_loader
 
+    @property
+    def poller(self):
+        """
+        :rtype: :class:`wft4galaxy.engine.StatusPoller`
+        :return: the :class:`wft4galaxy.engine.StatusPoller` instance shared by the workflow tests of this suite
+        """
+        return self._poller
+
+    @property
+    def tool_index(self):
+        """
+        :rtype: :class:`wft4galaxy.cache.ToolIndex`
+        :return: the index of the installed tools shared by the workflow tests of this suite
+        """
+        return self._tool_index
+
+    @property
+    def upload_slots(self):
+        """
+        :rtype: :class:`threading.BoundedSemaphore`
+        :return: the semaphore which caps the concurrent uploads of the workflow tests of this suite
+        """
+        return self._upload_slots
+
+    @property
+    def download_slots(self):
+        """
+        :rtype: :class:`threading.BoundedSemaphore`
+        :return: the semaphore which caps the concurrent downloads of the workflow tests of this suite
+        """
+        return self._download_slots
+
+    @property
+    def comparator_pool(self):
+        """
+        :rtype: :class:`wft4galaxy.engine.ComparatorPool`
+        :return: the pool of processes which run the comparators of the workflow tests of this suite
+            (``None`` if comparators run inline)
+        """
+        return self._comparator_pool
+
+    @property
+    def tracer(self):
+        """
+        :rtype: :class:`wft4galaxy.tracing.Tracer`
+        :return: the tracer which records the timed phases of the workflow tests of this suite
+        """
+        return self._tracer
+
     def _add_test_result(self, test_result):
         """
         Private method to publish a test result.
@@ -785,7 +1379,67 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
         :type test_result: :class:'WorkflowTestResult'
         :param test_result: an instance of :class:'WorkflowTestResult'
         """
-        self._workflow_test_results.append(test_result)
+        with self._results_lock:
+            self._workflow_test_results.append(test_result)
+
+    def run(self, result, debug=False):
+        """
+        Run the workflow tests of this suite. When more than one job is allowed
+        or the ``coroutines`` engine is selected, tests are executed concurrently
+        and their outcomes are then reported to ``result`` in the same order of a serial run.
+        """
+        runners = [t for t in self if isinstance(t, WorkflowTestCaseRunner)]
+        # set the log level once for all the (possibly concurrent) workflow tests
+        _common.LoggerManager.update_log_level(min(
+            [_get_log_level(self.enable_logger, self.enable_debug)] +
+            [_get_log_level(r.workflow_test_config.enable_logger, r.workflow_test_config.enable_debug)
+             for r in runners]))
+        if self._engine == _core.ExecutionEngine.coroutines:
+            self._execute_with_engine(runners)
+        elif self._jobs > 1 and len(runners) > 1:
+            self._execute_in_parallel(runners)
+        return super(WorkflowTestSuiteRunner, self).run(result, debug)
+
+    def _execute_in_parallel(self, runners):
+        """
+        Private method which executes the given test runners by means of a pool of ``jobs`` workers.
+
+        :type runners: list
+        :param runners: the list of :class:`WorkflowTestCaseRunner` instances to execute
+        """
+        _logger.info("Running %d workflow tests with %d parallel jobs ...", len(runners), self._jobs)
+        pool = _ThreadPool(min(self._jobs, len(runners)))
+        try:
+            pool.map(lambda runner: runner.execute(), runners)
+        finally:
+            pool.close()
+            pool.join()
+        self._restore_results_order(runners)
+        _logger.info("Running %d workflow tests with %d parallel jobs: DONE", len(runners), self._jobs)
+
+    def _execute_with_engine(self, runners):
+        """
+        Private method which executes the given test runners by means of
+        a single-threaded :class:`wft4galaxy.engine.WorkflowTestsEngine`.
+
+        :type runners: list
+        :param runners: the list of :class:`WorkflowTestCaseRunner` instances to execute
+        """
+        _logger.info("Running %d workflow tests with %d in-flight tests ...", len(runners), self._jobs)
+        engine = _engine.WorkflowTestsEngine(self._poller, max_in_flight=self._jobs)
+        for runner in runners:
+            engine.add(runner.run_test_steps, runner.set_outcome)
+        engine.run()
+        self._restore_results_order(runners)
+        _logger.info("Running %d workflow tests with %d in-flight tests: DONE", len(runners), self._jobs)
+
+    def _restore_results_order(self, runners):
+        """
+        Private method which sorts the collected test results in the order of a serial execution.
+        """
+        positions = {id(runner.test_result): i for i, runner in enumerate(runners)}
+        with self._results_lock:
+            self._workflow_test_results.sort(key=lambda r: positions.get(id(r), len(positions)))
 
     def _create_test_runner(self, workflow_test_config,
                             enable_logger=None, enable_debug=None, disable_cleanup=None, disable_assertions=None):
@@ -803,7 +1457,10 @@ class WorkflowTestSuiteRunner(_unittest.TestSuite):
                        enable_logger=enable_logger, enable_debug=enable_debug,
                        disable_cleanup=disable_cleanup, disable_assertions=disable_assertions)
         # create a new runner instance
-        runner = WorkflowTestCaseRunner(self.galaxy_instance, self.workflow_loader, workflow_test_config, self)
+        runner = WorkflowTestCaseRunner(self.galaxy_instance, self.workflow_loader, workflow_test_config, self,
+                                        upload_jobs=self._upload_jobs, download_jobs=self._download_jobs,
+                                        stream_outputs=self._stream_outputs, wait_timeout=self._wait_timeout,
+                                        input_cache=self._input_cache, comparison_cache=self._comparison_cache)
         self._workflow_runners.append(runner)
         return runner
 
@@ -870,6 +1527,143 @@ class _DelegateIO(object):
         return getattr(self._captured, attr)
 
 
+class _OutputRecorder(object):
+    """
+    Proxy of the standard output (or error) which records what the registered threads write to it.
+    """
+
+    def __init__(self, name, delegate):
+        self.name = name
+        self.delegate = delegate
+        self.records = {}
+
+    def write(self, text):
+        self.delegate.write(text)
+        record = self.records.get(_threading.current_thread().ident)
+        if record is not None:
+            record.append((self.name, text))
+
+    def __getattr__(self, attr):
+        return getattr(self.delegate, attr)
+
+
+# serializes the installation and the removal of the output recorders
+_output_recorders_lock = _threading.Lock()
+
+
+@_contextmanager
+def _record_output():
+    """
+    Record what the current thread writes to ``sys.stdout`` and ``sys.stderr`` within the context
+    (still writing it to the actual streams).
+
+    :rtype: list
+    :return: the list of the written tuples (<STREAM_NAME>, <TEXT>)
+    """
+    records = []
+    thread_id = _threading.current_thread().ident
+    recorders = []
+    with _output_recorders_lock:
+        for name in ("stdout", "stderr"):
+            stream = getattr(_sys, name)
+            recorder = stream if isinstance(stream, _OutputRecorder) else _OutputRecorder(name, stream)
+            recorder.records[thread_id] = records
+            setattr(_sys, name, recorder)
+            recorders.append(recorder)
+    try:
+        yield records
+    finally:
+        with _output_recorders_lock:
+            for recorder in recorders:
+                del recorder.records[thread_id]
+                if not recorder.records and getattr(_sys, recorder.name) is recorder:
+                    setattr(_sys, recorder.name, recorder.delegate)
+
+
+def _make_comparator_pool(comparator_jobs=None, comparator_timeout=None):
+    """
+    Create the pool of processes which run comparators, if enabled by any of the given options.
+
+    :rtype: :class:`wft4galaxy.engine.ComparatorPool`
+    :return: the configured pool (``None`` if comparators have to run inline)
+    """
+    if not comparator_jobs and not comparator_timeout:
+        return None
+    return _engine.ComparatorPool(comparator_jobs, timeout=comparator_timeout)
+
+
+def _get_log_level(enable_logger=None, enable_debug=None):
+    return _logging.DEBUG if enable_debug else _logging.INFO if enable_logger else _logging.ERROR
+
+
+def _with_log_context(context, steps):
+    """
+    Run the steps of a workflow test (see :meth:`WorkflowTestCaseRunner.run_test_steps`)
+    within the given log context, which is restored whenever they are suspended.
+    """
+    value, exc_info = None, None
+    while True:
+        previous_context = _common.LoggerManager.set_log_context(context)
+        try:
+            request = steps.throw(*exc_info) if exc_info else steps.send(value)
+        except StopIteration:
+            return
+        finally:
+            _common.LoggerManager.set_log_context(previous_context)
+        value, exc_info = None, None
+        try:
+            value = yield request
+        except GeneratorExit:
+            steps.close()
+            raise
+        except Exception:
+            exc_info = _sys.exc_info()
+
+
+def _bind_log_context(fn):
+    """
+    Bind ``fn`` to the log context of the calling thread, so that the messages
+    which it logs when called by the threads of a pool are attributed to the same workflow test.
+    """
+    context = _common.LoggerManager.get_log_context()
+
+    def wrapper(*args, **kwargs):
+        previous_context = _common.LoggerManager.set_log_context(context)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _common.LoggerManager.set_log_context(previous_context)
+
+    return wrapper
+
+
+def _open_output_stream(output):
+    """
+    Open the stream of the content of an output dataset.
+    Unlike ``output.get_stream()``, it returns the HTTP response, which can be closed
+    to release its connection when the stream is not consumed to its end.
+
+    :type output: :class:`bioblend.galaxy.objects.wrappers.HistoryDatasetAssociation`
+    :param output: the output dataset
+
+    :rtype: :class:`requests.Response`
+    """
+    response = output.gi.gi.make_get_request(output._stream_url, stream=True)
+    response.raise_for_status()
+    return response
+
+
+def _tee(chunks, out_file, digest=None):
+    """
+    Iterate over ``chunks`` writing each of them to ``out_file`` and updating the optional ``digest``.
+    """
+    for chunk in chunks:
+        out_file.write(chunk)
+        if digest is not None:
+            digest.update(chunk)
+        yield chunk
+
+
 def _update_config(config, enable_logger=None, output_folder=None,
                    enable_debug=None, disable_cleanup=None, disable_assertions=None):
     if enable_logger is not None:
@@ -891,7 +1685,7 @@ def cleanup_test_workflows(galaxy_url=None, galaxy_api_key=None):
     wflist = galaxy_instance.workflows.list()
     workflows = [w for w in wflist if _core.WorkflowTestCase.DEFAULT_WORKFLOW_NAME_PREFIX in w.name]
     for wf in workflows:
-        workflow_loader.unload_workflow(wf.id)
+        workflow_loader.unload_workflow(wf.id, force=True)
 
 
 def cleanup_test_workflow_data(galaxy_url=None, galaxy_api_key=None):
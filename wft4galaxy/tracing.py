@@ -0,0 +1,95 @@
+from __future__ import print_function
+
+import os as _os
+import json as _json
+import time as _time
+import threading as _threading
+from contextlib import contextmanager as _contextmanager
+
+# wft4galaxy dependencies
+from wft4galaxy import common as _common
+
+# package level logger
+_logger = _common.LoggerManager.get_logger(__name__)
+
+# category of the recorded trace events
+TRACE_EVENT_CATEGORY = "wft4galaxy"
+
+
+class Tracer(object):
+    """
+    Thread-safe recorder of timed spans (e.g., the phases of the workflow tests)
+    which can be exported as a Chrome trace-event file, viewable in ``chrome://tracing`` or Perfetto.
+
+    Spans are grouped in tracks (e.g., one per workflow test): each pair <TRACK, THREAD>
+    is shown as a separate lane, so that spans of concurrent tests
+    (or of concurrent downloads of the same test) never overlap.
+    """
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self._pid = _os.getpid()
+        self._events = []
+        self._lanes = {}
+
+    @_contextmanager
+    def span(self, name, track=None, **args):
+        """
+        Record the time spent within the ``with`` block as a span.
+
+        :type name: str
+        :param name: the name of the span
+
+        :type track: str
+        :param track: the track of the span (``None`` to group the span by thread only)
+
+        Further keyword arguments are attached to the span.
+        """
+        start = _time.time()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, _time.time(), track=track, **args)
+
+    def add_span(self, name, start, end, track=None, **args):
+        """
+        Record a span from ``start`` to ``end`` (in seconds since the epoch).
+
+        :rtype: float
+        :return: the duration of the span (in seconds)
+        """
+        thread = _threading.current_thread()
+        duration = max(end - start, 0.0)
+        with self._lock:
+            lane = self._lanes.get((track, thread.ident))
+            if lane is None:
+                lane = len(self._lanes) + 1
+                self._lanes[(track, thread.ident)] = lane
+                self._events.append({
+                    "name": "thread_name", "ph": "M", "pid": self._pid, "tid": lane,
+                    "args": {"name": "{0} ({1})".format(track, thread.name) if track else thread.name}
+                })
+            self._events.append({
+                "name": name, "cat": TRACE_EVENT_CATEGORY, "ph": "X", "pid": self._pid, "tid": lane,
+                "ts": int(start * 1e6), "dur": int(duration * 1e6), "args": args
+            })
+        return duration
+
+    def get_events(self):
+        """
+        :rtype: list
+        :return: the recorded trace events (lane metadata included)
+        """
+        with self._lock:
+            return list(self._events)
+
+    def save(self, filename):
+        """
+        Write the recorded spans to ``filename`` in the Chrome trace-event format.
+        """
+        folder = _os.path.dirname(filename)
+        if folder and not _os.path.isdir(folder):
+            _os.makedirs(folder)
+        with open(filename, "w") as f:
+            _json.dump({"traceEvents": self.get_events(), "displayTimeUnit": "ms"}, f)
+        _logger.info("Trace of the workflow tests available @ %s", filename)